@@ -0,0 +1,32 @@
+import sqlite3
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+def open_checkpointer(path="checkpoints.db"):
+    #nodes run on langgraph's worker threads, so the connection is shared across threads
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+
+def compact_checkpoints(checkpointer, thread_id, keep=20):
+    """Delete all but the newest `keep` checkpoints (and their pending writes) of one thread."""
+    conn = checkpointer.conn
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "checkpoints" not in tables:
+        return 0
+    #the id column is thread_ts in langgraph 0.1 and checkpoint_id from 0.2 on; both sort by time
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(checkpoints)")}
+    id_column = "checkpoint_id" if "checkpoint_id" in columns else "thread_ts"
+    deleted = conn.execute(
+        f"DELETE FROM checkpoints WHERE thread_id = ? AND {id_column} NOT IN "
+        f"(SELECT {id_column} FROM checkpoints WHERE thread_id = ? ORDER BY {id_column} DESC LIMIT ?)",
+        (thread_id, thread_id, keep),
+    ).rowcount
+    if "writes" in tables:
+        conn.execute(
+            f"DELETE FROM writes WHERE thread_id = ? AND {id_column} NOT IN "
+            f"(SELECT {id_column} FROM checkpoints WHERE thread_id = ?)",
+            (thread_id, thread_id),
+        )
+    conn.commit()
+    return deleted
@@ -1,14 +1,18 @@
-from langchain_community.agent_toolkits.gmail.toolkit import GmailToolkit
-from langchain_community.tools.gmail.get_thread import GmailGetThread
 from langchain_community.tools.tavily_search import TavilySearchResults
 
 from textwrap import dedent
 from crewai import Agent
+from gmail_client import CachedGmailGetThread
 from .tools import CreateDraftTool
 
 class EmailFilterAgents:
-    def __init__(self):
-        self.gmail = GmailToolkit()
+    def __init__(self, gmail_resource, thread_cache=None, drafts=None, thread_id=None):
+        #the mailbox's client, the run's thread cache and the run's draft queue, never module state
+        self.gmail_resource = gmail_resource
+        self.thread_cache = thread_cache
+        self.drafts = drafts
+        #set when the agents work on a single thread; their drafts are tagged with it
+        self.thread_id = thread_id
     
     def email_filter_agent(self):
         return Agent(
@@ -29,7 +33,7 @@ class EmailFilterAgents:
             backstory = dedent("""\
                 With a keen eye for detail and a knack for understanding context, you specialize in identifying emails that require immediate action.
                 Your skill includes interpreting the urgency and importance of email based on its context and context."""),
-            tools = [GmailGetThread(api_source = self.gmail.api_resource), TavilySearchResults()],
+            tools = [CachedGmailGetThread(api_resource = self.gmail_resource, thread_cache = self.thread_cache), TavilySearchResults()],
             verbose=True,
             allow_delegation=False
         )
@@ -43,8 +47,8 @@ class EmailFilterAgents:
                 Your strength lies in your ability to communicate effectively, ensuring that each response is tailored to address the specific needs and context of the email."""),
             tools = [
                 TavilySearchResults(),
-                GmailGetThread(api_source = self.gmail.api_resource),
-                CreateDraftTool.create_draft
+                CachedGmailGetThread(api_resource = self.gmail_resource, thread_cache = self.thread_cache),
+                CreateDraftTool.create_draft(self.drafts, self.thread_id)
             ],
             verbose=True,
             allow_delegation=False
@@ -0,0 +1,105 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .agents import EmailFilterAgents
+from .tasks import EmailFilterTasks
+
+
+def prompt_config_hash():
+    """Hash of everything that shapes the agents' answers: task and agent definitions and the model."""
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(EmailFilterTasks).encode())
+    digest.update(inspect.getsource(EmailFilterAgents).encode())
+    digest.update(os.getenv("OPENAI_MODEL_NAME", "").encode())
+    return digest.hexdigest()[:16]
+
+
+class CrewCache:
+    """Persistent cache of crew results per thread, keyed by the thread's content.
+
+    A key covers the mailbox, the thread id, the ids of the messages in the thread and the prompt
+    configuration, so a thread that gains a message (or a prompt change) misses the cache.
+    Entries expire after ttl_seconds and the least recently used are evicted beyond max_entries.
+    """
+
+    def __init__(self, path="crew_cache.db", ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.config_hash = prompt_config_hash()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS crew_cache ("
+            "key TEXT NOT NULL, stage TEXT NOT NULL, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (key, stage))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS crew_cache_last_used ON crew_cache (last_used)")
+        self._db.commit()
+
+    def key(self, mailbox, thread_id, message_ids):
+        payload = json.dumps([mailbox, thread_id, sorted(message_ids), self.config_hash])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key, stage):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM crew_cache WHERE key = ? AND stage = ? AND created_at >= ?",
+                (key, stage, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE crew_cache SET last_used = ? WHERE key = ? AND stage = ?", (now, key, stage))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key, stage, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO crew_cache (key, stage, value, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, stage, json.dumps(value), now, now),
+            )
+            self._db.commit()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries."""
+        with self._lock:
+            expired = self._db.execute(
+                "DELETE FROM crew_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._db.execute(
+                "DELETE FROM crew_cache WHERE rowid IN "
+                "(SELECT rowid FROM crew_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._db.commit()
+        return expired + overflow
+
+    def stats(self):
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM crew_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def crew_cache_from_env(path=None):
+    return CrewCache(
+        path=path or os.getenv("CREW_CACHE_PATH", "crew_cache.db"),
+        ttl_seconds=float(os.getenv("CREW_CACHE_TTL_DAYS", 7)) * 24 * 3600,
+        max_entries=int(os.getenv("CREW_CACHE_MAX_ENTRIES", 5000)),
+    )
@@ -1,35 +1,327 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, wait
+
 from crewai import Crew
+from gmail_client import DraftQueue, ThreadCache
 from .agents import EmailFilterAgents
+from .cache import crew_cache_from_env
+from .summaries import ThreadSummaryStore, format_thread_update
 from .tasks import EmailFilterTasks
 
 class EmailFilterCrew:
-    def __init__(self):
-        agents = EmailFilterAgents()
-        self.filter_agent = agents.email_filter_agent()
-        self.action_agent = agents.email_action_agent()
-        self.writer_agent = agents.email_response_writer()
+    def __init__(self, account, llm_slots=None, data_dir=None):
+        #the mailbox (gmail_client.GmailAccount) every Gmail call and cache entry of this crew belongs to
+        self.account = account
+        #the crew cache and thread summaries live in data_dir when given, e.g. one directory per mailbox
+        self.data_dir = data_dir
+        self._stores_lock = threading.Lock()
+        self._crew_cache = None
+        self._thread_summaries = None
+        #"sequential" runs one crew over every email, "parallel" filters once then drafts per thread
+        self.mode = os.getenv("CREW_MODE", "sequential")
+        self.max_workers = int(os.getenv("CREW_MAX_WORKERS", 4))
+        self.thread_timeout = float(os.getenv("CREW_THREAD_TIMEOUT_SECONDS", 300))
+        #per-thread crews queue here for max_workers daemon workers; a timed out crew from an
+        #earlier cycle keeps its worker until it returns
+        self._jobs = queue.Queue()
+        self._workers_lock = threading.Lock()
+        self._workers_pid = None
+        #context manager shared by every crew that may call the LLM at once, e.g. the scheduler's LlmSlots
+        self.llm_slots = llm_slots or nullcontext()
+
+    def _path(self, name, env):
+        return os.path.join(self.data_dir, name) if self.data_dir else os.getenv(env, name)
+
+    @property
+    def crew_cache(self):
+        #opened on first use, so a process forked after the crew was built gets its own connection
+        with self._stores_lock:
+            if self._crew_cache is None:
+                self._crew_cache = crew_cache_from_env(self._path("crew_cache.db", "CREW_CACHE_PATH"))
+            return self._crew_cache
+
+    @property
+    def thread_summaries(self):
+        with self._stores_lock:
+            if self._thread_summaries is None:
+                self._thread_summaries = ThreadSummaryStore(
+                    self._path("thread_summaries.db", "THREAD_SUMMARY_DB_PATH")
+                )
+            return self._thread_summaries
 
     def kickoff(self, state):
+        #threads the agents pull are fetched in batch requests, drafts are collected and created together;
+        #both belong to this run only, so a thread left over from an earlier run cannot write into them
+        thread_cache = ThreadCache()
+        drafts = DraftQueue()
+        #(thread id or None, cache key, stage, value) written only once the drafts they depend on exist
+        on_drafted = []
+        try:
+            if self.mode == "parallel":
+                return self._kickoff_parallel(state, thread_cache, drafts, on_drafted)
+            return self._kickoff_sequential(state, thread_cache, drafts, on_drafted)
+        finally:
+            drafts.flush(self.account.resource(), self.account.quota)
+            for thread_id, key, stage, value in on_drafted:
+                if drafts.confirmed(thread_id):
+                    self.crew_cache.put(key, stage, value)
+            evicted = self.crew_cache.evict()
+            print(f"### thread cache: {thread_cache.hits} hits, {thread_cache.misses} misses ###")
+            print(f"### crew cache: {self.crew_cache.stats()}, {evicted} evicted ###")
+            print(f"### gmail quota: {self.account.quota.stats()} ###")
+
+    def _thread_key(self, email, thread_cache):
+        #a thread that gains a message gets a new key, so only changed threads go back to the agents
+        thread = thread_cache.get(email["threadId"])
+        message_ids = [message["id"] for message in thread["messages"]] if thread else [email["id"]]
+        return self.crew_cache.key(self.account.email, email["threadId"], message_ids)
+
+    def _prefetch(self, state, thread_cache):
+        thread_cache.prefetch(
+            self.account.resource(), [email["threadId"] for email in state["emails"]], self.account.quota
+        )
+        return {email["threadId"]: self._thread_key(email, thread_cache) for email in state["emails"]}
+
+    def _kickoff_sequential(self, state, thread_cache, drafts, on_drafted):
+        crew_cache = self.crew_cache
+        keys = self._prefetch(state, thread_cache)
+        emails = [email for email in state["emails"] if crew_cache.get(keys[email["threadId"]], "handled") is None]
+        #threads the filter agent already found need no action are dropped; the ones that do are
+        #filtered again, since the action task takes its list of emails from the filter task's answer
+        emails = [email for email in emails if crew_cache.get(keys[email["threadId"]], "filter") is not False]
+        if not emails:
+            print("### every thread is unchanged since it was last handled or found to need no action ###")
+            return {"action_required_emails": {}}
         print("### Filtering Emails ###")
+        threads = self._thread_messages(emails, thread_cache)
+        agents = EmailFilterAgents(self.account.resource(), thread_cache, drafts)
+        filter_agent = agents.email_filter_agent()
+        action_agent = agents.email_action_agent()
+        writer_agent = agents.email_response_writer()
         tasks = EmailFilterTasks()
+        filter_task = tasks.filter_emails_task(filter_agent, self._format_emails(emails))
+        action_task = tasks.action_required_emails_task(action_agent, self._format_thread_updates(threads))
         crew = Crew(
-            agents=[self.filter_agent, self.action_agent, self.writer_agent],
+            agents=[filter_agent, action_agent, writer_agent],
             tasks=[
-                tasks.filter_emails_task(self.filter_agent, self._format_emails(state['emails'])),
-                tasks.action_required_emails_task(self.action_agent),
-                tasks.draft_response_task(self.writer_agent)
+                filter_task,
+                action_task,
+                tasks.draft_response_task(writer_agent)
             ],
             verbose=True
         )
-        result = crew.kickoff()
+        result = self._run_crew(crew)
+        selected = self._action_required_ids(filter_task.output.raw) if filter_task.output is not None else None
+        if selected is not None:
+            #cached right away, like the parallel filter verdicts: they do not depend on any draft
+            for email in emails:
+                verdict = email["id"] in selected or email["threadId"] in selected
+                crew_cache.put(keys[email["threadId"]], "filter", verdict)
+        if action_task.output is not None:
+            stored = self.thread_summaries.update_many(threads, action_task.output.raw)
+            print(f"### updated {stored} thread summaries ###")
+        #the writer's drafts are not tagged by thread, so every thread counts as handled only if all were created
+        for email in emails:
+            on_drafted.append((None, keys[email["threadId"]], "handled", True))
         
         # Process the result and update the state
         processed_result = self._process_crew_result(result)
-        return {
-            **state,
-            "checked_email_ids": processed_result.get("checked_email_ids", []),
-            "action_required_email": processed_result.get("action_required_email", [])
+        return {"action_required_emails": processed_result}
+
+    def _kickoff_parallel(self, state, thread_cache, drafts, on_drafted):
+        crew_cache = self.crew_cache
+        keys = self._prefetch(state, thread_cache)
+        #reuse filter verdicts for unchanged threads; only the rest go to the filter agent
+        verdicts = {}
+        unfiltered = []
+        for email in state["emails"]:
+            verdict = crew_cache.get(keys[email["threadId"]], "filter")
+            if verdict is None:
+                unfiltered.append(email)
+            else:
+                verdicts[email["threadId"]] = verdict
+        if unfiltered:
+            print("### Filtering Emails ###")
+            selected = {email["id"] for email in self._filter_batch(unfiltered, thread_cache)}
+            for email in unfiltered:
+                verdicts[email["threadId"]] = email["id"] in selected
+                crew_cache.put(keys[email["threadId"]], "filter", verdicts[email["threadId"]])
+        action_emails = [email for email in state["emails"] if verdicts[email["threadId"]]]
+        print(f"### {len(action_emails)} of {len(state['emails'])} emails need action ###")
+        results = {}
+        if not action_emails:
+            return {"action_required_emails": results}
+
+        #one email per thread; check_email already keeps only the first of each thread
+        by_thread = {}
+        for email in action_emails:
+            by_thread.setdefault(email["threadId"], email)
+        for thread_id in list(by_thread):
+            drafted = crew_cache.get(keys[thread_id], "draft")
+            if drafted is not None:
+                results[thread_id] = {"status": "cached", "result": drafted}
+                del by_thread[thread_id]
+        started = {}
+        cancelled = {thread_id: threading.Event() for thread_id in by_thread}
+        submitted = time.monotonic()
+        futures = {
+            self._submit(
+                self._draft_thread, email, keys[thread_id], started, cancelled[thread_id], thread_cache, drafts
+            ): thread_id
+            for thread_id, email in by_thread.items()
         }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                thread_id = futures[future]
+                try:
+                    results[thread_id] = {"status": "drafted", "result": str(future.result())}
+                    #cached once the thread's draft has been created
+                    on_drafted.append((thread_id, keys[thread_id], "draft", results[thread_id]["result"]))
+                except Exception as e:
+                    print(f"### drafting thread {thread_id} failed: {e} ###")
+                    results[thread_id] = {"status": "error", "result": str(e)}
+            #a running thread gets thread_timeout from when it started; one still waiting for a
+            #worker (e.g. behind timed out threads of an earlier cycle) gets it from submission
+            now = time.monotonic()
+            for future in list(pending):
+                thread_id = futures[future]
+                if now - started.get(thread_id, submitted) > self.thread_timeout:
+                    print(f"### drafting thread {thread_id} timed out after {self.thread_timeout:.0f}s ###")
+                    pending.discard(future)
+                    results[thread_id] = {"status": "timeout", "result": ""}
+                    #the thread may keep running until its current LLM call returns; it drafts
+                    #nothing and caches no draft from here on
+                    future.cancel()
+                    cancelled[thread_id].set()
+                    drafts.discard(thread_id)
+        return {"action_required_emails": results}
+
+    def _submit(self, fn, *args):
+        """Queue fn for the crew's max_workers daemon workers and return its future.
+
+        Daemon workers, unlike a per-cycle executor's, are not left behind for the interpreter
+        to join when a timed out thread never finishes.
+        """
+        self._start_workers()
+        future = Future()
+        self._jobs.put((future, fn, args))
+        return future
+
+    def _start_workers(self):
+        #started on first use and again in a process forked since, which inherits none of them
+        with self._workers_lock:
+            if self._workers_pid == os.getpid():
+                return
+            self._workers_pid = os.getpid()
+            for _ in range(self.max_workers):
+                threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self):
+        while True:
+            future, fn, args = self._jobs.get()
+            #a thread that timed out while queued is skipped
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _filter_batch(self, emails, thread_cache):
+        filter_agent = EmailFilterAgents(self.account.resource(), thread_cache).email_filter_agent()
+        tasks = EmailFilterTasks()
+        crew = Crew(
+            agents=[filter_agent],
+            tasks=[tasks.filter_emails_batch_task(filter_agent, self._format_emails(emails))],
+            verbose=True
+        )
+        output = str(self._run_crew(crew))
+        match = re.search(r"\[.*?\]", output, re.DOTALL)
+        try:
+            selected = set(json.loads(match.group(0))) if match else None
+        except ValueError:
+            selected = None
+        if selected is None:
+            #the agent ignored the format; fall back to ids mentioned anywhere in its answer
+            return [email for email in emails if email["id"] in output or email["threadId"] in output]
+        return [email for email in emails if email["id"] in selected or email["threadId"] in selected]
+
+    def _action_required_ids(self, output):
+        #the ids under "action_required_email" in the filter task's answer, or None if it has no such list
+        match = re.search(r"action_required_email\w*[\"']?\s*:\s*(\[.*?\])", output, re.DOTALL)
+        try:
+            return set(json.loads(match.group(1))) if match else None
+        except ValueError:
+            return None
+
+    def _draft_thread(self, email, key, started, cancelled, thread_cache, drafts):
+        started[email["threadId"]] = time.monotonic()
+        crew_cache = self.crew_cache
+        thread_summaries = self.thread_summaries
+        #agents keep per-run state, so every thread gets its own, with this thread's gmail client;
+        #its drafts are tagged with the thread so a timeout can discard them
+        agents = EmailFilterAgents(self.account.resource(), thread_cache, drafts, thread_id=email["threadId"])
+        tasks = EmailFilterTasks()
+        analysis = crew_cache.get(key, "analysis")
+        if analysis is None:
+            action_agent = agents.email_action_agent()
+            thread = thread_cache.get(email["threadId"])
+            if thread is None:
+                task = tasks.thread_action_task(action_agent, email)
+            else:
+                #only the messages the stored summary does not cover go to the agent
+                summary, new_messages = thread_summaries.pending(email["threadId"], thread["messages"])
+                task = tasks.thread_update_task(
+                    action_agent, email, format_thread_update(email["threadId"], summary, new_messages)
+                )
+            analysis = str(self._run_crew(Crew(agents=[action_agent], tasks=[task], verbose=False), cancelled))
+            #a thread that timed out during the analysis stores nothing from it
+            if cancelled.is_set():
+                raise CancelledError()
+            if thread is not None:
+                thread_summaries.update(email["threadId"], thread["messages"], analysis)
+            crew_cache.put(key, "analysis", analysis)
+        writer_agent = agents.email_response_writer()
+        result = str(self._run_crew(Crew(
+            agents=[writer_agent],
+            tasks=[tasks.draft_thread_response_task(writer_agent, analysis)],
+            verbose=False
+        ), cancelled))
+        if cancelled.is_set():
+            raise CancelledError()
+        return result
+
+    def _thread_messages(self, emails, thread_cache):
+        #thread id -> its messages in order, for the threads prefetched into the thread cache
+        threads = {}
+        for email in emails:
+            thread = thread_cache.get(email["threadId"])
+            if thread is not None:
+                threads[email["threadId"]] = thread["messages"]
+        return threads
+
+    def _format_thread_updates(self, threads):
+        updates = []
+        for thread_id, messages in threads.items():
+            summary, new_messages = self.thread_summaries.pending(thread_id, messages)
+            if summary is not None:
+                updates.append(format_thread_update(thread_id, summary, new_messages))
+        return "\n\n".join(updates)
+
+    def _run_crew(self, crew, cancelled=None):
+        #a thread that timed out while waiting for a slot gives up instead of calling the LLM
+        with self.llm_slots:
+            if cancelled is not None and cancelled.is_set():
+                raise CancelledError()
+            return crew.kickoff()
 
     def _process_crew_result(self, result):
         # This method should process the crew result and extract the required information
@@ -0,0 +1,101 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+#a summary longer than this is cut, so the prompt it feeds stays bounded however long the thread gets
+MAX_SUMMARY_CHARS = int(os.getenv("THREAD_SUMMARY_MAX_CHARS", 2000))
+
+
+def _summaries_in(output):
+    """(thread_id, summary) pairs from an analysis answer: one dictionary or a list of them."""
+    match = re.search(r"[\[{].*[\]}]", output, re.DOTALL)
+    try:
+        parsed = json.loads(match.group(0)) if match else None
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    if isinstance(parsed, list):
+        return [
+            (str(item.get("thread_id", "")), str(item["summary"]))
+            for item in parsed if isinstance(item, dict) and item.get("summary")
+        ]
+    #not valid JSON; pick the fields out of the text in the order they appear
+    pairs = []
+    thread_id = ""
+    for key, value in re.findall(r'"?(thread_id|summary)"?\s*:\s*"?([^"\n]+)"?', output):
+        if key == "thread_id":
+            thread_id = value.strip().rstrip(",")
+        else:
+            pairs.append((thread_id, value.strip().rstrip(",")))
+    return pairs
+
+
+class ThreadSummaryStore:
+    """Rolling summary per thread: the last summary written and the id of the last message it covers.
+
+    The action agent gets the stored summary plus only the messages after that id, instead of the
+    whole thread, so its prompt stays about the same size as the thread grows.
+    """
+
+    def __init__(self, path="thread_summaries.db"):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS thread_summaries ("
+            "thread_id TEXT PRIMARY KEY, summary TEXT NOT NULL, last_message_id TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, thread_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary, last_message_id FROM thread_summaries WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def put(self, thread_id, summary, last_message_id):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO thread_summaries (thread_id, summary, last_message_id, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (thread_id, summary[:MAX_SUMMARY_CHARS], last_message_id, time.time()),
+            )
+            self._db.commit()
+
+    def pending(self, thread_id, messages):
+        """The stored summary and the messages it does not cover yet, for a thread's messages in order."""
+        summary, last_message_id = self.get(thread_id)
+        message_ids = [message["id"] for message in messages]
+        if last_message_id not in message_ids:
+            #no summary yet, or the message it ended at is gone; start the thread over
+            return None, messages
+        return summary, messages[message_ids.index(last_message_id) + 1:]
+
+    def update(self, thread_id, messages, output):
+        """Store the summary from an analysis of `thread_id`; returns whether one was found."""
+        for summary_thread_id, summary in _summaries_in(output):
+            if summary_thread_id in ("", thread_id) and messages:
+                self.put(thread_id, summary, messages[-1]["id"])
+                return True
+        return False
+
+    def update_many(self, threads, output):
+        """Store every summary in an analysis covering several threads; `threads` maps ids to their messages."""
+        stored = 0
+        for thread_id, summary in _summaries_in(output):
+            if threads.get(thread_id):
+                self.put(thread_id, summary, threads[thread_id][-1]["id"])
+                stored += 1
+        return stored
+
+
+def format_thread_update(thread_id, summary, messages):
+    """Prior summary and new messages of one thread, as the action agent gets them."""
+    lines = [f"Thread ID: {thread_id}", f"- Summary so far: {summary or 'none, this is the start of the thread'}"]
+    lines.extend(f"- New message {message['id']}: {message.get('snippet', '')}" for message in messages)
+    return "\n".join(lines)
+
@@ -26,10 +26,15 @@ class EmailFilterTasks:
 			""")
 		)
 	
-    def action_required_emails_task(self, agent):
+    def action_required_emails_task(self, agent, threads=""):
         return Task(
 			description=dedent(f"""\
 					  For each email thread, pull and analyze the complete threads using only the actual Thread ID.
+					  Threads listed below already have a summary of their earlier messages: for those, do not
+					  pull the thread; work from the summary so far and the new messages shown.
+
+					  {threads}
+
 					  Understand the context, key points and overall sentiment of the conversation.
 					  
 					  Identify the main query or concerns that need to be addressed in the response for each.
@@ -84,4 +89,96 @@ class EmailFilterTasks:
                 - "confirmation": A string confirming that all responses have been drafted
             """)
         )
-    
\ No newline at end of file
+
+    def filter_emails_batch_task(self, agent, emails):
+        return Task(
+            description=dedent(f"""\
+                Filter through the following emails and identify which ones require a response or action:
+
+                {emails}
+
+                Consider the urgency of the request, the importance of the sender, the complexity of the
+                task requested and any deadline mentioned. Newsletters, notifications and promotions never
+                require action."""),
+            agent=agent,
+            expected_output=dedent("""\
+                A JSON list with the IDs of the emails that require action, e.g. ["id1", "id2"], and nothing else.
+                An empty list if none of them do.""")
+        )
+
+    def thread_action_task(self, agent, email):
+        return Task(
+            description=dedent(f"""\
+                Pull and analyze the complete email thread with Thread ID {email['threadId']}.
+                The latest message is from {email['sender']}: {email['snippet']}
+
+                Understand the context, key points and overall sentiment of the conversation, and
+                identify the main query or concerns the response needs to address."""),
+            agent=agent,
+            expected_output=dedent("""\
+                A dictionary containing:
+                - "thread_id": The ID of the email thread
+                - "summary": A brief summary of the email thread
+                - "main_points": Key points highlighted from the thread
+                - "user": The user who will be responding
+                - "recipient": The person to whom the response will be sent
+                - "communication_style": The style of communication observed in the thread
+                - "sender_email": The email address of the sender
+            """)
+        )
+
+    def thread_update_task(self, agent, email, thread_update):
+        return Task(
+            description=dedent(f"""\
+                Analyze the email thread below from the summary of its earlier messages and the new messages.
+                Do not pull the thread; everything you need is here.
+
+                {thread_update}
+
+                The latest message is from {email['sender']}: {email['snippet']}
+
+                Understand the context, key points and overall sentiment of the conversation, and
+                identify the main query or concerns the response needs to address. Update the summary
+                so it covers the whole thread, new messages included, in a few sentences."""),
+            agent=agent,
+            expected_output=dedent("""\
+                A dictionary containing:
+                - "thread_id": The ID of the email thread
+                - "summary": A brief summary of the whole email thread
+                - "main_points": Key points highlighted from the thread
+                - "user": The user who will be responding
+                - "recipient": The person to whom the response will be sent
+                - "communication_style": The style of communication observed in the thread
+                - "sender_email": The email address of the sender
+            """)
+        )
+
+    def draft_thread_response_task(self, agent, analysis):
+        return Task(
+            description=dedent(f"""\
+                Draft a response for the email thread analysed below.
+                Ensure that the response is tailored to address the specific needs and concerns outlined in it.
+
+                {analysis}
+
+                - Assume the persona of the user and mimic the communication style in the thread.
+                - If necessary, feel free to research more on the topic inorder to provide a more detailed response.
+                - If research is needed, do it before drafting the response.
+                - If you need to pull the thread, do it using the thread_id.
+
+                Use the tool provided to draft the response.
+                When using the tool, pass the following inputs:
+                - to (sender to be responded)
+                - subject
+                - message
+
+                Your final answer must be a confirmation that the response has been drafted."""),
+            agent=agent,
+            expected_output=dedent("""\
+                A dictionary containing:
+                - "to": The recipient's email address
+                - "subject": The subject of the email
+                - "message": The drafted message body
+                - "confirmation": A string confirming that the response has been drafted
+            """)
+        )
@@ -0,0 +1,220 @@
+import threading
+import time
+import uuid
+
+from gmail_quota import method_cost
+
+
+class _Response(dict):
+    #httplib2's response is a dict of lower-cased headers with a status attribute
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient's HttpError closely enough for status and header checks."""
+
+    def __init__(self, status, message="", headers=None):
+        super().__init__(message or f"HTTP {status}")
+        self.resp = _Response(status, headers)
+
+
+class _Request:
+    def __init__(self, fn, methodId, gmail):
+        self._fn = fn
+        self.methodId = methodId
+        self._gmail = gmail
+
+    def run(self):
+        #the call itself, as a batch sends it; counts against the fake's rate limit
+        self._gmail._charge(self.methodId)
+        return self._fn()
+
+    def execute(self):
+        #like a client built by gmail_client, single requests wait on the quota scheduler if there is one
+        if self._gmail.quota is None:
+            return self.run()
+        return self._gmail.quota.call(self.run, self.methodId)
+
+
+class _Collection:
+    def __init__(self, methods, path, gmail):
+        self._methods = methods
+        self._path = path
+        self._gmail = gmail
+
+    def __getattr__(self, name):
+        try:
+            method = self._methods[name]
+        except KeyError:
+            raise AttributeError(name)
+        if isinstance(method, dict):
+            return lambda: _Collection(method, f"{self._path}.{name}", self._gmail)
+        return lambda **kwargs: _Request(lambda: method(**kwargs), f"{self._path}.{name}", self._gmail)
+
+
+class _Batch:
+    def __init__(self, callback, on_execute):
+        self._callback = callback
+        self._on_execute = on_execute
+        self._requests = []
+
+    def add(self, request, request_id=None):
+        self._requests.append((request, request_id or str(len(self._requests))))
+
+    def execute(self):
+        self._on_execute()
+        for request, request_id in self._requests:
+            try:
+                response, error = request.run(), None
+            except Exception as e:
+                response, error = None, e
+            self._callback(request_id, response, error)
+
+
+class FakeGmail:
+    """In-memory stand-in for the Gmail API resource (googleapiclient's build("gmail", "v1")).
+
+    Supports users().getProfile, users().messages().list/get, users().history().list,
+    users().threads().get, users().drafts().create and batch requests. Delivering a message
+    bumps the history id and can wake a trigger.
+
+    With units_per_second set, calls past that many quota units in a second fail with 429
+    like the real per-user limit; with a quota (gmail_quota.GmailQuota) set, single requests
+    go through it the way a client from gmail_client.get_gmail_resource() does.
+    """
+
+    def __init__(self, trigger=None, history_retention=1000, page_size=100, quota=None, units_per_second=None):
+        self.trigger = trigger
+        self.quota = quota
+        self.units_per_second = units_per_second
+        self.rate_limited = 0
+        self._window = (0, 0)
+        self.history_retention = history_retention
+        self.page_size = page_size
+        self.history_id = 1000
+        self.messages = {}
+        self.drafts = {}
+        self.history = []
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def deliver(self, sender, snippet, thread_id=None, subject="", labels=("INBOX", "UNREAD"), headers=None):
+        with self._lock:
+            self.history_id += 1
+            message_id = uuid.uuid4().hex[:16]
+            self.messages[message_id] = {
+                "id": message_id,
+                "threadId": thread_id or message_id,
+                "snippet": snippet,
+                "labelIds": list(labels),
+                "historyId": str(self.history_id),
+                "payload": {"headers": [
+                    {"name": "From", "value": sender},
+                    {"name": "Subject", "value": subject},
+                    *({"name": name, "value": value} for name, value in (headers or {}).items()),
+                ]},
+            }
+            self.history.append({"id": str(self.history_id), "message_id": message_id})
+            self.history = self.history[-self.history_retention:]
+            history_id = str(self.history_id)
+        if self.trigger:
+            self.trigger.notify(history_id)
+        return message_id
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _charge(self, method_id):
+        if self.units_per_second is None:
+            return
+        with self._lock:
+            second, units = self._window
+            now = int(time.monotonic())
+            units = (units if second == now else 0) + method_cost(method_id)
+            self._window = (now, units)
+            if units > self.units_per_second:
+                self.rate_limited += 1
+                #the window resets at the next whole second
+                raise FakeHttpError(429, "User-rate limit exceeded", headers={"retry-after": "1"})
+
+    def users(self):
+        return _Collection({
+            "getProfile": self._get_profile,
+            "messages": {"list": self._list_messages, "get": self._get_message},
+            "history": {"list": self._list_history},
+            "threads": {"get": self._get_thread},
+            "drafts": {"create": self._create_draft},
+        }, "gmail.users", self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(callback or (lambda request_id, response, exception: None), lambda: self._count("batch"))
+
+    def _get_thread(self, userId, id, **kwargs):
+        self._count("users.threads.get")
+        with self._lock:
+            messages = [dict(m) for m in self.messages.values() if m["threadId"] == id]
+        if not messages:
+            raise FakeHttpError(404, f"thread {id} not found")
+        return {"id": id, "historyId": messages[-1]["historyId"], "messages": messages}
+
+    def _create_draft(self, userId, body, **kwargs):
+        self._count("users.drafts.create")
+        draft_id = uuid.uuid4().hex[:16]
+        with self._lock:
+            self.drafts[draft_id] = body
+        return {"id": draft_id, "message": {"id": uuid.uuid4().hex[:16]}}
+
+    def _get_profile(self, userId):
+        self._count("users.getProfile")
+        return {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+
+    def _page(self, items, page_token):
+        start = int(page_token or 0)
+        end = start + self.page_size
+        return items[start:end], (str(end) if end < len(items) else None)
+
+    def _list_messages(self, userId, q=None, pageToken=None, **kwargs):
+        self._count("users.messages.list")
+        with self._lock:
+            ordered = sorted(self.messages.values(), key=lambda m: int(m["historyId"]), reverse=True)
+        page, next_token = self._page([{"id": m["id"], "threadId": m["threadId"]} for m in ordered], pageToken)
+        response = {"messages": page, "resultSizeEstimate": len(ordered)}
+        if next_token:
+            response["nextPageToken"] = next_token
+        return response
+
+    def _get_message(self, userId, id, format="full", metadataHeaders=None, **kwargs):
+        self._count("users.messages.get")
+        with self._lock:
+            if id not in self.messages:
+                raise FakeHttpError(404, f"message {id} not found")
+            return dict(self.messages[id])
+
+    def _list_history(self, userId, startHistoryId, historyTypes=None, labelId=None, pageToken=None, **kwargs):
+        self._count("users.history.list")
+        start = int(startHistoryId)
+        with self._lock:
+            if self.history and start < int(self.history[0]["id"]) - 1:
+                raise FakeHttpError(404, "Requested entity was not found.")
+            records = []
+            for entry in self.history:
+                message = self.messages.get(entry["message_id"])
+                if int(entry["id"]) <= start or not message:
+                    continue
+                if labelId and labelId not in message["labelIds"]:
+                    continue
+                records.append({
+                    "id": entry["id"],
+                    "messagesAdded": [{"message": {
+                        "id": message["id"], "threadId": message["threadId"], "labelIds": message["labelIds"],
+                    }}],
+                })
+            history_id = str(self.history_id)
+        page, next_token = self._page(records, pageToken)
+        response = {"history": page, "historyId": history_id}
+        if next_token:
+            response["nextPageToken"] = next_token
+        return response
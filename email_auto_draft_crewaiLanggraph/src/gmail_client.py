@@ -0,0 +1,259 @@
+import base64
+import os
+import threading
+import time
+from email.mime.text import MIMEText
+from typing import Any
+
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+from langchain_community.tools.gmail.get_thread import GmailGetThread
+from langchain_community.tools.gmail.utils import get_gmail_credentials
+
+from gmail_quota import is_rate_limited, quota_from_env
+
+#gmail recommends keeping batches at or under 50 calls
+BATCH_SIZE = 50
+
+_lock = threading.Lock()
+_credentials = {}
+_quotas = {}
+_local = threading.local()
+
+
+def _mailbox_key(token_file=None, client_secrets_file=None):
+    return (
+        token_file or os.getenv("GMAIL_TOKEN_FILE", "token.json"),
+        client_secrets_file or os.getenv("GMAIL_CREDENTIALS_FILE", "credentials.json"),
+    )
+
+
+def get_gmail_quota(token_file=None, client_secrets_file=None):
+    """The quota scheduler every Gmail call for a mailbox goes through; one per mailbox and process."""
+    key = _mailbox_key(token_file, client_secrets_file)
+    with _lock:
+        if key not in _quotas:
+            _quotas[key] = quota_from_env()
+        return _quotas[key]
+
+
+class QuotaHttpRequest(HttpRequest):
+    """HttpRequest whose execute() waits its turn in the mailbox's quota scheduler."""
+
+    quota = None
+
+    def execute(self, http=None, num_retries=0):
+        parent = super().execute
+        return self.quota.call(lambda: parent(http=http, num_retries=num_retries), self.methodId)
+
+
+def _request_builder(quota):
+    def build_request(*args, **kwargs):
+        request = QuotaHttpRequest(*args, **kwargs)
+        request.quota = quota
+        return request
+    return build_request
+
+
+def get_gmail_resource(token_file=None, client_secrets_file=None):
+    """Gmail API client shared across the process.
+
+    OAuth credentials are loaded once per (token, client secrets) pair and shared; each thread
+    gets its own API client built from them, because googleapiclient clients are not thread-safe.
+    Every request the client makes, including the langchain tools', goes through the mailbox's quota.
+    """
+    key = _mailbox_key(token_file, client_secrets_file)
+    with _lock:
+        if key not in _credentials:
+            _credentials[key] = get_gmail_credentials(token_file=key[0], client_secrets_file=key[1])
+        credentials = _credentials[key]
+    resources = getattr(_local, "resources", None)
+    if resources is None:
+        resources = _local.resources = {}
+    if key not in resources:
+        resources[key] = build(
+            "gmail", "v1", credentials=credentials, requestBuilder=_request_builder(get_gmail_quota(*key))
+        )
+    return resources[key]
+
+
+class GmailAccount:
+    """One mailbox: its address, its quota and a Gmail client for each thread that asks.
+
+    It is passed explicitly to the sync, the crew and the agents' tools, so nothing depends on
+    which mailbox a process served last, and crew threads that outlive a cycle still talk to the
+    mailbox they started for. An injected api_resource (e.g. a FakeGmail) is used by every thread.
+    """
+
+    def __init__(self, email, token_file=None, client_secrets_file=None, api_resource=None, quota=None):
+        self.email = email
+        self.token_file, self.client_secrets_file = _mailbox_key(token_file, client_secrets_file)
+        self._api_resource = api_resource
+        self.quota = quota or get_gmail_quota(self.token_file, self.client_secrets_file)
+
+    def resource(self):
+        return self._api_resource or get_gmail_resource(self.token_file, self.client_secrets_file)
+
+
+def _compact_thread(thread_data):
+    #same shape GmailGetThread returns
+    thread_data = dict(thread_data)
+    thread_data["messages"] = [
+        {key: message[key] for key in ("id", "snippet")} for message in thread_data.get("messages", [])
+    ]
+    return thread_data
+
+
+class ThreadCache:
+    """Threads fetched during one crew run, so each thread is pulled from Gmail once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._threads = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, thread_id):
+        with self._lock:
+            thread = self._threads.get(thread_id)
+            if thread is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return thread
+
+    def put(self, thread_id, thread):
+        with self._lock:
+            self._threads[thread_id] = thread
+
+    def __contains__(self, thread_id):
+        return thread_id in self._threads
+
+    def clear(self):
+        with self._lock:
+            self._threads.clear()
+            self.hits = self.misses = 0
+
+    def prefetch(self, api_resource, thread_ids, quota):
+        """Fetch every uncached thread with batch HTTP requests instead of one request each."""
+        missing = [thread_id for thread_id in dict.fromkeys(thread_ids) if thread_id not in self]
+        failed = []
+
+        def store(request_id, response, exception):
+            if exception is not None:
+                failed.append(request_id)
+            else:
+                self.put(request_id, _compact_thread(response))
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = api_resource.new_batch_http_request(callback=store)
+            for thread_id in missing[start:start + BATCH_SIZE]:
+                batch.add(api_resource.users().threads().get(userId="me", id=thread_id), request_id=thread_id)
+            #a batch costs the quota of every call in it
+            quota.call(batch.execute, "threads.get", count=len(missing[start:start + BATCH_SIZE]))
+        if missing:
+            print(f"## prefetched {len(missing) - len(failed)} threads in "
+                  f"{(len(missing) + BATCH_SIZE - 1) // BATCH_SIZE} batch request(s)")
+        return failed
+
+
+class CachedGmailGetThread(GmailGetThread):
+    """GmailGetThread that answers from a crew run's thread cache when it can."""
+
+    thread_cache: Any = None
+
+    def _run(self, thread_id, run_manager=None):
+        thread = self.thread_cache.get(thread_id) if self.thread_cache is not None else None
+        if thread is None:
+            thread = super()._run(thread_id, run_manager=run_manager)
+            if self.thread_cache is not None:
+                self.thread_cache.put(thread_id, thread)
+        return thread
+
+
+def _draft_body(to, subject, message):
+    mime = MIMEText(message)
+    mime["To"] = ", ".join(to)
+    mime["Subject"] = subject
+    return {"message": {"raw": base64.urlsafe_b64encode(mime.as_bytes()).decode()}}
+
+
+class DraftQueue:
+    """Collects the drafts of one crew run and creates them together in batch HTTP requests.
+
+    Each run gets its own queue and hands it to the agents' draft tool. Once flushed the queue is
+    closed, so a draft from a crew thread that outlived its run is dropped, not created later.
+    Drafts can be tagged with the email thread they answer, and a discarded thread's drafts are
+    dropped the same way.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._drafts = []
+        self._discarded = set()
+        self.closed = False
+        #thread id (None for untagged drafts) -> ids of its created drafts, and threads with a failed draft
+        self.created = {}
+        self.failed = set()
+
+    def add(self, to, subject, message, thread_id=None):
+        """Queue a draft; returns False if the run has been flushed or the thread discarded."""
+        with self._lock:
+            if self.closed or (thread_id is not None and thread_id in self._discarded):
+                return False
+            self._drafts.append((to, subject, message, thread_id))
+            return True
+
+    def discard(self, thread_id):
+        """Drop the queued drafts of a thread and refuse any it adds later, e.g. after it timed out."""
+        with self._lock:
+            self._discarded.add(thread_id)
+            self._drafts = [draft for draft in self._drafts if draft[3] != thread_id]
+
+    def confirmed(self, thread_id=None):
+        """After flush, whether every draft of thread_id was created; a tagged thread also needs at least one."""
+        if thread_id in self.failed:
+            return False
+        return thread_id is None or bool(self.created.get(thread_id))
+
+    def flush(self, api_resource, quota):
+        """Create every queued draft; returns the ids of the created drafts.
+
+        Drafts the batch answers with a rate limit error are sent again in a later batch.
+        """
+        with self._lock:
+            drafts, self._drafts, self.closed = self._drafts, [], True
+        created = []
+        pending = dict(enumerate(drafts))
+        attempt = 0
+        while pending:
+            limited = {}
+
+            def store(request_id, response, exception):
+                thread_id = pending[int(request_id)][3]
+                if exception is None:
+                    created.append(response["id"])
+                    self.created.setdefault(thread_id, []).append(response["id"])
+                elif is_rate_limited(exception) and attempt < quota.max_retries:
+                    limited[int(request_id)] = pending[int(request_id)]
+                else:
+                    print(f"## creating draft {request_id} failed: {exception}")
+                    self.failed.add(thread_id)
+
+            indexes = list(pending)
+            for start in range(0, len(indexes), BATCH_SIZE):
+                batch = api_resource.new_batch_http_request(callback=store)
+                for index in indexes[start:start + BATCH_SIZE]:
+                    to, subject, message, _ = pending[index]
+                    batch.add(
+                        api_resource.users().drafts().create(userId="me", body=_draft_body(to, subject, message)),
+                        request_id=str(index),
+                    )
+                quota.call(batch.execute, "drafts.create", count=len(indexes[start:start + BATCH_SIZE]))
+            if limited:
+                time.sleep(quota.backoff(attempt))
+                attempt += 1
+            pending = limited
+        if drafts:
+            print(f"## created {len(created)} of {len(drafts)} drafts")
+        return created
@@ -0,0 +1,189 @@
+import heapq
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+#lower runs first: drafts the crew has written, then reads the crew waits on, then background sync
+PRIORITY_DRAFT = 0
+PRIORITY_READ = 1
+PRIORITY_BACKGROUND = 2
+
+#quota units per method, from https://developers.google.com/gmail/api/reference/quota
+METHOD_COSTS = {
+    "getProfile": 1,
+    "drafts.create": 10,
+    "drafts.get": 5,
+    "drafts.list": 5,
+    "drafts.send": 100,
+    "drafts.update": 15,
+    "history.list": 2,
+    "labels.get": 1,
+    "labels.list": 1,
+    "messages.get": 5,
+    "messages.list": 5,
+    "messages.modify": 5,
+    "messages.send": 100,
+    "threads.get": 10,
+    "threads.list": 10,
+}
+DEFAULT_COST = 5
+
+_local = threading.local()
+
+
+def _method_name(method):
+    #googleapiclient method ids look like "gmail.users.threads.get"
+    return (method or "").removeprefix("gmail.").removeprefix("users.")
+
+
+def method_cost(method):
+    return METHOD_COSTS.get(_method_name(method), DEFAULT_COST)
+
+
+def method_priority(method):
+    name = _method_name(method)
+    return PRIORITY_DRAFT if name.startswith("drafts.") or name == "messages.send" else PRIORITY_READ
+
+
+@contextmanager
+def priority(level):
+    """Run the Gmail calls made by this thread inside the block at `level`, e.g. PRIORITY_BACKGROUND."""
+    previous = getattr(_local, "priority", None)
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def is_rate_limited(error):
+    """Whether an API error is Gmail asking us to slow down (429, or 403 rateLimitExceeded)."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return status == 429 or (status == 403 and "ratelimitexceeded" in str(error).lower())
+
+
+def _retry_after(error):
+    headers = getattr(error, "resp", None)
+    try:
+        return float(headers.get("retry-after")) if hasattr(headers, "get") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class GmailQuota:
+    """Token bucket over Gmail quota units that every call to one mailbox waits on.
+
+    The bucket refills at units_per_second (Gmail allows 250 per user) up to burst units. A call
+    takes its method's cost in units; while the bucket is short, callers queue and the best
+    priority goes first, ties in arrival order. Rate limit errors drain the bucket, so every
+    caller slows down, and the call is retried with exponential backoff.
+    """
+
+    def __init__(self, units_per_second=250.0, burst=None, max_retries=5, max_backoff=32.0):
+        self.units_per_second = units_per_second
+        self.burst = burst or units_per_second
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._sequence = 0
+        self._waits = deque(maxlen=1000)
+        self.max_queue_depth = 0
+        self.calls = {PRIORITY_DRAFT: 0, PRIORITY_READ: 0, PRIORITY_BACKGROUND: 0}
+        self.units = 0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.units_per_second)
+        self._updated = now
+
+    def acquire(self, cost, priority=PRIORITY_READ):
+        """Block until the call is first in line and the bucket holds its cost; returns the seconds waited."""
+        started = time.monotonic()
+        #a batch can cost more than the bucket holds; it waits for a full bucket and leaves it in debt
+        needed = min(cost, self.burst)
+        with self._cond:
+            self._sequence += 1
+            entry = (priority, self._sequence)
+            heapq.heappush(self._waiting, entry)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            try:
+                while True:
+                    self._refill()
+                    if self._waiting[0] != entry:
+                        self._cond.wait()
+                    elif self._tokens < needed:
+                        self._cond.wait((needed - self._tokens) / self.units_per_second)
+                    else:
+                        break
+            finally:
+                #leave the queue even if the wait was interrupted, or every caller behind us waits forever
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            self._tokens -= cost
+            self.units += cost
+            self.calls[priority] = self.calls.get(priority, 0) + 1
+            waited = time.monotonic() - started
+            self._waits.append(waited)
+        return waited
+
+    def backoff(self, attempt, error=None):
+        """Seconds to wait before retry number `attempt`; drains the bucket so other callers slow down too."""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0)
+            self.rate_limited += 1
+        delay = min(self.max_backoff, 2 ** attempt + random.random())
+        return max(delay, _retry_after(error) or 0)
+
+    def call(self, func, method, count=1, priority=None):
+        """Run func() once the quota allows `count` calls of `method`, retrying rate limit errors."""
+        if priority is None:
+            priority = getattr(_local, "priority", None)
+        if priority is None:
+            priority = method_priority(method)
+        cost = method_cost(method) * count
+        for attempt in range(self.max_retries + 1):
+            self.acquire(cost, priority)
+            try:
+                return func()
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                delay = self.backoff(attempt, e)
+                print(f"## gmail rate limited on {_method_name(method)}, retrying in {delay:.1f}s")
+                self.retries += 1
+                time.sleep(delay)
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            queue_depth = len(self._waiting)
+        percentile = lambda p: round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else 0.0
+        return {
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_p50_s": percentile(0.5),
+            "wait_p95_s": percentile(0.95),
+            "wait_max_s": round(waits[-1], 3) if waits else 0.0,
+            "calls": dict(self.calls),
+            "units": self.units,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+        }
+
+
+def quota_from_env():
+    return GmailQuota(
+        units_per_second=float(os.getenv("GMAIL_QUOTA_UNITS_PER_SECOND", 250)),
+        burst=float(os.getenv("GMAIL_QUOTA_BURST", 0)) or None,
+        max_retries=int(os.getenv("GMAIL_MAX_RETRIES", 5)),
+    )
@@ -1,34 +1,98 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import os
+
 from langgraph.graph import StateGraph
 
+from checkpoint import compact_checkpoints, open_checkpointer
+from gmail_client import GmailAccount
 from nodes import Node
+from prefilter import PreFilter
 from state import EmailState
 from crew.crew import EmailFilterCrew
 
 class Workflow:
-    def __init__(self):
-        nodes = Node()
+    def __init__(self, api_resource=None, trigger=None, mailbox=None, checkpointer=None,
+                 seen=None, llm_slots=None, continuous=True, token_file=None, credentials_file=None,
+                 data_dir=None):
+        #checkpoints are keyed by mailbox, so each mailbox resumes where it stopped
+        self.mailbox = mailbox or os.environ["MY_EMAIL"]
+        #the one Gmail account the sync, the crew and the agents' tools all use
+        self.account = GmailAccount(self.mailbox, token_file, credentials_file, api_resource=api_resource)
+        self.checkpointer = checkpointer or open_checkpointer(os.getenv("CHECKPOINT_DB_PATH", "checkpoints.db"))
+        self.checkpoint_keep = int(os.getenv("CHECKPOINT_KEEP", 20))
+        self.nodes = nodes = Node(account=self.account, trigger=trigger, seen=seen)
+        #every invoke is one cycle; a continuous graph ends it by waiting for the next poll and run() loops,
+        #otherwise the caller schedules the next cycle
         workflow = StateGraph(EmailState)
         #nodes    
         workflow.add_node("check_new_emails", nodes.check_email)
-        workflow.add_node("wait_next_run", nodes.wait_next_run)
-        workflow.add_node("draft_responses", EmailFilterCrew().kickoff)
+        workflow.add_node("prefilter", PreFilter().filter)
+        if continuous:
+            workflow.add_node("wait_next_run", self.wait_next_run)
+        workflow.add_node("draft_responses", EmailFilterCrew(self.account, llm_slots=llm_slots, data_dir=data_dir).kickoff)
+        workflow.add_node("mark_seen", nodes.mark_seen)
         #entry point
         workflow.set_entry_point("check_new_emails")
         #edges
-        workflow.add_edge("draft_responses", "wait_next_run")
-        workflow.add_edge("wait_next_run", "check_new_emails")
+        #every path ends in mark_seen, which only runs once drafting is done, so a failed cycle is retried
+        workflow.add_edge("draft_responses", "mark_seen")
+        if continuous:
+            workflow.add_edge("mark_seen", "wait_next_run")
+            workflow.set_finish_point("wait_next_run")
+        else:
+            workflow.set_finish_point("mark_seen")
         workflow.add_conditional_edges(
             "check_new_emails",
             nodes.new_emails,
+            {
+                "continue": "prefilter",
+                "__end__": "mark_seen"
+            }
+        )
+        workflow.add_conditional_edges(
+            "prefilter",
+            nodes.new_emails,
             {
                 "continue": "draft_responses",
-                "__end__": "wait_next_run"
+                "__end__": "mark_seen"
             }
         )
-        self.app = workflow.compile()
+        self.app = workflow.compile(checkpointer=self.checkpointer)
+        #a cycle runs each node at most once, so a step limit well above the node count only trips on a bug
+        self.config = {"configurable": {"thread_id": self.mailbox}, "recursion_limit": 2 * len(workflow.nodes)}
+
+    def wait_next_run(self, state):
+        deleted = compact_checkpoints(self.checkpointer, self.mailbox, self.checkpoint_keep)
+        if deleted:
+            print(f"## compacted {deleted} old checkpoints")
+        return self.nodes.wait_next_run(state)
+
+    def run(self):
+        """Run cycles forever, resuming from the mailbox's last checkpoint if there is one."""
+        while True:
+            self.run_once()
+
+    def run_once(self):
+        """Run a single cycle (waiting for the next poll at its end in a continuous graph); returns its final state."""
+        snapshot = self.app.get_state(self.config)
+        #a checkpoint left by the other kind of graph may stop at a node this one does not have
+        if snapshot.next and all(node in self.app.nodes for node in snapshot.next):
+            #a previous run stopped mid-cycle; continue at the node that did not complete
+            print(f"## resuming {self.mailbox} at {', '.join(snapshot.next)}")
+            state = self.app.invoke(None, self.config)
+        else:
+            values = snapshot.values or {}
+            state = self.app.invoke({
+                "emails": [],
+                "action_required_emails": {},
+                "history_id": values.get("history_id"),
+                "poll_interval": values.get("poll_interval"),
+                "prefilter_stats": values.get("prefilter_stats"),
+            }, self.config)
+        compact_checkpoints(self.checkpointer, self.mailbox, self.checkpoint_keep)
+        return state
 
 # if __name__ == "__main__":
 #     from IPython.display import Image, display
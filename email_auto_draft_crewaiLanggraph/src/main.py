@@ -1,5 +1,11 @@
+import os
+
 from graph import Workflow
+from sync import PushTrigger
 
 if __name__ == "__main__":
-    app = Workflow().app
-    app.invoke({"checked_emails_ids": None})
\ No newline at end of file
+    trigger = PushTrigger()
+    #point a Gmail push subscription (or anything that can POST) here to wake the graph early
+    if os.getenv("GMAIL_PUSH_PORT"):
+        trigger.serve(int(os.environ["GMAIL_PUSH_PORT"]))
+    Workflow(trigger=trigger).run()
@@ -1,45 +1,83 @@
 import os
-import time
 from langchain_community.agent_toolkits import GmailToolkit
 
+from gmail_client import GmailAccount
+from gmail_quota import PRIORITY_BACKGROUND, priority
+from seen_index import SeenIndex
+from sync import AdaptivePoller, HistorySync, TimerTrigger
+
 class Node:
-    def __init__(self):
-        self.gmail = GmailToolkit()
+    def __init__(self, account=None, trigger=None, seen=None):
+        #the mailbox (gmail_client.GmailAccount) this node syncs
+        self.account = account or GmailAccount(os.environ["MY_EMAIL"])
+        self.mailbox = self.account.email
+        #"history" syncs incrementally from the stored historyId, "search" re-runs the 1 day search every cycle
+        self.sync_mode = os.getenv("EMAIL_SYNC_MODE", "history")
+        #the search tool is built on the same client as the history sync
+        self.gmail = GmailToolkit(api_resource=self.account.resource())
         self.gmail_tools = self.gmail.get_tools()
+        self.sync = HistorySync(self.gmail.api_resource, quota=self.account.quota)
+        self.trigger = trigger or TimerTrigger()
+        self.seen = seen or SeenIndex(
+            path=os.getenv("SEEN_DB_PATH", "seen_emails.db"),
+            ttl_seconds=float(os.getenv("SEEN_TTL_DAYS", 7)) * 24 * 3600,
+        )
+        self.poller = AdaptivePoller(
+            min_interval=float(os.getenv("POLL_MIN_SECONDS", 15)),
+            max_interval=float(os.getenv("POLL_MAX_SECONDS", 180)),
+            backoff=float(os.getenv("POLL_BACKOFF", 2.0)),
+        )
 
     def check_email(self, state):
         print("Checking email")
-        search = self.gmail_tools[2]
-        
-        emails = search("after:newer_than:1d")
-        checked_emails = state["checked_emails_ids"] if state["checked_emails_ids"] else []
-        thread = []
+        history_id = state.get("history_id")
+        self.trigger.clear()
+        #polling is background work; drafts and the crew's reads go ahead of it in the quota queue
+        with priority(PRIORITY_BACKGROUND):
+            if self.sync_mode == "history":
+                emails, history_id = self.sync.sync(history_id)
+            else:
+                search = next(tool for tool in self.gmail_tools if tool.name == "search_gmail")
+                emails = search("after:newer_than:1d")
+        thread = set()
         new_emails = []
         for email in emails:
-            if (email["id"] not in checked_emails) \
+            if (email["id"] not in self.seen) \
                 and (email["threadId"] not in thread) \
-                and (os.environ["MY_EMAIL"] not in email["sender"]):
+                and (self.mailbox not in email["sender"]):
 
-                thread.append(email["threadId"])
+                thread.add(email["threadId"])
                 new_emails.append(
                     {
                         "id": email["id"],
                         "threadId": email["threadId"],
                         "snippet": email["snippet"],
-                        "sender": email["sender"]
+                        "sender": email["sender"],
+                        "subject": email.get("subject", ""),
+                        "labels": email.get("labels", []),
+                        "headers": email.get("headers", {})
                     }
                 )
-        checked_emails.extend([email["id"] for email in emails])
         return {
-            **state,
             "emails": new_emails,
-            "checked_emails_ids": checked_emails
+            "history_id": history_id,
+            #marked seen by mark_seen once the cycle's drafts are done, so a failed cycle retries them
+            "pending_seen": [email["id"] for email in emails]
         }
 
+    def mark_seen(self, state):
+        added = self.seen.add(state.get("pending_seen") or [])
+        expired = self.seen.expire()
+        print(f"## seen index: {len(self.seen)} ids ({added} added, {expired} expired)")
+        return {"pending_seen": []}
+
     def wait_next_run(self, state):
-        print("##waiting for 180 seconds")
-        time.sleep(180)
-        return state
+        interval = self.poller.next_interval(state.get("poll_interval"), bool(state.get("emails")))
+        print(f"##waiting up to {interval:.0f} seconds")
+        reason = self.trigger.wait(interval)
+        print(f"##woken by {reason}")
+        #the last cycle's emails are handled; dropping them keeps the checkpoint small while idle
+        return {"poll_interval": interval, "emails": [], "action_required_emails": {}}
 
     def new_emails(self, state):
         if len(state["emails"]) == 0:
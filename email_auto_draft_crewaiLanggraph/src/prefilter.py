@@ -0,0 +1,106 @@
+import os
+import re
+
+#gmail inbox categories that are almost never actionable; CATEGORY_UPDATES is left out since it holds comments and tickets
+DEFAULT_DROP_CATEGORIES = "CATEGORY_PROMOTIONS,CATEGORY_SOCIAL,CATEGORY_FORUMS"
+NOREPLY_PATTERN = re.compile(
+    r"(no-?reply|do-?not-?reply|notifications?|mailer-daemon|bounces?|newsletter|marketing)[^@]*@", re.IGNORECASE
+)
+BULK_PRECEDENCE = {"bulk", "list", "junk"}
+
+#tiny linear classifier over subject + snippet: positive weights suggest the mail wants an answer
+KEYWORD_WEIGHTS = {
+    r"\?": 1.5,
+    r"\b(can|could|would) you\b": 2.0,
+    r"\bplease\b": 1.0,
+    r"\b(urgent|asap|deadline|by (monday|tuesday|wednesday|thursday|friday|tomorrow|today|eod))\b": 2.0,
+    r"\b(meeting|call|schedule|availability|available)\b": 1.0,
+    r"\b(question|feedback|review|approve|approval|confirm)\b": 1.0,
+    r"\bunsubscribe\b": -3.0,
+    r"\b(newsletter|digest|webinar|promo(tion)?|sale|discount|coupon|deal)s?\b": -2.0,
+    r"\d+\s?% off\b": -2.5,
+    r"\b(receipt|order (confirmation|shipped)|has shipped|delivered|invoice paid)\b": -2.0,
+    r"\b(verification code|verify your|password reset|sign-?in attempt|security alert)\b": -2.5,
+    r"\b(view (this|it) in (your|a) browser|manage (your )?preferences)\b": -2.5,
+}
+
+
+def _env_list(name, default=""):
+    return [item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+def _address(sender):
+    match = re.search(r"<([^>]+)>", sender or "")
+    return (match.group(1) if match else sender or "").strip().lower()
+
+
+def _matches(address, patterns):
+    #entries are full addresses or "@domain" suffixes
+    return any(address == pattern or (pattern.startswith("@") and address.endswith(pattern)) for pattern in patterns)
+
+
+class PreFilter:
+    """Deterministic, CPU-only filter that drops obviously non-actionable mail before any LLM sees it.
+
+    Rules run in order: allow list, deny list, Gmail categories, mailing-list headers,
+    no-reply senders, then the keyword classifier. Allow-listed senders always go to the LLM.
+    """
+
+    def __init__(self, allow=None, deny=None, drop_categories=None, min_score=None):
+        self.allow = allow if allow is not None else _env_list("PREFILTER_ALLOW")
+        self.deny = deny if deny is not None else _env_list("PREFILTER_DENY")
+        self.drop_categories = set(
+            category.upper() for category in
+            (drop_categories if drop_categories is not None else _env_list("PREFILTER_DROP_CATEGORIES", DEFAULT_DROP_CATEGORIES))
+        )
+        #low enough that no single negative keyword drops a mail; it takes several, e.g. "unsubscribe" and "newsletter"
+        self.min_score = min_score if min_score is not None else float(os.getenv("PREFILTER_MIN_SCORE", -4))
+        self._weights = [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in KEYWORD_WEIGHTS.items()]
+
+    def score(self, email):
+        text = f"{email.get('subject', '')} {email.get('snippet', '')}"
+        return sum(weight for pattern, weight in self._weights if pattern.search(text))
+
+    def drop_reason(self, email):
+        """Why the email can be skipped, or None if it should go to the LLM."""
+        address = _address(email.get("sender"))
+        if _matches(address, self.allow):
+            return None
+        if _matches(address, self.deny):
+            return "deny_list"
+        if self.drop_categories.intersection(email.get("labels") or []):
+            return "category"
+        headers = {name.lower(): value for name, value in (email.get("headers") or {}).items()}
+        if headers.get("list-unsubscribe") or headers.get("list-id") \
+                or headers.get("precedence", "").lower() in BULK_PRECEDENCE \
+                or headers.get("auto-submitted", "no").lower() != "no":
+            return "bulk_headers"
+        if NOREPLY_PATTERN.search(address):
+            return "noreply_sender"
+        if self.score(email) <= self.min_score:
+            return "classifier"
+        return None
+
+    def filter(self, state):
+        print("## pre-filtering emails")
+        stats = dict(state.get("prefilter_stats") or {})
+        by_reason = dict(stats.get("by_reason") or {})
+        kept = []
+        for email in state["emails"]:
+            reason = self.drop_reason(email)
+            if reason is None:
+                kept.append(email)
+                continue
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+            print(f"## skipping {email['id']} from {email.get('sender', '')} ({reason})")
+        dropped = len(state["emails"]) - len(kept)
+        stats["seen"] = stats.get("seen", 0) + len(state["emails"])
+        stats["dropped"] = stats.get("dropped", 0) + dropped
+        stats["by_reason"] = by_reason
+        #every dropped email is one the LLM filter agent no longer has to classify
+        stats["llm_calls_saved"] = stats.get("llm_calls_saved", 0) + dropped
+        #a batch with nothing left skips the whole filter/action/writer crew run
+        stats["crew_runs_saved"] = stats.get("crew_runs_saved", 0) + (1 if state["emails"] and not kept else 0)
+        print(f"## pre-filter kept {len(kept)} of {len(state['emails'])} emails, "
+              f"{stats['llm_calls_saved']} LLM calls saved so far")
+        return {"emails": kept, "prefilter_stats": stats}
@@ -0,0 +1,252 @@
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from checkpoint import open_checkpointer
+from graph import Workflow
+from seen_index import SeenIndex
+
+
+def load_mailboxes(path):
+    """Mailboxes to serve, from a JSON list of {"email", "token_file", "credentials_file"} objects.
+
+    token_file defaults to tokens/<email>.json and credentials_file to GMAIL_CREDENTIALS_FILE.
+    """
+    with open(path) as f:
+        mailboxes = json.load(f)
+    for mailbox in mailboxes:
+        mailbox.setdefault("token_file", os.path.join("tokens", f"{mailbox['email']}.json"))
+        mailbox.setdefault("credentials_file", os.getenv("GMAIL_CREDENTIALS_FILE", "credentials.json"))
+    return mailboxes
+
+
+def shard(mailboxes, workers):
+    """Split mailboxes over at most `workers` shards; a mailbox always lands in the same shard."""
+    return [shard for shard in (mailboxes[index::workers] for index in range(workers)) if shard]
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class LlmSlots:
+    """Limit on concurrent LLM runs shared by every worker process, made of leases instead of a semaphore.
+
+    A lease records the process holding it and expires after lease_seconds, and leases held by a
+    process that has died are reclaimed, so a worker that crashes mid-run does not keep its slot.
+    Use it as a context manager around one LLM run, from any thread.
+    """
+
+    def __init__(self, manager, limit, lease_seconds=900.0, poll_seconds=0.2):
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._leases = manager.dict()
+        self._lock = manager.Lock()
+        self._held = {}
+
+    def __getstate__(self):
+        #the leases each thread holds are local to the process
+        state = dict(self.__dict__)
+        state["_held"] = {}
+        return state
+
+    def acquire(self):
+        """Wait for a free slot and return the id of the lease taken."""
+        while True:
+            with self._lock:
+                now = time.time()
+                for lease_id, (pid, expires) in self._leases.items():
+                    if expires < now or not _process_alive(pid):
+                        del self._leases[lease_id]
+                if len(self._leases) < self.limit:
+                    lease_id = uuid.uuid4().hex
+                    self._leases[lease_id] = (os.getpid(), now + self.lease_seconds)
+                    return lease_id
+            time.sleep(self.poll_seconds)
+
+    def release(self, lease_id):
+        with self._lock:
+            self._leases.pop(lease_id, None)
+
+    def __enter__(self):
+        self._held.setdefault(threading.get_ident(), []).append(self.acquire())
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release(self._held[threading.get_ident()].pop())
+
+
+class MailboxWorker:
+    """Serves a shard of mailboxes from one process, running up to `concurrency` mailbox cycles at once.
+
+    Mailboxes are kept in a queue ordered by when they are next due; among due mailboxes the one
+    that has waited longest goes first, and a mailbox goes to the back after every cycle, so a busy
+    inbox gets no more than its turn. Cycles run on a thread pool off the polling loop, so a long
+    crew run for one mailbox does not hold up polling the others. Each mailbox keeps its own
+    Workflow, credentials, checkpoints, caches, seen index and polling interval.
+    """
+
+    def __init__(self, mailboxes, llm_slots=None, data_dir="mailboxes", name="worker", concurrency=4):
+        self.mailboxes = {mailbox["email"]: mailbox for mailbox in mailboxes}
+        self.llm_slots = llm_slots
+        self.data_dir = data_dir
+        self.name = name
+        self.concurrency = concurrency
+        self.workflows = {}
+        self.intervals = {}
+        self.errors = {}
+        self._sequence = 0
+        self._queue = []
+        for email in self.mailboxes:
+            self._schedule(email, 0)
+
+    def _schedule(self, email, delay):
+        #the sequence number breaks ties between equally due mailboxes in first-come order
+        self._sequence += 1
+        heapq.heappush(self._queue, (time.monotonic() + delay, self._sequence, email))
+
+    def _workflow(self, email):
+        if email not in self.workflows:
+            directory = os.path.join(self.data_dir, re.sub(r"[^\w.@-]", "_", email))
+            os.makedirs(directory, exist_ok=True)
+            mailbox = self.mailboxes[email]
+            self.workflows[email] = Workflow(
+                mailbox=email,
+                token_file=mailbox["token_file"],
+                credentials_file=mailbox["credentials_file"],
+                data_dir=directory,
+                checkpointer=open_checkpointer(os.path.join(directory, "checkpoints.db")),
+                seen=SeenIndex(
+                    path=os.path.join(directory, "seen_emails.db"),
+                    ttl_seconds=float(os.getenv("SEEN_TTL_DAYS", 7)) * 24 * 3600,
+                ),
+                llm_slots=self.llm_slots,
+                continuous=False,
+            )
+        return self.workflows[email]
+
+    def run_cycle(self, email):
+        """Run one cycle for a mailbox and return the seconds until it is due again."""
+        try:
+            workflow = self._workflow(email)
+            state = workflow.run_once()
+        except Exception as e:
+            #back off harder on every consecutive failure, so a broken mailbox does not eat the worker
+            self.errors[email] = self.errors.get(email, 0) + 1
+            poller = self.workflows[email].nodes.poller if email in self.workflows else None
+            min_interval, max_interval, backoff = (
+                (poller.min_interval, poller.max_interval, poller.backoff) if poller else (15, 180, 2.0)
+            )
+            interval = min(max_interval, min_interval * backoff ** self.errors[email])
+            print(f"## [{self.name}] {email} failed ({self.errors[email]} in a row): {e}")
+            return interval
+        self.errors.pop(email, None)
+        found = bool(state.get("emails"))
+        self.intervals[email] = workflow.nodes.poller.next_interval(self.intervals.get(email), found)
+        print(f"## [{self.name}] {email}: {len(state.get('emails') or [])} new emails, "
+              f"next poll in {self.intervals[email]:.0f}s")
+        return self.intervals[email]
+
+    def run(self, stop=None):
+        #a mailbox is out of the queue while its cycle runs, so it never runs twice at once
+        finished = queue.Queue()
+        running = 0
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        def cycle(email):
+            finished.put((email, self.run_cycle(email)))
+
+        try:
+            while (self._queue or running) and not (stop and stop.is_set()):
+                delay = 1.0
+                if self._queue and running < self.concurrency:
+                    delay = self._queue[0][0] - time.monotonic()
+                    if delay <= 0:
+                        _, _, email = heapq.heappop(self._queue)
+                        running += 1
+                        executor.submit(cycle, email)
+                        continue
+                try:
+                    #wait in short steps so a stop request is noticed
+                    email, interval = finished.get(timeout=min(delay, 1.0))
+                except queue.Empty:
+                    continue
+                running -= 1
+                self._schedule(email, interval)
+        finally:
+            executor.shutdown(wait=True)
+
+
+def _run_worker(index, mailboxes, llm_slots, data_dir, stop, concurrency):
+    try:
+        MailboxWorker(
+            mailboxes, llm_slots=llm_slots, data_dir=data_dir, name=f"worker {index}", concurrency=concurrency
+        ).run(stop)
+    except KeyboardInterrupt:
+        #ctrl-c reaches the whole process group; the parent handles shutdown
+        pass
+
+
+def run_pool(mailboxes, workers=None, llm_concurrency=4, data_dir="mailboxes", mailbox_concurrency=4,
+             llm_lease_seconds=900.0):
+    """Serve mailboxes from a pool of worker processes sharing one LLM concurrency limit.
+
+    Each process owns a fixed shard of mailboxes; a process that dies is restarted with the
+    same shard and picks its mailboxes up from their checkpoints.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shard(mailboxes, workers)
+    manager = multiprocessing.Manager()
+    #crews in every process take a slot for each LLM run; slots of a dead process are reclaimed
+    llm_slots = LlmSlots(manager, llm_concurrency, lease_seconds=llm_lease_seconds)
+    stop = manager.Event()
+    print(f"## serving {len(mailboxes)} mailboxes from {len(shards)} processes, "
+          f"{llm_concurrency} concurrent LLM runs")
+
+    def start(index):
+        process = multiprocessing.Process(
+            target=_run_worker,
+            args=(index, shards[index], llm_slots, data_dir, stop, mailbox_concurrency),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    processes = [start(index) for index in range(len(shards))]
+    try:
+        while not stop.is_set():
+            time.sleep(5)
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"## worker {index} exited with code {process.exitcode}, restarting")
+                    processes[index] = start(index)
+    except KeyboardInterrupt:
+        stop.set()
+    for process in processes:
+        process.join(timeout=30)
+    manager.shutdown()
+
+
+if __name__ == "__main__":
+    run_pool(
+        load_mailboxes(os.getenv("MAILBOXES_FILE", "mailboxes.json")),
+        workers=int(os.getenv("SCHEDULER_WORKERS", 0)) or None,
+        llm_concurrency=int(os.getenv("SCHEDULER_LLM_CONCURRENCY", 4)),
+        data_dir=os.getenv("SCHEDULER_DATA_DIR", "mailboxes"),
+        mailbox_concurrency=int(os.getenv("SCHEDULER_MAILBOX_CONCURRENCY", 4)),
+        llm_lease_seconds=float(os.getenv("SCHEDULER_LLM_LEASE_SECONDS", 900)),
+    )
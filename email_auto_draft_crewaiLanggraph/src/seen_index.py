@@ -0,0 +1,59 @@
+import sqlite3
+import threading
+import time
+
+
+class SeenIndex:
+    """Ids of emails that were already processed, with time-based expiry.
+
+    Lookups hit an in-memory dict; every id is also written to SQLite so a restart does not
+    re-draft mail it has already seen. Ids older than ttl_seconds are dropped from both.
+    """
+
+    def __init__(self, path="seen_emails.db", ttl_seconds=7 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_at_idx ON seen (seen_at)")
+        self._db.commit()
+        #insertion order is first-seen order, so expiry only has to look at the front
+        self._seen = dict(self._db.execute(
+            "SELECT id, seen_at FROM seen WHERE seen_at >= ? ORDER BY seen_at", (time.time() - ttl_seconds,)
+        ))
+
+    def __contains__(self, email_id):
+        return email_id in self._seen
+
+    def __len__(self):
+        return len(self._seen)
+
+    def add(self, email_ids, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            new_ids = [email_id for email_id in dict.fromkeys(email_ids) if email_id not in self._seen]
+            for email_id in new_ids:
+                self._seen[email_id] = now
+            if new_ids:
+                self._db.executemany("INSERT OR IGNORE INTO seen (id, seen_at) VALUES (?, ?)",
+                                     [(email_id, now) for email_id in new_ids])
+                self._db.commit()
+        return len(new_ids)
+
+    def expire(self, now=None):
+        cutoff = (time.time() if now is None else now) - self.ttl_seconds
+        with self._lock:
+            expired = 0
+            while self._seen:
+                email_id, seen_at = next(iter(self._seen.items()))
+                if seen_at >= cutoff:
+                    break
+                del self._seen[email_id]
+                expired += 1
+            if expired:
+                self._db.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,))
+                self._db.commit()
+        return expired
+
+    def close(self):
+        self._db.close()
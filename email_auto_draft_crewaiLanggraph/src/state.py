@@ -2,7 +2,10 @@ import datetime
 from typing import TypedDict
 
 class EmailState(TypedDict):
-    checked_emails_ids: list[str]
     emails: list[dict]
     action_required_emails: dict
+    history_id: str
+    poll_interval: float
+    prefilter_stats: dict
+    pending_seen: list[str]
 
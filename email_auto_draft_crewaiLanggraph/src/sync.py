@@ -0,0 +1,218 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _http_status(error):
+    return getattr(getattr(error, "resp", None), "status", None)
+
+
+#gmail recommends keeping batches at or under 50 calls
+BATCH_SIZE = 50
+
+#headers the pre-filter looks at, fetched along with the sender and subject
+FILTER_HEADERS = ["List-Unsubscribe", "List-Id", "Precedence", "Auto-Submitted"]
+
+
+def _header(message, name):
+    for header in message.get("payload", {}).get("headers", []):
+        if header["name"].lower() == name.lower():
+            return header["value"]
+    return ""
+
+
+def _push_history_id(body):
+    """historyId from a Pub/Sub push body ({"message": {"data": base64 json}}) or a plain json body."""
+    try:
+        payload = json.loads(body or b"{}")
+        if "message" in payload:
+            payload = json.loads(base64.b64decode(payload["message"].get("data", "")) or b"{}")
+        return payload.get("historyId")
+    except (ValueError, AttributeError):
+        return None
+
+
+class HistorySync:
+    """Incremental inbox sync driven by Gmail history ids.
+
+    The first sync (or one whose history id has expired) runs a search and records the
+    mailbox historyId; after that only messages added since the stored id are fetched.
+    """
+
+    def __init__(self, api_resource, resync_query="newer_than:1d", quota=None):
+        self.api = api_resource
+        self.resync_query = resync_query
+        #charged for each metadata batch as the calls in it; single requests are charged by the client
+        self.quota = quota
+
+    def sync(self, history_id=None):
+        """Return (messages, new_history_id); messages have id, threadId, snippet and sender."""
+        if history_id:
+            try:
+                return self._incremental(history_id)
+            except Exception as e:
+                #history ids expire after about a week; gmail answers 404 and a full sync is needed
+                if _http_status(e) != 404:
+                    raise
+                print(f"## history id {history_id} expired, running a full sync")
+        return self._full()
+
+    def _full(self):
+        #read the cursor first so nothing arriving during the search is missed
+        history_id = self.api.users().getProfile(userId="me").execute()["historyId"]
+        message_ids = []
+        page_token = None
+        while True:
+            response = self.api.users().messages().list(
+                userId="me", q=self.resync_query, pageToken=page_token
+            ).execute()
+            message_ids.extend(message["id"] for message in response.get("messages", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        return self._metadata_many(message_ids), history_id
+
+    def _incremental(self, history_id):
+        message_ids = []
+        #a message can show up in several history records
+        seen = set()
+        page_token = None
+        while True:
+            response = self.api.users().history().list(
+                userId="me",
+                startHistoryId=history_id,
+                historyTypes=["messageAdded"],
+                labelId="INBOX",
+                pageToken=page_token,
+            ).execute()
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message_id = added["message"]["id"]
+                    if message_id not in seen:
+                        seen.add(message_id)
+                        message_ids.append(message_id)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        return self._metadata_many(message_ids), response.get("historyId", history_id)
+
+    def _metadata_request(self, message_id):
+        return self.api.users().messages().get(
+            userId="me", id=message_id, format="metadata", metadataHeaders=["From", "Subject", *FILTER_HEADERS]
+        )
+
+    def _metadata_many(self, message_ids):
+        """Metadata of every message, fetched in batch requests of BATCH_SIZE, in the order of message_ids."""
+        messages = {}
+        failed = []
+
+        def store(request_id, response, exception):
+            if exception is None:
+                messages[request_id] = self._summary(response)
+            elif _http_status(exception) != 404:
+                failed.append(request_id)
+
+        for start in range(0, len(message_ids), BATCH_SIZE):
+            chunk = message_ids[start:start + BATCH_SIZE]
+            batch = self.api.new_batch_http_request(callback=store)
+            for message_id in chunk:
+                batch.add(self._metadata_request(message_id), request_id=message_id)
+            if self.quota is None:
+                batch.execute()
+            else:
+                self.quota.call(batch.execute, "messages.get", count=len(chunk))
+        #calls that failed inside a batch, e.g. rate limited, are retried one at a time;
+        #a message deleted since it was listed (404) is just skipped
+        for message_id in failed:
+            try:
+                messages[message_id] = self._summary(self._metadata_request(message_id).execute())
+            except Exception as e:
+                if _http_status(e) != 404:
+                    raise
+        return [messages[message_id] for message_id in message_ids if message_id in messages]
+
+    def _summary(self, message):
+        return {
+            "id": message["id"],
+            "threadId": message["threadId"],
+            "snippet": message.get("snippet", ""),
+            "sender": _header(message, "From"),
+            "subject": _header(message, "Subject"),
+            "labels": message.get("labelIds", []),
+            "headers": {name: _header(message, name) for name in FILTER_HEADERS if _header(message, name)},
+        }
+
+
+class AdaptivePoller:
+    """Polling interval that drops to the minimum when mail arrives and backs off while the inbox is quiet."""
+
+    def __init__(self, min_interval=15, max_interval=300, backoff=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def next_interval(self, previous, found_new_emails):
+        if found_new_emails or not previous:
+            return self.min_interval
+        return min(self.max_interval, previous * self.backoff)
+
+
+class TimerTrigger:
+    """Trigger source that only wakes the graph when the polling interval runs out."""
+
+    def wait(self, timeout):
+        threading.Event().wait(timeout)
+        return "timer"
+
+    def clear(self):
+        pass
+
+
+class PushTrigger(TimerTrigger):
+    """Trigger source that can also be woken early, standing in for Gmail push notifications.
+
+    Call notify() from a Pub/Sub handler, a test or a fake Gmail API; serve() runs a small
+    webhook that calls it for every POST it receives.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.last_history_id = None
+        self._server = None
+
+    def notify(self, history_id=None):
+        self.last_history_id = history_id
+        self._event.set()
+
+    def wait(self, timeout):
+        woken = self._event.wait(timeout)
+        self._event.clear()
+        return "push" if woken else "timer"
+
+    def clear(self):
+        #notifications received before a sync are covered by it
+        self._event.clear()
+
+    def serve(self, port, host="127.0.0.1"):
+        trigger = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                trigger.notify(_push_history_id(body))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"## listening for push notifications on {host}:{self._server.server_address[1]}")
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from fake_gmail import FakeGmail, FakeHttpError
+from gmail_quota import PRIORITY_BACKGROUND, PRIORITY_DRAFT, PRIORITY_READ, GmailQuota
+from sync import HistorySync
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    quota = GmailQuota(units_per_second=100, burst=10)
+    quota.acquire(10)
+    order = []
+
+    def call(level, name):
+        quota.acquire(10, level)
+        order.append(name)
+
+    background = [threading.Thread(target=call, args=(PRIORITY_BACKGROUND, f"background {i}")) for i in range(2)]
+    for thread in background:
+        thread.start()
+        time.sleep(0.01)
+    read = threading.Thread(target=call, args=(PRIORITY_READ, "read"))
+    read.start()
+    time.sleep(0.01)
+    draft = threading.Thread(target=call, args=(PRIORITY_DRAFT, "draft"))
+    draft.start()
+    for thread in [*background, read, draft]:
+        thread.join()
+
+    #the empty bucket held everyone back until the draft had arrived
+    assert order == ["draft", "read", "background 0", "background 1"]
+    assert quota.stats()["calls"] == {PRIORITY_DRAFT: 1, PRIORITY_READ: 2, PRIORITY_BACKGROUND: 2}
+
+
+def test_bucket_refills_over_time():
+    quota = GmailQuota(units_per_second=200, burst=20)
+    assert quota.acquire(20) < 0.01
+    #empty now; 20 more units take 0.1s to come back
+    assert quota.acquire(20) == pytest.approx(0.1, abs=0.05)
+
+
+def test_call_costing_more_than_the_burst_leaves_the_bucket_in_debt():
+    quota = GmailQuota(units_per_second=200, burst=20)
+    #a 60 unit batch only waits for a full bucket, then takes it to -40
+    assert quota.acquire(60) < 0.01
+    #the next call waits for the debt to be paid off as well as for its own units
+    assert quota.acquire(10) == pytest.approx(0.25, abs=0.05)
+    assert quota.stats()["units"] == 70
+
+
+def test_interrupted_waiter_leaves_the_queue():
+    quota = GmailQuota(units_per_second=100, burst=10)
+    quota.acquire(10)
+
+    class InterruptedCondition(type(quota._cond)):
+        def wait(self, timeout=None):
+            raise KeyboardInterrupt
+
+    quota._cond = InterruptedCondition()
+    with pytest.raises(KeyboardInterrupt):
+        quota.acquire(10)
+    assert quota.stats()["queue_depth"] == 0
+
+    quota._cond = threading.Condition()
+    #nobody is left at the head of the queue, so the next caller only waits for tokens
+    assert quota.acquire(10) < 0.2
+
+
+def test_rate_limit_error_is_retried_after_retry_after():
+    quota = GmailQuota(units_per_second=1000, max_backoff=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise FakeHttpError(429, "User-rate limit exceeded", headers={"retry-after": "0.3"})
+        return "ok"
+
+    assert quota.call(flaky, "gmail.users.messages.get") == "ok"
+    #the server's Retry-After beats the shorter backoff
+    assert attempts[1] - attempts[0] >= 0.3
+    assert quota.stats()["rate_limited"] == 1
+    assert quota.stats()["retries"] == 1
+
+
+def test_errors_other_than_rate_limits_are_not_retried():
+    quota = GmailQuota(units_per_second=1000, max_backoff=0.01)
+    attempts = []
+
+    def missing():
+        attempts.append(1)
+        raise FakeHttpError(404, "Requested entity was not found.")
+
+    with pytest.raises(FakeHttpError):
+        quota.call(missing, "gmail.users.messages.get")
+    assert len(attempts) == 1
+
+
+def test_fake_gmail_429s_are_retried_through_the_quota():
+    quota = GmailQuota(units_per_second=1000, max_backoff=0.01)
+    gmail = FakeGmail(units_per_second=10, quota=quota)
+    message_id = gmail.deliver("a@example.com", "hi")
+    #messages.get costs 5 units, so the third call in one second goes over the fake's limit
+    for _ in range(3):
+        assert gmail.users().messages().get(userId="me", id=message_id).execute()["id"] == message_id
+    assert gmail.rate_limited >= 1
+    assert quota.stats()["retries"] == gmail.rate_limited
+
+
+def test_batch_is_charged_for_every_call_in_it():
+    quota = GmailQuota(units_per_second=10000)
+    gmail = FakeGmail(quota=quota)
+    for index in range(30):
+        gmail.deliver("a@example.com", f"message {index}")
+
+    messages, _ = HistorySync(gmail, quota=quota).sync()
+
+    assert len(messages) == 30
+    assert gmail.calls["batch"] == 1
+    #getProfile 1 + messages.list 5 + one batch of 30 messages.get at 5 each
+    assert quota.stats()["units"] == 1 + 5 + 30 * 5
+    assert sum(quota.stats()["calls"].values()) == 3
@@ -0,0 +1,112 @@
+import base64
+import json
+import threading
+import time
+import urllib.request
+
+from fake_gmail import FakeGmail
+from sync import AdaptivePoller, HistorySync, PushTrigger
+
+
+def test_full_sync_reads_every_page_and_returns_the_history_id():
+    gmail = FakeGmail(page_size=2)
+    ids = [gmail.deliver(f"sender{i}@example.com", f"message {i}", subject=f"subject {i}") for i in range(5)]
+
+    messages, history_id = HistorySync(gmail).sync()
+
+    #messages.list returns the newest first
+    assert [message["id"] for message in messages] == ids[::-1]
+    assert messages[0]["sender"] == "sender4@example.com"
+    assert messages[0]["subject"] == "subject 4"
+    assert history_id == str(gmail.history_id)
+    assert gmail.calls["users.messages.list"] == 3
+
+
+def test_incremental_sync_fetches_only_messages_added_since_the_history_id():
+    gmail = FakeGmail(page_size=2)
+    gmail.deliver("old@example.com", "already seen")
+    sync = HistorySync(gmail)
+    _, history_id = sync.sync()
+
+    new_ids = [gmail.deliver("new@example.com", f"new {i}") for i in range(3)]
+    messages, next_history_id = sync.sync(history_id)
+
+    assert [message["id"] for message in messages] == new_ids
+    assert next_history_id == str(gmail.history_id)
+    assert gmail.calls["users.history.list"] == 2
+    #nothing new: an empty result and the same cursor
+    assert sync.sync(next_history_id) == ([], next_history_id)
+
+
+def test_a_message_in_several_history_records_is_returned_once():
+    gmail = FakeGmail()
+    sync = HistorySync(gmail)
+    _, history_id = sync.sync()
+    message_id = gmail.deliver("a@example.com", "hello")
+    #gmail can report one message in more than one record, e.g. once per label change
+    gmail.history.append({"id": str(gmail.history_id), "message_id": message_id})
+
+    messages, _ = sync.sync(history_id)
+
+    assert [message["id"] for message in messages] == [message_id]
+
+
+def test_an_expired_history_id_falls_back_to_a_full_sync():
+    gmail = FakeGmail(history_retention=2)
+    sync = HistorySync(gmail)
+    _, history_id = sync.sync()
+    ids = [gmail.deliver("a@example.com", f"message {i}") for i in range(5)]
+
+    messages, next_history_id = sync.sync(history_id)
+
+    assert sorted(message["id"] for message in messages) == sorted(ids)
+    assert next_history_id == str(gmail.history_id)
+    assert gmail.calls["users.getProfile"] == 2
+
+
+def test_adaptive_poller_backs_off_while_quiet_and_resets_on_new_mail():
+    poller = AdaptivePoller(min_interval=15, max_interval=100, backoff=2.0)
+    intervals = [poller.next_interval(None, False)]
+    for _ in range(4):
+        intervals.append(poller.next_interval(intervals[-1], False))
+    assert intervals == [15, 30, 60, 100, 100]
+    assert poller.next_interval(100, True) == 15
+
+
+def test_push_trigger_wakes_early_on_notify_and_times_out_otherwise():
+    trigger = PushTrigger()
+    assert trigger.wait(0.01) == "timer"
+
+    threading.Timer(0.05, trigger.notify, args=("1234",)).start()
+    start = time.monotonic()
+    assert trigger.wait(5) == "push"
+    assert time.monotonic() - start < 1
+    assert trigger.last_history_id == "1234"
+
+    #a notification the sync already covered does not wake the next wait
+    trigger.notify("1235")
+    trigger.clear()
+    assert trigger.wait(0.01) == "timer"
+
+
+def test_push_trigger_webhook_decodes_pubsub_messages():
+    trigger = PushTrigger()
+    port = trigger.serve(0)
+    try:
+        data = base64.b64encode(json.dumps({"emailAddress": "me@example.com", "historyId": 4321}).encode()).decode()
+        body = json.dumps({"message": {"data": data}}).encode()
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/", data=body, method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.status == 204
+        assert trigger.wait(5) == "push"
+        assert trigger.last_history_id == 4321
+    finally:
+        trigger.close()
+
+
+def test_fake_gmail_delivery_wakes_a_push_trigger():
+    trigger = PushTrigger()
+    gmail = FakeGmail(trigger=trigger)
+    gmail.deliver("a@example.com", "hello")
+    assert trigger.wait(0) == "push"
+    assert trigger.last_history_id == str(gmail.history_id)
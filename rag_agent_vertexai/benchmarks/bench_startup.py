@@ -0,0 +1,78 @@
+"""
+Measure cold import time of the rag_agent package.
+
+Each run imports the package in a fresh interpreter, so nothing is cached between runs.
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --importtime   # also list the slowest imported modules
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time, warnings; warnings.simplefilter('ignore'); "
+    "start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_import(module: str) -> float:
+    """Import a module in a fresh interpreter and return the import time in seconds."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, limit: int):
+    """Return the modules with the largest cumulative import time according to -X importtime."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {module}"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in rows[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of rag_agent")
+    parser.add_argument("--module", default="rag_agent", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to time")
+    parser.add_argument("--importtime", action="store_true", help="also report the slowest imports")
+    parser.add_argument("--top", type=int, default=10, help="number of slow imports to report")
+    args = parser.parse_args()
+
+    timings = [time_import(args.module) for _ in range(args.runs)]
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_seconds": round(statistics.median(timings), 4),
+        "min_seconds": round(min(timings), 4),
+        "max_seconds": round(max(timings), 4),
+    }
+    if args.importtime:
+        report["slowest_imports"] = slowest_imports(args.module, args.top)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Load-test the rag_agent tools against an in-memory fake of vertexai.rag.
+
+Each operation is driven with the configured number of concurrent callers. The report
+gives per-operation latency percentiles, throughput, tool status counts and the backend
+calls the operation caused, as JSON that can be saved and diffed between versions.
+
+    python benchmarks/bench_tools.py --requests 200 --concurrency 8 --latency-ms 50
+    python benchmarks/bench_tools.py --ops rag_query list_corpora --output before.json
+    python benchmarks/bench_tools.py --output after.json --baseline before.json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.fake_rag import FakeRag  # noqa: E402
+
+OPERATIONS = ("rag_query", "add_data", "get_corpus_info", "list_corpora")
+
+
+class BenchToolContext:
+    """Minimal stand-in for ADK's ToolContext; the tools only use its state."""
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def build_operation(name: str, args: argparse.Namespace) -> Callable[[int], Dict[str, Any]]:
+    """Return a function that performs request number i of the given operation."""
+    from rag_agent.tools.add_data import add_data
+    from rag_agent.tools.get_corpus_info import get_corpus_info
+    from rag_agent.tools.list_corpora import list_corpora
+    from rag_agent.tools.rag_query import rag_query
+
+    def corpus(i: int) -> str:
+        return f"bench-corpus-{i % args.corpora}"
+
+    def context() -> BenchToolContext:
+        return shared_context if args.shared_state else BenchToolContext()
+
+    shared_context = BenchToolContext()
+    if name == "rag_query":
+        #repeat a fixed pool of questions so cache effects show up like they would in production
+        return lambda i: rag_query(corpus(i), f"benchmark question {i % args.distinct_queries}", context())
+    if name == "add_data":
+        return lambda i: add_data(
+            corpus(i), [f"gs://bench-bucket/ingest/doc-{i}-{n}.pdf" for n in range(args.files_per_add)], context()
+        )
+    if name == "get_corpus_info":
+        return lambda i: get_corpus_info(corpus(i), context(), summary_only=args.summary_only)
+    if name == "list_corpora":
+        return lambda i: list_corpora()
+    raise ValueError(f"Unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+
+
+def run_operation(name: str, operation: Callable[[int], Dict[str, Any]], fake: FakeRag,
+                  requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    """Run one operation and summarise latency, throughput, statuses and backend calls."""
+    for i in range(warmup):
+        operation(i)
+
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            status = operation(i).get("status", "unknown")
+        except Exception:
+            status = "exception"
+        return time.perf_counter() - start, status
+
+    calls_before = fake.call_counts()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, range(warmup, warmup + requests)))
+    elapsed = time.perf_counter() - start
+    calls_after = fake.call_counts()
+
+    latencies_ms = sorted(seconds * 1000 for seconds, _ in outcomes)
+    backend_calls = {
+        operation_name: calls_after.get(operation_name, 0) - calls_before.get(operation_name, 0)
+        for operation_name in sorted(calls_after)
+        if calls_after.get(operation_name, 0) != calls_before.get(operation_name, 0)
+    }
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "qps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 0.50), 2),
+            "p95": round(percentile(latencies_ms, 0.95), 2),
+            "p99": round(percentile(latencies_ms, 0.99), 2),
+            "mean": round(statistics.fmean(latencies_ms), 2) if latencies_ms else 0.0,
+            "max": round(latencies_ms[-1], 2) if latencies_ms else 0.0,
+        },
+        "statuses": dict(sorted(Counter(status for _, status in outcomes).items())),
+        "backend_calls": backend_calls,
+        "backend_calls_per_request": round(sum(backend_calls.values()) / requests, 3) if requests else 0.0,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change of the headline numbers against a previous report."""
+    def change(new: float, old: float) -> Optional[float]:
+        return round((new - old) / old * 100, 1) if old else None
+
+    deltas = {}
+    for name, result in report["operations"].items():
+        old = baseline.get("operations", {}).get(name)
+        if not old:
+            continue
+        deltas[name] = {
+            "qps_change_pct": change(result["qps"], old["qps"]),
+            "p50_change_pct": change(result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            "p95_change_pct": change(result["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            "p99_change_pct": change(result["latency_ms"]["p99"], old["latency_ms"]["p99"]),
+            "backend_calls_per_request_change": round(
+                result["backend_calls_per_request"] - old["backend_calls_per_request"], 3
+            ),
+        }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test rag_agent tools against a fake vertexai.rag")
+    parser.add_argument("--ops", nargs="+", default=list(OPERATIONS), choices=OPERATIONS, help="operations to run")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per operation")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent callers")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests run first per operation")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="injected latency of every backend call")
+    parser.add_argument("--op-latency", action="append", default=[], metavar="OP=MS",
+                        help="per-operation backend latency, e.g. import_files=500 (repeatable)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of backend calls failing with 503")
+    parser.add_argument("--corpora", type=int, default=3, help="corpora in the fake backend")
+    parser.add_argument("--files-per-corpus", type=int, default=200, help="files in each corpus")
+    parser.add_argument("--contexts-per-query", type=int, default=5, help="contexts returned per retrieval")
+    parser.add_argument("--distinct-queries", type=int, default=20, help="size of the rag_query question pool")
+    parser.add_argument("--files-per-add", type=int, default=5, help="paths passed to each add_data call")
+    parser.add_argument("--summary-only", action="store_true", help="call get_corpus_info with summary_only")
+    parser.add_argument("--shared-state", action="store_true", help="share one tool context across requests")
+    parser.add_argument("--seed", type=int, default=0, help="seed for jitter and error injection")
+    parser.add_argument("--output", help="write the JSON report to this file as well as stdout")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--log-level", default="ERROR", help="log level for the agent while benchmarking")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    #the fake's resource names must resolve to the fake's project
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench-project")
+
+    from rag_agent.client import get_config, set_rag_module
+
+    overrides = {}
+    for item in args.op_latency:
+        operation_name, _, milliseconds = item.partition("=")
+        overrides[operation_name] = float(milliseconds)
+    fake = FakeRag(
+        latency_ms=args.latency_ms,
+        latency_overrides=overrides,
+        jitter=args.jitter,
+        corpora=args.corpora,
+        files_per_corpus=args.files_per_corpus,
+        contexts_per_query=args.contexts_per_query,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    set_rag_module(fake)
+
+    report = {
+        "settings": {
+            key: value for key, value in sorted(vars(args).items()) if key not in ("output", "baseline", "log_level")
+        },
+        "agent_config": {
+            key: value for key, value in sorted(get_config().items())
+            if key.endswith(("_enabled", "_ttl_seconds", "_max_concurrency", "top_k", "page_size"))
+        },
+        "operations": {},
+    }
+    for name in args.ops:
+        report["operations"][name] = run_operation(
+            name, build_operation(name, args), fake, args.requests, args.concurrency, args.warmup
+        )
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["compared_to_baseline"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
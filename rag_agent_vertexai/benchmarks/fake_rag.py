@@ -0,0 +1,196 @@
+"""
+An in-memory stand-in for vertexai.rag, used by the benchmarks.
+
+Every service call sleeps for a configurable latency (plus jitter) and is counted, so a
+benchmark can report both how fast the tools are and how many backend calls they make.
+Install it with rag_agent.client.set_rag_module(FakeRag(...)).
+"""
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+PROJECT_ID = "bench-project"
+LOCATION = "us-central1"
+
+
+class FakeServiceError(Exception):
+    """A transient service error, as the real client raises for 503 responses."""
+    code = 503
+
+
+class _Options(SimpleNamespace):
+    """Stands in for the vertexai.rag configuration types."""
+
+
+class _Pager:
+    """Mirrors the list_files pager: rag_files and next_page_token describe the first page."""
+
+    def __init__(self, rag: "FakeRag", corpus_name: str, page_size: int, offset: int):
+        self._rag = rag
+        self._corpus_name = corpus_name
+        self._page_size = page_size
+        self.rag_files, self.next_page_token = rag._files_page(corpus_name, page_size, offset)
+
+    def __iter__(self):
+        files, next_page_token = self.rag_files, self.next_page_token
+        while True:
+            yield from files
+            if not next_page_token:
+                return
+            self._rag._service_call("list_files")
+            files, next_page_token = self._rag._files_page(self._corpus_name, self._page_size, int(next_page_token))
+
+
+class FakeRag:
+    """
+    Fake vertexai.rag module with injected latency and call counters.
+
+    Args:
+        latency_ms (float): Base latency of every service call
+        latency_overrides (Dict[str, float], optional): Per-operation latency, e.g. {"import_files": 500}
+        jitter (float): Latency is scaled by a random factor in [1 - jitter, 1 + jitter]
+        corpora (int): Number of corpora created up front, named bench-corpus-0..n-1
+        files_per_corpus (int): Number of files in each of those corpora
+        contexts_per_query (int): Contexts returned by retrieval_query (capped by top_k)
+        context_words (int): Words of text in each returned context
+        error_rate (float): Fraction of service calls that fail with a transient 503 error
+        wrap_errors (bool): Raise injected errors wrapped the way vertexai.rag does,
+                            RuntimeError("Failed in ... due to: ", error) from error
+        seed (int, optional): Seed for jitter and error injection
+    """
+
+    TransformationConfig = ChunkingConfig = RagRetrievalConfig = Filter = RagResource = _Options
+    RagEmbeddingModelConfig = VertexPredictionEndpoint = RagVectorDBConfig = _Options
+
+    def __init__(self, latency_ms: float = 50.0, latency_overrides: Optional[Dict[str, float]] = None,
+                 jitter: float = 0.2, corpora: int = 3, files_per_corpus: int = 200,
+                 contexts_per_query: int = 5, context_words: int = 200, error_rate: float = 0.0,
+                 seed: Optional[int] = None, wrap_errors: bool = False):
+        self.latency_ms = latency_ms
+        self.latency_overrides = latency_overrides or {}
+        self.jitter = jitter
+        self.contexts_per_query = contexts_per_query
+        self.context_words = context_words
+        self.error_rate = error_rate
+        self.wrap_errors = wrap_errors
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._corpora: Dict[str, SimpleNamespace] = {}
+        self._files: Dict[str, List[SimpleNamespace]] = {}
+        for index in range(corpora):
+            corpus = self._add_corpus(f"bench-corpus-{index}")
+            for file_index in range(files_per_corpus):
+                self._add_file(corpus.name, f"gs://bench-bucket/corpus-{index}/doc-{file_index}.pdf")
+
+    # bookkeeping
+
+    def _service_call(self, operation: str):
+        """Count the call, sleep for its latency and maybe fail it."""
+        with self._lock:
+            self.calls[operation] += 1
+            factor = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            fail = self._random.random() < self.error_rate
+        time.sleep(max(0.0, self.latency_overrides.get(operation, self.latency_ms) * factor) / 1000)
+        if fail:
+            error = FakeServiceError(f"503 Service Unavailable ({operation})")
+            if not self.wrap_errors:
+                raise error
+            raise RuntimeError(f"Failed in {operation} due to: ", error) from error
+
+    def call_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.calls)
+
+    def _add_corpus(self, display_name: str) -> SimpleNamespace:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{len(self._corpora) + 1:06d}"
+            corpus = SimpleNamespace(
+                name=name, display_name=display_name,
+                created_at=now, updated_at=now, create_time=now, update_time=now,
+            )
+            self._corpora[name] = corpus
+            self._files[name] = []
+        return corpus
+
+    def _add_file(self, corpus_name: str, source_uri: str):
+        #spread update times over the last year so summaries have a range to report
+        updated = datetime.now(timezone.utc) - timedelta(minutes=self._random.randint(0, 525600))
+        with self._lock:
+            files = self._files[corpus_name]
+            files.append(SimpleNamespace(
+                name=f"{corpus_name}/ragFiles/{len(files) + 1:08d}",
+                display_name=source_uri.rsplit("/", 1)[-1],
+                source_uri=source_uri,
+                create_time=updated,
+                update_time=updated,
+            ))
+
+    def _files_page(self, corpus_name: str, page_size: int, offset: int):
+        with self._lock:
+            files = list(self._files.get(corpus_name, []))
+        next_offset = offset + page_size
+        return files[offset:next_offset], str(next_offset) if next_offset < len(files) else ""
+
+    # the vertexai.rag surface used by the tools
+
+    def create_corpus(self, display_name: str, backend_config: Any = None, **kwargs) -> SimpleNamespace:
+        self._service_call("create_corpus")
+        return self._add_corpus(display_name)
+
+    def list_corpora(self, **kwargs) -> List[SimpleNamespace]:
+        self._service_call("list_corpora")
+        with self._lock:
+            return list(self._corpora.values())
+
+    def delete_corpus(self, name: str, **kwargs):
+        self._service_call("delete_corpus")
+        with self._lock:
+            self._corpora.pop(name, None)
+            self._files.pop(name, None)
+
+    def import_files(self, corpus_name: str, paths: Optional[Sequence[str]] = None, transformation_config: Any = None,
+                     max_embedding_requests_per_min: int = 1000, **kwargs) -> SimpleNamespace:
+        self._service_call("import_files")
+        for path in paths or []:
+            self._add_file(corpus_name, path)
+        return SimpleNamespace(
+            imported_rag_files_count=len(paths or []),
+            failed_rag_files_count=0,
+            skipped_rag_files_count=0,
+        )
+
+    def list_files(self, corpus_name: str, page_size: Optional[int] = None, page_token: Optional[str] = None,
+                   **kwargs) -> _Pager:
+        self._service_call("list_files")
+        return _Pager(self, corpus_name, page_size or 100, int(page_token or 0))
+
+    def delete_file(self, name: str, **kwargs):
+        self._service_call("delete_file")
+        corpus_name = name.split("/ragFiles/")[0]
+        with self._lock:
+            self._files[corpus_name] = [f for f in self._files.get(corpus_name, []) if f.name != name]
+
+    def retrieval_query(self, text: str, rag_resources: Any = None, rag_retrieval_config: Any = None,
+                        **kwargs) -> SimpleNamespace:
+        self._service_call("retrieval_query")
+        top_k = getattr(rag_retrieval_config, "top_k", None) or self.contexts_per_query
+        contexts = []
+        for resource in rag_resources or []:
+            with self._lock:
+                files = self._files.get(resource.rag_corpus, [])[:min(top_k, self.contexts_per_query)]
+            for rank, rag_file in enumerate(files):
+                words = [f"{word}{rank}" for word in text.split()] or ["text"]
+                body = " ".join(words[i % len(words)] for i in range(self.context_words))
+                contexts.append(SimpleNamespace(
+                    source_uri=rag_file.source_uri,
+                    source_display_name=rag_file.display_name,
+                    text=body,
+                    score=round(0.1 + 0.05 * rank, 4),
+                ))
+        return SimpleNamespace(contexts=SimpleNamespace(contexts=contexts))
@@ -0,0 +1,51 @@
+from typing import Any, Optional, Protocol, Sequence
+
+#names accepted by Config.rag_backend
+BACKENDS = ("vertex", "local")
+
+
+class RagBackend(Protocol):
+    """
+    The part of the vertexai.rag API the tools use.
+
+    get_rag() returns an object with this shape: the vertexai.rag module itself for the
+    "vertex" backend, or a LocalRag instance for the "local" backend. A new backend only
+    has to provide these functions and configuration types.
+    """
+
+    #configuration types, constructed with keyword arguments
+    TransformationConfig: Any
+    ChunkingConfig: Any
+    RagRetrievalConfig: Any
+    Filter: Any
+    RagResource: Any
+    RagEmbeddingModelConfig: Any
+    VertexPredictionEndpoint: Any
+    RagVectorDBConfig: Any
+
+    #optional: the vector distance threshold used when a tool does not pass one, if the
+    #backend's distances are not on the scale Config.distance_threshold is tuned for
+    #(None applies no threshold); backends without it use Config.distance_threshold
+    default_distance_threshold: Optional[float]
+
+    def create_corpus(self, display_name: str, backend_config: Any = None) -> Any:
+        """Create a corpus; the result has name and display_name."""
+
+    def list_corpora(self) -> Any:
+        """Iterate over every corpus."""
+
+    def delete_corpus(self, name: str) -> None:
+        """Delete a corpus and its files."""
+
+    def import_files(self, corpus_name: str, paths: Sequence[str], transformation_config: Any = None,
+                     max_embedding_requests_per_min: int = 1000) -> Any:
+        """Import files; the result has imported/failed/skipped_rag_files_count."""
+
+    def list_files(self, corpus_name: str, page_size: Optional[int] = None, page_token: Optional[str] = None) -> Any:
+        """Return a pager exposing rag_files and next_page_token for one page, iterable over all files."""
+
+    def delete_file(self, name: str) -> None:
+        """Delete one file from its corpus."""
+
+    def retrieval_query(self, text: str, rag_resources: Any = None, rag_retrieval_config: Any = None) -> Any:
+        """Return a response whose contexts.contexts have source_uri, source_display_name, text and score."""
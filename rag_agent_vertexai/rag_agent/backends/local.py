@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..tools.query_cache import EMBEDDING_DIMENSIONS, embed_query
+
+logger = logging.getLogger(__name__)
+
+
+class LocalNotFoundError(Exception):
+    """Raised for corpora or files that do not exist in the local store."""
+    code = 404
+
+
+class _Options(SimpleNamespace):
+    """Keyword-argument holder standing in for the vertexai.rag configuration types."""
+
+
+class _LocalPager:
+    """
+    Mirrors the list_files pager: rag_files and next_page_token describe the first page,
+    iterating yields every file across pages.
+    """
+
+    def __init__(self, fetch_page: Callable[[int], Tuple[List[Any], str]], page_token: Optional[str]):
+        self._fetch_page = fetch_page
+        self.rag_files, self.next_page_token = fetch_page(int(page_token or 0))
+
+    def __iter__(self):
+        files, next_page_token = self.rag_files, self.next_page_token
+        while True:
+            yield from files
+            if not next_page_token:
+                return
+            files, next_page_token = self._fetch_page(int(next_page_token))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _embed(texts: List[str]) -> np.ndarray:
+    """Dense float32 matrix of local hashed embeddings, one unit-length row per text."""
+    vectors = np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for bucket, value in embed_query(text).items():
+            vectors[row, bucket] = value
+    return vectors
+
+
+def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    Split text into chunks of about chunk_size tokens, consecutive chunks sharing about
+    chunk_overlap tokens. Vertex AI counts both settings in tokens; here a word and the space
+    after it are estimated at ~4 characters per token (as estimate_tokens does), so the same
+    configuration gives chunks of a similar size on either backend. Chunks are cut between
+    words, and a single word longer than chunk_size becomes a chunk of its own.
+    """
+    words = text.split()
+    costs = [(len(word) + 1) / 4 for word in words]
+    chunks = []
+    start = 0
+    while start < len(words):
+        end, used = start, 0.0
+        while end < len(words) and (end == start or used + costs[end] <= chunk_size):
+            used += costs[end]
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+        #step back over the overlap, but always move forward by at least one word
+        next_start, overlap = end, 0.0
+        while next_start - 1 > start and overlap + costs[next_start - 1] <= chunk_overlap:
+            next_start -= 1
+            overlap += costs[next_start]
+        start = next_start
+    return chunks
+
+
+class LocalRag:
+    """
+    Local RAG backend with the same interface as vertexai.rag.
+
+    Corpora live under root_dir: corpora.json lists them, and each corpus directory holds
+    files.json (file metadata), chunks.json (chunk text and owning file) and vectors.npy
+    (one embedding row per chunk, read memory-mapped). Embeddings are computed locally, so
+    nothing leaves the machine; only local files (plain paths or file:// urls, directories
+    are walked) can be imported.
+
+    The embeddings are lexical, so their cosine distances are not on the scale of the Vertex AI
+    embedding models: default_distance_threshold (None unless distance_threshold is given)
+    replaces Config.distance_threshold when a tool does not pass its own.
+    """
+
+    TransformationConfig = _Options
+    ChunkingConfig = _Options
+    RagRetrievalConfig = _Options
+    Filter = _Options
+    RagResource = _Options
+    RagEmbeddingModelConfig = _Options
+    VertexPredictionEndpoint = _Options
+    RagVectorDBConfig = _Options
+
+    def __init__(self, root_dir: str, project_id: str = "", location: str = "local",
+                 chunk_size: int = 512, chunk_overlap: int = 100, distance_threshold: Optional[float] = None):
+        self.root_dir = root_dir
+        self.name_prefix = f"projects/{project_id or 'local'}/locations/{location}/ragCorpora/"
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.default_distance_threshold = distance_threshold
+        self._lock = threading.RLock()
+        self._vectors: Dict[str, np.ndarray] = {}
+        os.makedirs(root_dir, exist_ok=True)
+
+    # storage helpers
+
+    def _write_json(self, path: str, data: Any):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str, default: Any) -> Any:
+        if not os.path.exists(path):
+            return default
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _corpora(self) -> Dict[str, Dict[str, Any]]:
+        return self._read_json(os.path.join(self.root_dir, "corpora.json"), {})
+
+    def _corpus_id(self, name: str) -> str:
+        corpus_id = name.split("/ragFiles/")[0].split("/")[-1]
+        if corpus_id not in self._corpora():
+            raise LocalNotFoundError(f"Corpus '{name}' not found")
+        return corpus_id
+
+    def _corpus_dir(self, corpus_id: str) -> str:
+        return os.path.join(self.root_dir, corpus_id)
+
+    def _load_corpus(self, corpus_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], np.ndarray]:
+        corpus_dir = self._corpus_dir(corpus_id)
+        files = self._read_json(os.path.join(corpus_dir, "files.json"), {})
+        chunks = self._read_json(os.path.join(corpus_dir, "chunks.json"), [])
+        if corpus_id not in self._vectors:
+            vectors_path = os.path.join(corpus_dir, "vectors.npy")
+            if os.path.exists(vectors_path):
+                self._vectors[corpus_id] = np.load(vectors_path, mmap_mode="r")
+            else:
+                self._vectors[corpus_id] = np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        return files, chunks, self._vectors[corpus_id]
+
+    def _save_corpus(self, corpus_id: str, files: Dict[str, Any], chunks: List[Dict[str, Any]], vectors: np.ndarray):
+        corpus_dir = self._corpus_dir(corpus_id)
+        os.makedirs(corpus_dir, exist_ok=True)
+        vectors_path = os.path.join(corpus_dir, "vectors.npy")
+        with open(f"{vectors_path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        self._vectors.pop(corpus_id, None)
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+        self._write_json(os.path.join(corpus_dir, "chunks.json"), chunks)
+        self._write_json(os.path.join(corpus_dir, "files.json"), files)
+        corpora = self._corpora()
+        corpora[corpus_id]["updated_at"] = _now()
+        self._write_json(os.path.join(self.root_dir, "corpora.json"), corpora)
+
+    def _corpus_object(self, corpus_id: str, record: Dict[str, Any]) -> SimpleNamespace:
+        created = datetime.fromisoformat(record["created_at"])
+        updated = datetime.fromisoformat(record["updated_at"])
+        return SimpleNamespace(
+            name=self.name_prefix + corpus_id,
+            display_name=record["display_name"],
+            created_at=created,
+            updated_at=updated,
+            create_time=created,
+            update_time=updated,
+        )
+
+    def _file_object(self, corpus_id: str, file_id: str, record: Dict[str, Any]) -> SimpleNamespace:
+        return SimpleNamespace(
+            name=f"{self.name_prefix}{corpus_id}/ragFiles/{file_id}",
+            display_name=record["display_name"],
+            source_uri=record["source_uri"],
+            create_time=datetime.fromisoformat(record["created_at"]),
+            update_time=datetime.fromisoformat(record["updated_at"]),
+        )
+
+    # corpora
+
+    def create_corpus(self, display_name: str, backend_config: Any = None, **kwargs) -> SimpleNamespace:
+        with self._lock:
+            corpus_id = uuid.uuid4().hex[:16]
+            corpora = self._corpora()
+            corpora[corpus_id] = {"display_name": display_name, "created_at": _now(), "updated_at": _now()}
+            self._write_json(os.path.join(self.root_dir, "corpora.json"), corpora)
+            os.makedirs(self._corpus_dir(corpus_id), exist_ok=True)
+            return self._corpus_object(corpus_id, corpora[corpus_id])
+
+    def list_corpora(self, **kwargs) -> List[SimpleNamespace]:
+        return [self._corpus_object(corpus_id, record) for corpus_id, record in self._corpora().items()]
+
+    def delete_corpus(self, name: str, **kwargs):
+        with self._lock:
+            corpus_id = self._corpus_id(name)
+            corpora = self._corpora()
+            del corpora[corpus_id]
+            self._write_json(os.path.join(self.root_dir, "corpora.json"), corpora)
+            self._vectors.pop(corpus_id, None)
+            shutil.rmtree(self._corpus_dir(corpus_id), ignore_errors=True)
+
+    # files
+
+    @staticmethod
+    def _expand_local_paths(paths: Sequence[str]) -> Tuple[List[str], int]:
+        """Resolve plain paths and file:// urls to files, walking directories. Returns (files, unusable path count)."""
+        files, failed = [], 0
+        for path in paths:
+            local_path = path[len("file://"):] if path.startswith("file://") else path
+            if "://" in local_path:
+                #remote sources cannot be read by the local backend
+                failed += 1
+            elif os.path.isdir(local_path):
+                for directory, _, names in os.walk(local_path):
+                    files.extend(os.path.join(directory, name) for name in sorted(names))
+            elif os.path.isfile(local_path):
+                files.append(local_path)
+            else:
+                failed += 1
+        return [os.path.abspath(f) for f in files], failed
+
+    def import_files(self, corpus_name: str, paths: Optional[Sequence[str]] = None, transformation_config: Any = None,
+                     max_embedding_requests_per_min: int = 1000, **kwargs) -> SimpleNamespace:
+        """
+        Chunk, embed and store local files. A file already imported from the same source and
+        not modified since is skipped; a modified one replaces its earlier chunks.
+        max_embedding_requests_per_min is accepted for compatibility; local embedding is not rate limited.
+        """
+        chunking = getattr(transformation_config, "chunking_config", None)
+        chunk_size = getattr(chunking, "chunk_size", None) or self.chunk_size
+        chunk_overlap = getattr(chunking, "chunk_overlap", None)
+        chunk_overlap = self.chunk_overlap if chunk_overlap is None else chunk_overlap
+
+        local_files, failed = self._expand_local_paths(paths or [])
+        imported = skipped = 0
+        with self._lock:
+            corpus_id = self._corpus_id(corpus_name)
+            files, chunks, vectors = self._load_corpus(corpus_id)
+            by_source = {record["source_uri"]: file_id for file_id, record in files.items()}
+            new_chunks, new_vectors, replaced_ids = [], [], set()
+            for local_file in local_files:
+                source_uri = f"file://{local_file}"
+                modified = os.path.getmtime(local_file)
+                existing_id = by_source.get(source_uri)
+                if existing_id and files[existing_id]["source_mtime"] == modified:
+                    skipped += 1
+                    continue
+                try:
+                    with open(local_file, "r", encoding="utf-8") as f:
+                        text_chunks = chunk_text(f.read(), chunk_size, chunk_overlap)
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.warning(f"Could not import '{local_file}': {str(e)}")
+                    failed += 1
+                    continue
+                if existing_id:
+                    replaced_ids.add(existing_id)
+                    del files[existing_id]
+                file_id = uuid.uuid4().hex[:16]
+                files[file_id] = {
+                    "display_name": os.path.basename(local_file),
+                    "source_uri": source_uri,
+                    "source_mtime": modified,
+                    "created_at": _now(),
+                    "updated_at": _now(),
+                }
+                new_chunks.extend({"file_id": file_id, "text": text} for text in text_chunks)
+                if text_chunks:
+                    new_vectors.append(_embed(text_chunks))
+                imported += 1
+
+            if imported:
+                keep = np.array([chunk["file_id"] not in replaced_ids for chunk in chunks], dtype=bool)
+                chunks = [chunk for chunk, kept in zip(chunks, keep) if kept] + new_chunks
+                vectors = np.vstack([np.asarray(vectors)[keep]] + new_vectors)
+                self._save_corpus(corpus_id, files, chunks, vectors)
+        return SimpleNamespace(
+            imported_rag_files_count=imported,
+            failed_rag_files_count=failed,
+            skipped_rag_files_count=skipped,
+        )
+
+    def list_files(self, corpus_name: str, page_size: Optional[int] = None, page_token: Optional[str] = None,
+                   **kwargs) -> _LocalPager:
+        corpus_id = self._corpus_id(corpus_name)
+        page_size = page_size or 100
+
+        def fetch_page(offset: int) -> Tuple[List[Any], str]:
+            with self._lock:
+                files = self._read_json(os.path.join(self._corpus_dir(corpus_id), "files.json"), {})
+            ordered = sorted(files.items(), key=lambda item: item[1]["created_at"])
+            page = [self._file_object(corpus_id, file_id, record) for file_id, record in ordered[offset:offset + page_size]]
+            next_offset = offset + page_size
+            return page, str(next_offset) if next_offset < len(ordered) else ""
+
+        return _LocalPager(fetch_page, page_token)
+
+    def delete_file(self, name: str, **kwargs):
+        file_id = name.split("/ragFiles/")[-1]
+        with self._lock:
+            corpus_id = self._corpus_id(name)
+            files, chunks, vectors = self._load_corpus(corpus_id)
+            if file_id not in files:
+                raise LocalNotFoundError(f"File '{name}' not found")
+            del files[file_id]
+            keep = np.array([chunk["file_id"] != file_id for chunk in chunks], dtype=bool)
+            chunks = [chunk for chunk, kept in zip(chunks, keep) if kept]
+            vectors = np.asarray(vectors)[keep]
+            self._save_corpus(corpus_id, files, chunks, vectors)
+
+    # retrieval
+
+    def retrieval_query(self, text: str, rag_resources: Any = None, rag_retrieval_config: Any = None,
+                        **kwargs) -> SimpleNamespace:
+        """Rank chunks by cosine distance to the query, honouring top_k and vector_distance_threshold."""
+        top_k = getattr(rag_retrieval_config, "top_k", None) or 10
+        threshold = getattr(getattr(rag_retrieval_config, "filter", None), "vector_distance_threshold", None)
+        query_vector = _embed([text])[0]
+
+        candidates = []
+        for resource in rag_resources or []:
+            with self._lock:
+                corpus_id = self._corpus_id(resource.rag_corpus)
+                files, chunks, vectors = self._load_corpus(corpus_id)
+            if not chunks:
+                continue
+            distances = 1.0 - np.asarray(vectors @ query_vector)
+            if threshold is not None:
+                eligible = np.nonzero(distances <= threshold)[0]
+            else:
+                eligible = np.arange(len(distances))
+            best = eligible[np.argsort(distances[eligible], kind="stable")[:top_k]]
+            for row in best:
+                record = files.get(chunks[row]["file_id"], {})
+                candidates.append(SimpleNamespace(
+                    source_uri=record.get("source_uri", ""),
+                    source_display_name=record.get("display_name", ""),
+                    text=chunks[row]["text"],
+                    score=float(distances[row]),
+                ))
+        candidates.sort(key=lambda context: context.score)
+        return SimpleNamespace(contexts=SimpleNamespace(contexts=candidates[:top_k]))
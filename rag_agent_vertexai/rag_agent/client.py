@@ -0,0 +1,101 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from .backends.base import BACKENDS
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_rag = None
+_rag_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Dict[str, Any]:
+    """
+    Get the agent configuration, built once and shared by every tool.
+
+    Returns:
+        Dict[str, Any]: The configuration values
+    """
+    return Config().config_dict()
+
+
+def _create_backend(config: Dict[str, Any]):
+    backend = config["rag_backend"]
+    if backend == "local":
+        from .backends.local import LocalRag
+
+        logger.info(f"Using the local RAG backend in '{config['local_backend_dir']}'")
+        return LocalRag(
+            config["local_backend_dir"],
+            project_id=config["project_id"],
+            location=config["location"],
+            chunk_size=config["chunk_size"],
+            chunk_overlap=config["chunk_overlap"],
+            distance_threshold=config["local_distance_threshold"],
+        )
+    if backend == "vertex":
+        import vertexai
+        from vertexai import rag
+
+        vertexai.init(project=config["project_id"] or None, location=config["location"])
+        logger.info(f"Initialised Vertex AI for project '{config['project_id']}' in '{config['location']}'")
+        return rag
+    raise ValueError(f"Unknown rag_backend '{backend}', expected one of {BACKENDS}")
+
+
+def get_rag():
+    """
+    Get the RAG backend the tools talk to, creating it on first use.
+
+    For the "vertex" backend this is the vertexai.rag module. Importing vertexai pulls in the
+    whole aiplatform SDK, so it is deferred until a tool actually needs it, and vertexai.init
+    runs once per process with the project and location from the configuration. For the
+    "local" backend it is a LocalRag instance with the same interface.
+
+    The backend is wrapped in ResilientRag, so service calls are retried on transient errors
+    and guarded by per-operation circuit breakers.
+
+    Returns:
+        The wrapped backend (or the module installed with set_rag_module)
+    """
+    global _rag
+    if _rag is None:
+        with _rag_lock:
+            if _rag is None:
+                from .resilience import ResilientRag
+
+                _rag = ResilientRag(_create_backend(get_config()))
+    return _rag
+
+
+def get_default_distance_threshold() -> Optional[float]:
+    """
+    Get the vector distance threshold tools apply when the caller does not pass one.
+
+    This is the backend's default_distance_threshold when it has one (the local backend's
+    lexical distances are not on the scale of Vertex AI embeddings), otherwise
+    config["distance_threshold"].
+
+    Returns:
+        Optional[float]: The threshold, or None to apply none
+    """
+    return getattr(get_rag(), "default_distance_threshold", get_config()["distance_threshold"])
+
+
+def set_rag_module(rag_module):
+    """
+    Replace the rag module used by every tool, e.g. with a local fake in tests and benchmarks.
+    Passing None restores lazy initialisation of vertexai.rag.
+
+    Args:
+        rag_module: An object exposing the vertexai.rag functions and types the tools use
+    """
+    from .resilience import ResilientRag
+
+    global _rag
+    with _rag_lock:
+        _rag = ResilientRag(rag_module) if rag_module is not None else None
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -42,6 +44,147 @@ class Config(BaseModel):
         description="Google Cloud location/region",
         default="us-central1"
     )
+    corpus_cache_ttl_seconds: int = Field(
+        description="How long the corpus name index is trusted before it is reloaded from list_corpora",
+        default=300
+    )
+    corpus_negative_cache_ttl_seconds: float = Field(
+        description="How long a freshly loaded corpus index is trusted to say a corpus does not exist before an unknown name reloads it",
+        default=10.0
+    )
+    multi_corpus_max_concurrency: int = Field(
+        description="Maximum number of corpora queried at the same time by rag_query_many",
+        default=4
+    )
+    multi_corpus_timeout_seconds: float = Field(
+        description="Per-corpus timeout for retrieval calls made by rag_query_many",
+        default=30.0
+    )
+    query_cache_enabled: bool = Field(
+        description="Whether rag_query results are cached and reused for repeated queries",
+        default=False
+    )
+    query_cache_max_entries: int = Field(
+        description="Maximum number of cached queries before the least recently used ones are evicted",
+        default=1024
+    )
+    query_cache_similarity_threshold: float = Field(
+        description="Minimum lexical similarity (hashed words and character trigrams, not meaning) for a cached "
+                    "result to be reused for a differently worded query; 1.0 reuses only exact matches of the "
+                    "normalized query. Wording close enough to match can still ask something different "
+                    "(a negation, another name), so lower it with care",
+        default=1.0
+    )
+    query_cache_ttl_seconds: int = Field(
+        description="How long a cached query result stays valid",
+        default=600
+    )
+    batch_query_max_concurrency: int = Field(
+        description="Maximum number of queries rag_query_batch runs at the same time",
+        default=4
+    )
+    ingestion_batch_size: int = Field(
+        description="Number of paths sent in each import_files call during bulk ingestion",
+        default=50
+    )
+    ingestion_max_workers: int = Field(
+        description="Maximum number of import batches running at the same time during bulk ingestion",
+        default=4
+    )
+    ingestion_manifest_dir: str = Field(
+        description="Directory where bulk ingestion progress manifests are stored",
+        default=".ingestion"
+    )
+    corpus_info_page_size: int = Field(
+        description="Default number of files returned per page by get_corpus_info",
+        default=100
+    )
+    delete_max_workers: int = Field(
+        description="Maximum number of documents delete_documents deletes at the same time",
+        default=8
+    )
+    rerank_enabled: bool = Field(
+        description="Whether rag_query over-fetches and re-ranks results locally before returning them",
+        default=False
+    )
+    rerank_fetch_k: int = Field(
+        description="Number of candidates fetched from the corpus when re-ranking is enabled",
+        default=20
+    )
+    rerank_fusion: str = Field(
+        description="How lexical and vector scores are combined: 'rrf' (reciprocal rank fusion) or 'weighted'",
+        default="rrf"
+    )
+    rerank_vector_weight: float = Field(
+        description="Weight of the vector score in 'weighted' fusion; the lexical score gets the rest",
+        default=0.5
+    )
+    rerank_mmr_lambda: float = Field(
+        description="Relevance vs. diversity trade-off for MMR (1.0 = relevance only)",
+        default=0.7
+    )
+    rerank_token_budget: int = Field(
+        description="Maximum estimated tokens of text returned by rag_query after re-ranking",
+        default=2000
+    )
+    rag_max_retries: int = Field(
+        description="Number of times an idempotent Vertex AI RAG call (retrieval and listing) is retried after a "
+                    "transient error (429/503); imports and deletes are not retried",
+        default=4
+    )
+    rag_backoff_base_seconds: float = Field(
+        description="Base delay for the jittered exponential backoff between retries",
+        default=0.5
+    )
+    rag_backoff_max_seconds: float = Field(
+        description="Maximum delay between two retries",
+        default=20.0
+    )
+    rag_call_deadline_seconds: float = Field(
+        description="Total time a Vertex AI RAG call may take, including retries; a call still running at the "
+                    "deadline is abandoned and fails",
+        default=120.0
+    )
+    rag_import_deadline_seconds: float = Field(
+        description="Deadline for a single import_files call, which embeds every file it imports",
+        default=600.0
+    )
+    circuit_breaker_failure_threshold: int = Field(
+        description="Consecutive transient failures of an operation before its circuit breaker opens",
+        default=5
+    )
+    circuit_breaker_reset_seconds: float = Field(
+        description="How long an open circuit breaker rejects calls before letting a trial call through",
+        default=30.0
+    )
+    context_pack_enabled: bool = Field(
+        description="Whether rag_query packs its results into a deduplicated, token-budgeted context",
+        default=False
+    )
+    context_token_budget: int = Field(
+        description="Maximum estimated tokens of context returned by rag_query when context packing is enabled",
+        default=1500
+    )
+    slow_call_threshold_ms: float = Field(
+        description="Tool calls and backend calls slower than this are logged as slow-call entries",
+        default=2000.0
+    )
+
+    rag_backend: str = Field(
+        description="Where corpora live: 'vertex' for Vertex AI RAG, 'local' for the on-disk local backend",
+        default="vertex"
+    )
+    local_backend_dir: str = Field(
+        description="Directory used by the local backend to store corpora, chunks and vectors",
+        default=".local_rag"
+    )
+    local_distance_threshold: Optional[float] = Field(
+        description="Maximum vector distance for the local backend, used instead of distance_threshold. Its "
+                    "embeddings are lexical (hashed words and character trigrams), so relevant chunks are often "
+                    "further away than the Vertex-tuned distance_threshold allows; unset applies no threshold "
+                    "and relies on top_k",
+        default=None
+    )
 
     def config_dict(self):
         return self.model_dump()
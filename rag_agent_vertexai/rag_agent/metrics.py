@@ -0,0 +1,258 @@
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from .client import get_config
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opentelemetry is optional
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class _Series:
+    """Counters and a latency histogram for one (kind, name) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_sum_ms = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.result_size_sum = 0
+
+    def observe(self, latency_ms: float, error: bool, result_size: int):
+        self.calls += 1
+        self.errors += int(error)
+        self.latency_sum_ms += latency_ms
+        self.result_size_sum += result_size
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.bucket_counts[index] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-tool and per-span metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+
+    def observe(self, kind: str, name: str, latency_ms: float, error: bool = False, result_size: int = 0):
+        with self._lock:
+            series = self._series.setdefault((kind, name), _Series())
+            series.observe(latency_ms, error, result_size)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the current metrics as plain data.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: "kind:name" -> calls, errors, latency and result size stats
+        """
+        with self._lock:
+            items = [(key, series) for key, series in self._series.items()]
+            snapshot = {}
+            for (kind, name), series in items:
+                snapshot[f"{kind}:{name}"] = {
+                    "calls": series.calls,
+                    "errors": series.errors,
+                    "mean_latency_ms": round(series.latency_sum_ms / series.calls, 2) if series.calls else 0.0,
+                    "p50_latency_ms": _bucket_quantile(series.bucket_counts, 0.5),
+                    "p95_latency_ms": _bucket_quantile(series.bucket_counts, 0.95),
+                    "p99_latency_ms": _bucket_quantile(series.bucket_counts, 0.99),
+                    "result_size_sum": series.result_size_sum,
+                }
+            return snapshot
+
+    def render_prometheus(self) -> str:
+        """
+        Render every series in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text, ready to serve from a /metrics endpoint
+        """
+        lines: List[str] = [
+            "# HELP rag_agent_latency_ms Latency of agent tools and backend calls in milliseconds.",
+            "# TYPE rag_agent_latency_ms histogram",
+        ]
+        with self._lock:
+            items = sorted(self._series.items())
+            for (kind, name), series in items:
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS, series.bucket_counts):
+                    cumulative += count
+                    lines.append(f'rag_agent_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'rag_agent_latency_ms_bucket{{{labels},le="+Inf"}} {series.calls}')
+                lines.append(f"rag_agent_latency_ms_sum{{{labels}}} {series.latency_sum_ms:.3f}")
+                lines.append(f"rag_agent_latency_ms_count{{{labels}}} {series.calls}")
+            lines += [
+                "# HELP rag_agent_calls_total Calls to agent tools and backend operations.",
+                "# TYPE rag_agent_calls_total counter",
+            ]
+            lines += [f'rag_agent_calls_total{{kind="{k}",name="{n}"}} {s.calls}' for (k, n), s in items]
+            lines += [
+                "# HELP rag_agent_errors_total Failed calls to agent tools and backend operations.",
+                "# TYPE rag_agent_errors_total counter",
+            ]
+            lines += [f'rag_agent_errors_total{{kind="{k}",name="{n}"}} {s.errors}' for (k, n), s in items]
+            lines += [
+                "# HELP rag_agent_result_size_total Size of results: response bytes for tools, items for backend calls.",
+                "# TYPE rag_agent_result_size_total counter",
+            ]
+            lines += [f'rag_agent_result_size_total{{kind="{k}",name="{n}"}} {s.result_size_sum}' for (k, n), s in items]
+        return "\n".join(lines) + "\n"
+
+
+def _bucket_quantile(bucket_counts: List[int], quantile: float) -> float:
+    """Upper bound of the histogram bucket containing the quantile."""
+    total = sum(bucket_counts)
+    if not total:
+        return 0.0
+    target = quantile * total
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS + (float("inf"),), bucket_counts):
+        cumulative += count
+        if cumulative >= target:
+            return float(bound)
+    return float("inf")
+
+
+registry = MetricsRegistry()
+
+
+def result_size_of(result: Any) -> int:
+    if isinstance(result, dict):
+        return len(json.dumps(result, default=str))
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+
+def _log_if_slow(kind: str, name: str, latency_ms: float, error: bool, **fields):
+    if latency_ms >= get_config()["slow_call_threshold_ms"]:
+        logger.warning(json.dumps({
+            "event": "slow_call",
+            "kind": kind,
+            "name": name,
+            "latency_ms": round(latency_ms, 1),
+            "error": error,
+            **fields,
+        }, default=str))
+
+
+def _exit_otel_span(otel_span: Any, exception: BaseException = None):
+    #passing the exception lets OpenTelemetry record it and mark the span as failed
+    if exception is None:
+        otel_span.__exit__(None, None, None)
+    else:
+        otel_span.__exit__(type(exception), exception, exception.__traceback__)
+
+
+@contextmanager
+def span(name: str, kind: str = "span", **attributes) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block of code and record it in the metrics registry (and as an OpenTelemetry
+    span when opentelemetry is installed). Exceptions are counted as errors and re-raised.
+
+    Args:
+        name (str): Name of the operation, e.g. "rag.retrieval_query"
+        kind (str): Metric kind label, "span" for internal operations
+
+    Yields:
+        Dict[str, Any]: Set "result_size" on it to record the size of the block's result
+    """
+    otel_span = otel_trace.get_tracer(__name__).start_as_current_span(name) if otel_trace else None
+    if otel_span is not None:
+        current = otel_span.__enter__()
+        for key, value in attributes.items():
+            current.set_attribute(key, str(value))
+    info: Dict[str, Any] = {"result_size": 0}
+    start = time.perf_counter()
+    exception = None
+    try:
+        yield info
+    except BaseException as e:
+        exception = e
+        raise
+    finally:
+        latency_ms = (time.perf_counter() - start) * 1000
+        error = exception is not None
+        registry.observe(kind, name, latency_ms, error, info["result_size"])
+        _log_if_slow(kind, name, latency_ms, error, **attributes)
+        if otel_span is not None:
+            _exit_otel_span(otel_span, exception)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of span() for internal helpers."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """
+    Record latency, call and error counts and response size for an agent tool.
+
+    A tool counts as failed if it raises or returns a dict with status "error". The wrapper
+    keeps the tool's name, docstring and signature, so ADK builds the same declaration.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        otel_span = otel_trace.get_tracer(__name__).start_as_current_span(f"tool.{name}") if otel_trace else None
+        current = otel_span.__enter__() if otel_span is not None else None
+        start = time.perf_counter()
+        result = None
+        error = True
+        exception = None
+        try:
+            result = fn(*args, **kwargs)
+            error = isinstance(result, dict) and result.get("status") == "error"
+            return result
+        except BaseException as e:
+            exception = e
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            size = result_size_of(result) if result is not None else 0
+            registry.observe("tool", name, latency_ms, error, size)
+            _log_if_slow("tool", name, latency_ms, error, result_size=size)
+            if otel_span is not None:
+                if error and exception is None:
+                    #the tool reported the failure in its result rather than raising
+                    current.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(result.get("message", ""))))
+                _exit_otel_span(otel_span, exception)
+
+    return wrapper
+
+
+def get_metrics_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Current per-tool and per-span metrics as plain data."""
+    return registry.snapshot()
+
+
+def render_prometheus() -> str:
+    """Current metrics in the Prometheus text exposition format."""
+    return registry.render_prometheus()
@@ -0,0 +1,339 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+from .client import get_config
+from .metrics import span, result_size_of
+
+logger = logging.getLogger(__name__)
+
+#rag functions that talk to the service and are wrapped by ResilientRag
+RESILIENT_OPERATIONS = {
+    "retrieval_query",
+    "import_files",
+    "list_corpora",
+    "list_files",
+    "delete_file",
+    "delete_corpus",
+}
+
+#the operations that are safe to repeat; a failed import or delete may already have been
+#applied by the service, and repeating an import would import the same files twice
+RETRIED_OPERATIONS = {
+    "retrieval_query",
+    "list_corpora",
+    "list_files",
+}
+
+#operations whose deadline is longer than config["rag_call_deadline_seconds"], by config key
+DEADLINE_CONFIG_KEYS = {
+    "import_files": "rag_import_deadline_seconds",
+}
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {
+    "TooManyRequests",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "BadGateway",
+    "GatewayTimeout",
+    "DeadlineExceeded",
+}
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when an operation is still running at its deadline. The abandoned call may still complete."""
+
+    def __init__(self, operation: str, deadline_seconds: float):
+        super().__init__(f"Vertex AI RAG operation '{operation}' did not finish within {deadline_seconds:.1f} seconds")
+        self.operation = operation
+        self.deadline_seconds = deadline_seconds
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an operation whose circuit breaker is open."""
+
+    def __init__(self, operation: str, retry_in: float):
+        super().__init__(
+            f"Vertex AI RAG operation '{operation}' is failing repeatedly; not retrying for another {retry_in:.1f} seconds"
+        )
+        self.operation = operation
+        self.retry_in = retry_in
+
+
+def _error_chain(error: BaseException):
+    """
+    The error and the errors it wraps, outermost first.
+
+    vertexai.rag re-raises every service error as RuntimeError("Failed in ... due to: ", e) from e,
+    so the status code lives on the __cause__ (and the original error is also in args).
+    """
+    seen = set()
+    pending = [error]
+    while pending and len(seen) < 16:
+        current = pending.pop(0)
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        pending.append(current.__cause__)
+        pending.append(current.__context__)
+        pending.extend(arg for arg in getattr(current, "args", ()) if isinstance(arg, BaseException))
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Decide whether an error is worth retrying (rate limiting or a temporarily unavailable service).
+
+    Works with google.api_core exceptions, which carry the HTTP status in `code`, as well as
+    any error exposing `code` or `status_code`, also when it is wrapped in another error.
+    """
+    for current in _error_chain(error):
+        if type(current).__name__ in TRANSIENT_ERROR_NAMES:
+            return True
+        for attribute in ("code", "status_code"):
+            code = getattr(current, attribute, None)
+            if isinstance(code, int) and code in TRANSIENT_STATUS_CODES:
+                return True
+    return False
+
+
+def _retry_after_value(error: BaseException) -> Any:
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        value = headers.get("Retry-After") or headers.get("retry-after")
+    return value
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Read a retry-after hint from an error or an error it wraps, either a `retry_after`
+    attribute or a Retry-After header on the attached HTTP response.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the error carries no hint
+    """
+    value = next((v for v in map(_retry_after_value, _error_chain(error)) if v is not None), None)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        #Retry-After may also be an HTTP date
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one operation.
+
+    After failure_threshold transient failures in a row the breaker opens and calls fail fast.
+    Once reset_seconds have passed, a single trial call is let through: success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, operation: str, failure_threshold: int, reset_seconds: float):
+        self.operation = operation
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call may not go through right now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited >= self.reset_seconds and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(self.operation, max(0.0, self.reset_seconds - waited))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Circuit breaker for '{self.operation}' opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def record_neutral(self):
+        """The call failed for a non-transient reason, which says nothing about service health."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(operation: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if operation not in _breakers:
+            config = get_config()
+            _breakers[operation] = CircuitBreaker(
+                operation,
+                failure_threshold=config["circuit_breaker_failure_threshold"],
+                reset_seconds=config["circuit_breaker_reset_seconds"],
+            )
+        return _breakers[operation]
+
+
+def get_circuit_breaker_states() -> Dict[str, str]:
+    """
+    Get the state of every circuit breaker created so far.
+
+    Returns:
+        Dict[str, str]: operation -> "closed", "open" or "half_open"
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.operation: breaker.state for breaker in breakers}
+
+
+def _call_before(deadline: float, operation: str, deadline_seconds: float, fn: Callable[..., Any],
+                 *args, **kwargs) -> Any:
+    """
+    Run fn on a daemon thread and wait for it until the deadline, so a hung call cannot hold
+    the caller past it. The thread runs in a copy of the caller's context, so spans it opens
+    nest under the caller's.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError(operation, deadline_seconds)
+    outcome: Dict[str, Any] = {}
+    done = threading.Event()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            outcome["result"] = context.run(fn, *args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=run, name=f"rag-{operation}", daemon=True).start()
+    if not done.wait(remaining):
+        raise DeadlineExceededError(operation, deadline_seconds)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def call_with_resilience(operation: str, fn: Callable[..., Any], *args,
+                         deadline_seconds: Optional[float] = None, **kwargs) -> Any:
+    """
+    Call fn with retries on transient errors, guarded by the operation's circuit breaker.
+
+    Only the operations in RETRIED_OPERATIONS are retried. Retries use full-jitter exponential
+    backoff unless the error carries a retry-after hint, and no retry is started that would end
+    after the deadline. A call still running at the deadline is abandoned and
+    DeadlineExceededError is raised, so the deadline bounds the total time spent.
+
+    Args:
+        operation (str): Name of the operation, used for the circuit breaker and logs
+        fn (Callable[..., Any]): The function to call
+        deadline_seconds (float, optional): Total time budget. Defaults to the config key in
+                                            DEADLINE_CONFIG_KEYS, or config["rag_call_deadline_seconds"]
+
+    Returns:
+        Any: The result of fn
+    """
+    config = get_config()
+    breaker = get_circuit_breaker(operation)
+    deadline_seconds = deadline_seconds or config[DEADLINE_CONFIG_KEYS.get(operation, "rag_call_deadline_seconds")]
+    deadline = time.monotonic() + deadline_seconds
+    max_retries = config["rag_max_retries"] if operation in RETRIED_OPERATIONS else 0
+    attempt = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = _call_before(deadline, operation, deadline_seconds, fn, *args, **kwargs)
+        except DeadlineExceededError:
+            #a hung call says as much about service health as a 503
+            breaker.record_failure()
+            logger.warning(f"'{operation}' abandoned at its {deadline_seconds:.1f}s deadline")
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_neutral()
+                raise
+            breaker.record_failure()
+            if attempt >= max_retries:
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                ceiling = min(config["rag_backoff_max_seconds"], config["rag_backoff_base_seconds"] * (2 ** attempt))
+                delay = random.uniform(0, ceiling)
+            if time.monotonic() + delay > deadline:
+                raise
+            attempt += 1
+            logger.warning(f"Transient error in '{operation}' ({str(e)}), retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+def _traced_call(operation: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """call_with_resilience inside an "rag.<operation>" span, retries and backoff included."""
+    with span(f"rag.{operation}", kind="sdk") as info:
+        result = call_with_resilience(operation, fn, *args, **kwargs)
+        info["result_size"] = result_size_of(result) if isinstance(result, list) else 0
+        return result
+
+
+class ResilientRag:
+    """
+    Wraps the rag module so the service calls in RESILIENT_OPERATIONS go through
+    call_with_resilience (retried only if they are in RETRIED_OPERATIONS, always bounded by a
+    deadline) and are timed as SDK spans. Types and everything else are
+    passed through unchanged.
+    """
+
+    def __init__(self, rag_module: Any):
+        self._rag = rag_module
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._rag, name)
+        if name not in RESILIENT_OPERATIONS:
+            return attribute
+        if name == "list_corpora":
+            #read every page inside the retried call, not lazily outside it
+            def call(*args, **kwargs):
+                return _traced_call(name, lambda: list(attribute(*args, **kwargs)))
+            return call
+
+        def call(*args, **kwargs):
+            return _traced_call(name, attribute, *args, **kwargs)
+        return call
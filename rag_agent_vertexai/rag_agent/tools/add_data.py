@@ -1,48 +1,27 @@
+import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
-from ..config import Config
+from ..client import get_config, get_rag
+from ..metrics import instrument_tool
+from .incremental import list_corpus_files_by_source, plan_incremental_import
+from .query_cache import invalidate_corpus_cache
 from .utils import check_corpus_exists, get_corpus_resource_name
 
-config = Config().config_dict()
+config = get_config()
 
 
-
-def add_data(corpus_name: str, paths: List[str], tool_context: ToolContext) -> Dict[str, Any]:
+def validate_paths(paths: List[str]) -> Tuple[List[str], List[str], List[str]]:
     """
-    Add new data sources to a Vertex AI RAG corpus.
+    Validate data source paths and normalize Google Docs/Drive urls to the standard Drive format.
 
     Args:
-        corpus_name (str): The name of the corpus to add data to. If empty, the current corpus will be used.
-        paths (List[str]): List of URLs or GCS paths to add to the corpus.
-                          Supported formats:
-                          - Google Drive: "https://drive.google.com/file/d/{FILE_ID}/view"
-                          - Google Docs/Sheets/Slides: "https://docs.google.com/{type}/d/{FILE_ID}/..."
-                          - Google Cloud Storage: "gs://{BUCKET}/{PATH}"
-                          Example: ["https://drive.google.com/file/d/123", "gs://my_bucket/my_files_dir"]
-        tool_context (ToolContext): The tool context
+        paths (List[str]): List of URLs or GCS paths (or local paths when using the local backend)
 
     Returns:
-        Dict[str, Any]: Information about the added data and status
-    """ 
-    # check if corpus exists
-    if not check_corpus_exists(corpus_name, tool_context):
-        return {
-            "status": "error",
-            "message": f"Corpus '{corpus_name}' does not exist. Please create it first using the create_corpus tool.",
-            "corpus_name": corpus_name,
-            "paths": paths,
-        }
-    # validate inputs
-    if not paths or not all(isinstance(path, str) for path in paths):
-        return {
-            "status": "error",
-            "message": "Invalid paths provided. Please provide a list of valid URLs or GCS paths.",
-            "corpus_name": corpus_name,
-            "paths": paths,
-        }
-    # pre process paths to validate and convert Google Docs urls to Drive format if needed
+        Tuple[List[str], List[str], List[str]]: The validated paths, descriptions of the invalid
+                                                paths, and descriptions of the url conversions made
+    """
     validated_paths = []
     invalid_paths = []
     conversions = []
@@ -75,9 +54,87 @@ def add_data(corpus_name: str, paths: List[str], tool_context: ToolContext) -> D
         if path.startswith("gs://"):
             validated_paths.append(path)
             continue
+        #the local backend imports files straight from disk
+        if config["rag_backend"] == "local" and (path.startswith("file://") or os.path.exists(path)):
+            local_path = path[len("file://"):] if path.startswith("file://") else path
+            validated_paths.append(f"file://{os.path.abspath(local_path)}")
+            continue
         # If we're here, the path wasn't in a recognized format
         invalid_paths.append(f"{path} (Invalid URL format)")
 
+    return validated_paths, invalid_paths, conversions
+
+
+def import_paths(corpus_resource_name: str, paths: List[str], max_embedding_requests_per_min: int):
+    """
+    Import files into a corpus using the configured chunking settings.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        paths (List[str]): Validated Google Drive urls or GCS paths
+        max_embedding_requests_per_min (int): Embedding rate limit for this import
+
+    Returns:
+        The import response, with imported/failed/skipped file counts
+    """
+    rag = get_rag()
+    #setup chunking config
+    transformation_config = rag.TransformationConfig(
+        chunking_config=rag.ChunkingConfig(
+            chunk_size=config["chunk_size"],
+            chunk_overlap=config["chunk_overlap"],
+        ),
+    )
+    return rag.import_files(
+        corpus_resource_name,
+        paths,
+        transformation_config=transformation_config,
+        max_embedding_requests_per_min=max_embedding_requests_per_min,
+    )
+
+
+@instrument_tool
+def add_data(corpus_name: str, paths: List[str], tool_context: ToolContext, incremental: bool = False) -> Dict[str, Any]:
+    """
+    Add new data sources to a Vertex AI RAG corpus.
+
+    Args:
+        corpus_name (str): The name of the corpus to add data to. If empty, the current corpus will be used.
+        paths (List[str]): List of URLs or GCS paths to add to the corpus.
+                          Supported formats:
+                          - Google Drive: "https://drive.google.com/file/d/{FILE_ID}/view"
+                          - Google Docs/Sheets/Slides: "https://docs.google.com/{type}/d/{FILE_ID}/..."
+                          - Google Cloud Storage: "gs://{BUCKET}/{PATH}"
+                          Example: ["https://drive.google.com/file/d/123", "gs://my_bucket/my_files_dir"]
+        tool_context (ToolContext): The tool context
+        incremental (bool): If True, only import sources that are not in the corpus yet or that
+                            changed since they were imported; unchanged sources are skipped.
+                            Changes are detected for GCS objects and local files only; a Google
+                            Drive file already in the corpus is always skipped, so use
+                            incremental=False to refresh an edited Drive document.
+
+    Returns:
+        Dict[str, Any]: Information about the added data and status
+    """ 
+    # check if corpus exists
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "error",
+            "message": f"Corpus '{corpus_name}' does not exist. Please create it first using the create_corpus tool.",
+            "corpus_name": corpus_name,
+            "paths": paths,
+        }
+    # validate inputs
+    if not paths or not all(isinstance(path, str) for path in paths):
+        return {
+            "status": "error",
+            "message": "Invalid paths provided. Please provide a list of valid URLs or GCS paths.",
+            "corpus_name": corpus_name,
+            "paths": paths,
+        }
+    # pre process paths to validate and convert Google Docs urls to Drive format if needed
+    validated_paths, invalid_paths, conversions = validate_paths(paths)
+
     #if no valid paths, return error
     if not validated_paths:
         return {
@@ -90,19 +147,11 @@ def add_data(corpus_name: str, paths: List[str], tool_context: ToolContext) -> D
     try:
        #get the corpus resource name
        corpus_resource_name = get_corpus_resource_name(corpus_name)
-       #setup chunking config
-       transformation_config = rag.TransformationConfig(
-           chunking_config=rag.ChunkingConfig(
-               chunk_size=config["chunk_size"],
-               chunk_overlap=config["chunk_overlap"],
-           ),
-       )
-       import_result = rag.import_files(
-           corpus_resource_name,
-           validated_paths,
-           transformation_config=transformation_config,
-           max_embedding_requests_per_minute=config["embedding_requests_per_minute"],
-       )
+       if incremental:
+           return _add_data_incremental(corpus_name, corpus_resource_name, validated_paths, conversions, invalid_paths, tool_context)
+       import_result = import_paths(corpus_resource_name, validated_paths, config["embedding_requests_per_minute"])
+       #cached query results no longer reflect the corpus contents
+       invalidate_corpus_cache(corpus_resource_name)
        #set this as the current corpus if not already set
        if not tool_context.state.get("current_corpus"):
            tool_context.state["current_corpus"] = corpus_name
@@ -128,4 +177,45 @@ def add_data(corpus_name: str, paths: List[str], tool_context: ToolContext) -> D
             "paths": paths,
         }
 
-         
+
+def _add_data_incremental(corpus_name: str, corpus_resource_name: str, validated_paths: List[str],
+                          conversions: List[str], invalid_paths: List[str], tool_context: ToolContext) -> Dict[str, Any]:
+    """Import only new or changed sources; errors are handled by add_data."""
+    plan = plan_incremental_import(corpus_resource_name, validated_paths)
+    files_imported = 0
+    if plan.to_import:
+        #import before deleting anything: if the import fails, the old copies are still in the corpus
+        import_result = import_paths(corpus_resource_name, plan.to_import, config["embedding_requests_per_minute"])
+        files_imported = import_result.imported_rag_files_count
+    kept_stale = []
+    if plan.stale_files:
+        #only drop an old copy once a new file for the same source is there
+        stale = set(plan.stale_files)
+        for source_uri, files in list_corpus_files_by_source(corpus_resource_name).items():
+            old_files = [name for name, _ in files if name in stale]
+            if old_files and len(old_files) == len(files):
+                kept_stale.append(source_uri)
+                continue
+            for file_name in old_files:
+                get_rag().delete_file(file_name)
+    if plan.to_import or plan.stale_files:
+        invalidate_corpus_cache(corpus_resource_name)
+    if not tool_context.state.get("current_corpus"):
+        tool_context.state["current_corpus"] = corpus_name
+
+    return {
+        "status": "success",
+        "message": f"Added {len(plan.added)}, replaced {len(plan.replaced)} and skipped {len(plan.skipped)} unchanged sources in corpus '{corpus_name}'",
+        "corpus_name": corpus_name,
+        "files_added": files_imported,
+        "added_count": len(plan.added),
+        "replaced_count": len(plan.replaced),
+        "skipped_count": len(plan.skipped),
+        "added": plan.added,
+        "replaced": plan.replaced,
+        #changed sources with no separate new file after the import (it failed for them, or the
+        #file was updated in place), so nothing was deleted
+        "stale_kept": kept_stale,
+        "conversions": conversions,
+        "invalid_paths": invalid_paths,
+    }
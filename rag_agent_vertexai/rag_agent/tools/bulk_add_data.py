@@ -0,0 +1,75 @@
+from typing import List, Dict, Any
+from google.adk.tools.tool_context import ToolContext
+from ..metrics import instrument_tool
+from .add_data import validate_paths
+from .ingestion import start_ingestion
+from .utils import check_corpus_exists, get_corpus_resource_name
+
+
+@instrument_tool
+def bulk_add_data(corpus_name: str, paths: List[str], tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Start a bulk import of many data sources into a Vertex AI RAG corpus.
+    The paths are imported in parallel batches in the background. Calling this again with the
+    same corpus and paths resumes the earlier run and only imports the batches that did not finish.
+
+    Args:
+        corpus_name (str): The name of the corpus to add data to. If empty, the current corpus will be used.
+        paths (List[str]): List of URLs or GCS paths to add to the corpus, in the same formats as add_data.
+        tool_context (ToolContext): The tool context
+
+    Returns:
+        Dict[str, Any]: The ingestion job id and its initial progress. Use get_ingestion_status
+                        with the job id to follow the import.
+    """
+    if not corpus_name:
+        corpus_name = tool_context.state.get("current_corpus", "")
+    # check if corpus exists
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "error",
+            "message": f"Corpus '{corpus_name}' does not exist. Please create it first using the create_corpus tool.",
+            "corpus_name": corpus_name,
+        }
+    # validate inputs
+    if not paths or not all(isinstance(path, str) for path in paths):
+        return {
+            "status": "error",
+            "message": "Invalid paths provided. Please provide a list of valid URLs or GCS paths.",
+            "corpus_name": corpus_name,
+        }
+    validated_paths, invalid_paths, conversions = validate_paths(paths)
+    if not validated_paths:
+        return {
+            "status": "error",
+            "message": "No valid paths provided. Please provide Google Drive URLs or GCS paths.",
+            "corpus_name": corpus_name,
+            "invalid_paths": invalid_paths,
+        }
+    try:
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        #duplicates would only be imported twice
+        job = start_ingestion(corpus_name, corpus_resource_name, list(dict.fromkeys(validated_paths)))
+        if not tool_context.state.get("current_corpus"):
+            tool_context.state["current_corpus"] = corpus_name
+        if job["already_running"]:
+            message = f"Ingestion job {job['job_id']} for corpus '{corpus_name}' is already running"
+        elif job["resumed"]:
+            message = f"Resumed ingestion job {job['job_id']} for corpus '{corpus_name}' ({job['batches_done']} of {job['batches_total']} batches already done)"
+        else:
+            message = f"Started ingestion job {job['job_id']} for {job['total_paths']} paths into corpus '{corpus_name}'"
+        return {
+            "status": "success",
+            "message": message,
+            "corpus_name": corpus_name,
+            "job_id": job["job_id"],
+            "job": job,
+            "conversions": conversions,
+            "invalid_paths": invalid_paths,
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error starting bulk ingestion into corpus '{corpus_name}': {str(e)}",
+            "corpus_name": corpus_name,
+        }
@@ -0,0 +1,172 @@
+import math
+from typing import Any, Dict, List, Optional
+
+#shortest word run accepted as a chunk overlap, so common phrases do not stitch unrelated chunks
+MIN_OVERLAP_WORDS = 8
+#truncating a chunk to fewer tokens than this is not worth the space it takes
+MIN_TRUNCATED_TOKENS = 32
+SEGMENT_SEPARATOR = "\n...\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budget checks (about four characters per token)."""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def _tokens_for_length(characters: int) -> int:
+    """estimate_tokens of a text with this many characters."""
+    return math.ceil(characters / 4)
+
+
+class _Segment:
+    """Contiguous text from one source, built from one or more overlapping chunks."""
+
+    def __init__(self, source_uri: str, words: List[str], rank: int, score: Any):
+        self.source_uri = source_uri
+        self.words = words
+        self.rank = rank
+        self.score = score
+        self.chunks = 1
+
+
+def _overlap(left: List[str], right: List[str], max_words: int) -> int:
+    """Length of the longest suffix of left that is a prefix of right, 0 if below MIN_OVERLAP_WORDS."""
+    for size in range(min(len(left), len(right), max_words), MIN_OVERLAP_WORDS - 1, -1):
+        if left[-size:] == right[:size]:
+            return size
+    return 0
+
+
+def _contains(words: List[str], other: List[str]) -> bool:
+    """Whether other appears as a contiguous run inside words."""
+    if len(other) > len(words):
+        return False
+    first = other[0] if other else None
+    for start in range(len(words) - len(other) + 1):
+        if words[start] == first and words[start:start + len(other)] == other:
+            return True
+    return False
+
+
+def _merge_into(segments: List[_Segment], segment: _Segment, max_overlap_words: int) -> bool:
+    """Fold segment into an existing one it duplicates or overlaps. Returns True if it was absorbed."""
+    for existing in segments:
+        if _contains(existing.words, segment.words):
+            pass
+        elif _contains(segment.words, existing.words):
+            existing.words = segment.words
+        else:
+            after = _overlap(existing.words, segment.words, max_overlap_words)
+            before = 0 if after else _overlap(segment.words, existing.words, max_overlap_words)
+            if after:
+                existing.words = existing.words + segment.words[after:]
+            elif before:
+                existing.words = segment.words + existing.words[before:]
+            else:
+                continue
+        existing.chunks += segment.chunks
+        if segment.rank < existing.rank:
+            existing.rank, existing.score = segment.rank, segment.score
+        return True
+    return False
+
+
+def _stitch(segments: List[_Segment], max_overlap_words: int) -> List[_Segment]:
+    """Merge segments until no two of them overlap; a merge can make new overlaps possible."""
+    merged: List[_Segment] = []
+    for segment in segments:
+        if not _merge_into(merged, segment, max_overlap_words):
+            merged.append(segment)
+    if len(merged) < len(segments):
+        return _stitch(merged, max_overlap_words)
+    return merged
+
+
+def pack_contexts(results: List[Dict[str, Any]], token_budget: int,
+                  max_overlap_words: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Pack retrieval results into a compact, token-budgeted context.
+
+    Chunks from the same source_uri that duplicate or overlap each other are stitched into one
+    contiguous segment. Segments are then taken in result order (best first) while they fit in
+    the budget; the first one that does not fit is truncated at a word boundary if enough room
+    is left. The kept segments are grouped into one entry per source, so the source metadata
+    appears once instead of once per chunk.
+
+    Args:
+        results (List[Dict[str, Any]]): Results from search_corpus or rerank_results, best first
+        token_budget (int): Maximum estimated tokens of packed text
+        max_overlap_words (int, optional): Longest overlap to look for. Defaults to no limit
+
+    Returns:
+        Dict[str, Any]: A dictionary containing:
+            - contexts: One dict per source with source_uri, source_name, text, score and chunks
+            - token_count: Estimated tokens of the packed contexts
+            - input_token_count: Estimated tokens of the results before packing
+            - chunks_in, chunks_merged, chunks_dropped: What happened to the input chunks
+    """
+    max_overlap_words = max_overlap_words or max((len(r.get("text", "").split()) for r in results), default=0)
+    by_source: Dict[str, List[_Segment]] = {}
+    names: Dict[str, str] = {}
+    for rank, result in enumerate(results):
+        source_uri = result.get("source_uri", "")
+        names.setdefault(source_uri, result.get("source_name", ""))
+        words = result.get("text", "").split()
+        if words:
+            by_source.setdefault(source_uri, []).append(_Segment(source_uri, words, rank, result.get("score", 0)))
+
+    segments = []
+    for source_segments in by_source.values():
+        segments.extend(_stitch(source_segments, max_overlap_words))
+    segments.sort(key=lambda segment: segment.rank)
+
+    kept = []
+    tokens_used = 0
+    #characters of packed text per source so far; its segments are joined with SEGMENT_SEPARATOR,
+    #which is charged to the budget like the text itself
+    source_characters: Dict[str, int] = {}
+    for segment in segments:
+        text = " ".join(segment.words)
+        used = source_characters.get(segment.source_uri, 0)
+        separator = len(SEGMENT_SEPARATOR) if used else 0
+        tokens = _tokens_for_length(used + separator + len(text)) - _tokens_for_length(used)
+        remaining = token_budget - tokens_used
+        if tokens > remaining:
+            if remaining >= MIN_TRUNCATED_TOKENS:
+                #~4 characters per token, so cut at the last word that fits
+                room = (_tokens_for_length(used) + remaining) * 4 - used - separator
+                text = text[:room + 1].rsplit(" ", 1)[0]
+                if text and len(text) <= room:
+                    kept.append((segment, text))
+                    tokens_used += _tokens_for_length(used + separator + len(text)) - _tokens_for_length(used)
+            break
+        kept.append((segment, text))
+        source_characters[segment.source_uri] = used + separator + len(text)
+        tokens_used += tokens
+
+    contexts: Dict[str, Dict[str, Any]] = {}
+    for segment, text in kept:
+        entry = contexts.setdefault(segment.source_uri, {
+            "source_uri": segment.source_uri,
+            "source_name": names[segment.source_uri],
+            "texts": [],
+            "score": segment.score,
+            "chunks": 0,
+        })
+        entry["texts"].append(text)
+        entry["chunks"] += segment.chunks
+    packed = []
+    for entry in contexts.values():
+        entry["text"] = SEGMENT_SEPARATOR.join(entry.pop("texts"))
+        packed.append(entry)
+
+    chunks_kept = sum(segment.chunks for segment, _ in kept)
+    chunks_in = sum(1 for result in results if result.get("text"))
+    return {
+        "contexts": packed,
+        "token_count": sum(estimate_tokens(entry["text"]) for entry in packed),
+        "input_token_count": sum(estimate_tokens(result.get("text", "")) for result in results),
+        "chunks_in": chunks_in,
+        "chunks_merged": chunks_kept - len(kept),
+        "chunks_dropped": chunks_in - chunks_kept,
+    }
@@ -1,12 +1,13 @@
 import re
 from typing import Dict, Any
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
-from ..config import Config
-from .utils import check_corpus_exists
+from ..client import get_config, get_rag
+from ..metrics import instrument_tool
+from .utils import check_corpus_exists, corpus_index
 
-config = Config().config_dict()
+config = get_config()
 
+@instrument_tool
 def create_corpus(corpus_name: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Create a new Vertex AI RAG corpus with the specified name.
@@ -27,6 +28,7 @@ def create_corpus(corpus_name: str, tool_context: ToolContext) -> Dict[str, Any]
             "corpus_created": False,
         }
     try:
+        rag = get_rag()
         display_name = re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_name)
         #configure embedding model
         embedding_model_config = rag.RagEmbeddingModelConfig(
@@ -39,6 +41,8 @@ def create_corpus(corpus_name: str, tool_context: ToolContext) -> Dict[str, Any]
                 rag_embedding_model_config=embedding_model_config,
             ),
         )
+        #record the new corpus in the shared index
+        corpus_index.register(rag_corpus.display_name, rag_corpus.name)
         #update state to track corpus existance
         tool_context.state[f"corpus_exists_{corpus_name}"] = True
         #set this as the current corpus
@@ -1,9 +1,12 @@
 from typing import Dict, Any
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from ..client import get_rag
+from ..metrics import instrument_tool
 
-from .utils import check_corpus_exists, get_corpus_resource_name
+from .query_cache import invalidate_corpus_cache
+from .utils import check_corpus_exists, get_corpus_resource_name, corpus_index
 
+@instrument_tool
 def delete_corpus(corpus_name: str, confirm: bool, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Delete a Vertex AI RAG corpus when it's no longer needed.
@@ -36,7 +39,10 @@ def delete_corpus(corpus_name: str, confirm: bool, tool_context: ToolContext) ->
         #get the corpus resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
         #delete the corpus
-        rag.delete_corpus(corpus_resource_name)
+        get_rag().delete_corpus(corpus_resource_name)
+        #drop it from the shared corpus index
+        corpus_index.unregister(corpus_resource_name)
+        invalidate_corpus_cache(corpus_resource_name)
         #remove state tracking
         state_key = f"corpus_exists_{corpus_name}"
         if state_key in tool_context.state:
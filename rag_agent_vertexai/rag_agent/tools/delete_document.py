@@ -1,8 +1,11 @@
 from typing import Dict, Any
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
+from ..client import get_rag
+from ..metrics import instrument_tool
+from .query_cache import invalidate_corpus_cache
 from .utils import check_corpus_exists, get_corpus_resource_name
 
+@instrument_tool
 def delete_document(corpus_name: str, document_id: str, confirm: bool, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Delete a specific document from a Vertex AI RAG corpus.
@@ -37,7 +40,9 @@ def delete_document(corpus_name: str, document_id: str, confirm: bool, tool_cont
     try:
         corpus_resource_name = get_corpus_resource_name(corpus_name)
         rag_file_path = f"{corpus_resource_name}/ragFiles/{document_id}"
-        rag.delete_file(rag_file_path)
+        get_rag().delete_file(rag_file_path)
+        #cached query results may still reference the deleted document
+        invalidate_corpus_cache(corpus_resource_name)
 
         return {
             "status": "success",
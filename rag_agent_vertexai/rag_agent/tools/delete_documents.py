@@ -0,0 +1,152 @@
+import fnmatch
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from google.adk.tools.tool_context import ToolContext
+from ..client import get_config, get_rag
+from ..metrics import instrument_tool
+from .query_cache import invalidate_corpus_cache
+from .utils import (
+    check_corpus_exists,
+    get_corpus_resource_name,
+    iter_corpus_files,
+    rag_file_source_uri,
+    rag_file_update_time,
+)
+
+config = get_config()
+logger = logging.getLogger(__name__)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _select_documents(corpus_resource_name: str, source_uri_prefix: str, display_name_glob: str,
+                      older_than: Optional[datetime]) -> List[str]:
+    """Walk the corpus once and return the ids of the files matching every given filter."""
+    document_ids = []
+    for rag_file in iter_corpus_files(corpus_resource_name):
+        if source_uri_prefix and not rag_file_source_uri(rag_file).startswith(source_uri_prefix):
+            continue
+        if display_name_glob and not fnmatch.fnmatch(getattr(rag_file, "display_name", "") or "", display_name_glob):
+            continue
+        if older_than:
+            updated = rag_file_update_time(rag_file)
+            if updated is None or updated >= older_than:
+                continue
+        document_ids.append(rag_file.name.split("/")[-1])
+    return document_ids
+
+
+@instrument_tool
+def delete_documents(
+    corpus_name: str,
+    confirm: bool,
+    tool_context: ToolContext,
+    document_ids: Optional[List[str]] = None,
+    source_uri_prefix: str = "",
+    display_name_glob: str = "",
+    older_than: str = "",
+) -> Dict[str, Any]:
+    """
+    Delete several documents from a Vertex AI RAG corpus at once, either by id or by filter.
+    Filters narrow the selection: when ids and filters are both given, only the listed
+    documents that also match every filter are deleted.
+
+    Args:
+        corpus_name (str): The full resource name of the corpus containing the documents.
+                          Preferably use the resource_name from list_corpora results.
+        confirm (bool): Must be set to True to confirm deletion. If False, the matching documents are
+                        returned without deleting anything.
+        tool_context (ToolContext): The tool context
+        document_ids (List[str], optional): IDs of the documents to delete, from get_corpus_info results
+        source_uri_prefix (str, optional): Only delete documents whose source uri starts with this prefix
+        display_name_glob (str, optional): Only delete documents whose display name matches this glob, e.g. "*.pdf"
+        older_than (str, optional): Only delete documents last updated before this ISO 8601 timestamp
+
+    Returns:
+        Dict[str, Any]: Per-document deletion results and overall counts
+    """
+    has_filters = bool(source_uri_prefix or display_name_glob or older_than)
+    if not document_ids and not has_filters:
+        return {
+            "status": "error",
+            "message": "No documents selected. Please provide document_ids or at least one filter.",
+            "corpus_name": corpus_name,
+        }
+    #check if corpus exists
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "error",
+            "message": f"Corpus '{corpus_name}' does not exist",
+            "corpus_name": corpus_name,
+        }
+    try:
+        older_than_time = _parse_timestamp(older_than) if older_than else None
+    except ValueError:
+        return {
+            "status": "error",
+            "message": f"Invalid older_than timestamp '{older_than}'. Please use ISO 8601, e.g. 2024-01-31T00:00:00Z.",
+            "corpus_name": corpus_name,
+        }
+    try:
+        #resolve the corpus once for every deletion
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        selected = list(dict.fromkeys(document_ids or []))
+        if has_filters:
+            matching = _select_documents(corpus_resource_name, source_uri_prefix, display_name_glob, older_than_time)
+            if document_ids:
+                matching_ids = set(matching)
+                selected = [doc_id for doc_id in selected if doc_id in matching_ids]
+            else:
+                selected = matching
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error selecting documents in corpus '{corpus_name}': {str(e)}",
+            "corpus_name": corpus_name,
+        }
+
+    if not selected:
+        return {
+            "status": "warning",
+            "message": f"No documents in corpus '{corpus_name}' matched the selection",
+            "corpus_name": corpus_name,
+            "document_ids": [],
+        }
+    #check if user wants to confirm deletion
+    if not confirm:
+        return {
+            "status": "error",
+            "message": f"Deletion not confirmed. {len(selected)} documents match; set confirm to True to delete them.",
+            "corpus_name": corpus_name,
+            "document_ids": selected,
+        }
+
+    def delete_one(document_id: str) -> Dict[str, Any]:
+        #not retried: a failed delete may already have been applied; it is reported per document instead
+        try:
+            get_rag().delete_file(f"{corpus_resource_name}/ragFiles/{document_id}")
+            return {"document_id": document_id, "status": "success"}
+        except Exception as e:
+            return {"document_id": document_id, "status": "error", "message": str(e)}
+
+    logger.info(f"Deleting {len(selected)} documents from corpus '{corpus_name}'")
+    with ThreadPoolExecutor(max_workers=config["delete_max_workers"]) as executor:
+        results = list(executor.map(delete_one, selected))
+    #cached query results may still reference the deleted documents
+    invalidate_corpus_cache(corpus_resource_name)
+
+    deleted = sum(1 for result in results if result["status"] == "success")
+    failed = len(results) - deleted
+    return {
+        "status": "success" if not failed else ("error" if not deleted else "warning"),
+        "message": f"Deleted {deleted} of {len(results)} documents from corpus '{corpus_name}'",
+        "corpus_name": corpus_name,
+        "deleted_count": deleted,
+        "failed_count": failed,
+        "results": results,
+    }
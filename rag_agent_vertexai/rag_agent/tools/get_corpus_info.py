@@ -1,17 +1,77 @@
 from typing import Dict, Any
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
-from ..config import Config
-from .utils import get_corpus_resource_name, check_corpus_exists
+from ..client import get_config
+from ..metrics import instrument_tool
+from .utils import (
+    get_corpus_resource_name,
+    check_corpus_exists,
+    iter_corpus_files,
+    list_corpus_files_page,
+    rag_file_source_uri,
+    rag_file_update_time,
+)
 
-def get_corpus_info(corpus_name: str, tool_context: ToolContext) -> Dict[str, Any]:
+config = get_config()
+
+
+def _file_info(rag_file) -> Dict[str, Any]:
+    created = getattr(rag_file, "create_time", None) or getattr(rag_file, "created_at", None)
+    updated = getattr(rag_file, "update_time", None) or getattr(rag_file, "updated_at", None)
+    return {
+        "file_id": rag_file.name.split("/")[-1],
+        "display_name": rag_file.display_name if hasattr(rag_file, "display_name") else "",
+        "source_uri": rag_file_source_uri(rag_file),
+        "created_time": str(created) if created else "",
+        "updated_time": str(updated) if updated else "",
+    }
+
+
+def _source_type(source_uri: str) -> str:
+    if source_uri.startswith("gs://"):
+        return "gcs"
+    if source_uri.startswith("https://drive.google.com/"):
+        return "google_drive"
+    if source_uri.startswith("file://"):
+        return "local"
+    return "other" if source_uri else "unknown"
+
+
+def _corpus_summary(corpus_resource_name: str) -> Dict[str, Any]:
+    """Walk every file once, keeping only running counts."""
+    file_count = 0
+    by_source_type: Dict[str, int] = {}
+    oldest_update = None
+    newest_update = None
+    for rag_file in iter_corpus_files(corpus_resource_name):
+        file_count += 1
+        source_type = _source_type(rag_file_source_uri(rag_file))
+        by_source_type[source_type] = by_source_type.get(source_type, 0) + 1
+        updated = rag_file_update_time(rag_file)
+        if updated:
+            oldest_update = updated if oldest_update is None else min(oldest_update, updated)
+            newest_update = updated if newest_update is None else max(newest_update, updated)
+    return {
+        "file_count": file_count,
+        "files_by_source_type": by_source_type,
+        "oldest_update_time": str(oldest_update) if oldest_update else "",
+        "newest_update_time": str(newest_update) if newest_update else "",
+    }
+
+
+@instrument_tool
+def get_corpus_info(corpus_name: str, tool_context: ToolContext, page_size: int = 0,
+                    page_token: str = "", summary_only: bool = False) -> Dict[str, Any]:
     """
     Get detailed information about a specific RAG corpus, including its files.
+    Files are returned one page at a time; pass the returned next_page_token to get the next page.
 
     Args:
         corpus_name (str): The full resource name of the corpus to get information about.
                            Preferably use the resource_name from list_corpora results.
         tool_context (ToolContext): The tool context
+        page_size (int): Number of files per page. 0 uses the configured default.
+        page_token (str): The next_page_token from a previous call, or empty for the first page.
+        summary_only (bool): If True, return only file counts and aggregate statistics instead of the file list.
 
     Returns:
         Dict[str, Any]: Information about the corpus and its files
@@ -25,28 +85,27 @@ def get_corpus_info(corpus_name: str, tool_context: ToolContext) -> Dict[str, An
             }
         #get the full resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
-        #Try to get the corpus info
         corpus_display_name = corpus_name
+
+        if summary_only:
+            return {
+                "status": "success",
+                "message": f"Successfully summarized corpus '{corpus_name}'",
+                "corpus_name": corpus_name,
+                "corpus_display_name": corpus_display_name,
+                **_corpus_summary(corpus_resource_name),
+            }
+
+        files, next_page_token = list_corpus_files_page(
+            corpus_resource_name, page_size or config["corpus_info_page_size"], page_token
+        )
         file_details = []
-        try:
-            files = rag.list_files(corpus_resource_name) #there is atleast one file in the corpus as the corpus exists.
-            for rag_file in files:
-                try:
-                    file_id = rag_file.name.split("/")[-1]
-                    file_info = {
-                        "file_id": file_id,
-                        "display_name": rag_file.display_name if hasattr(rag_file, "display_name") else "",
-                        "source_uri": rag_file.source_uri if hasattr(rag_file, "source_uri") else "",
-                        "created_time": str(rag_file.created_at) if hasattr(rag_file, "created_at") else "",
-                        "updated_time": str(rag_file.updated_at) if hasattr(rag_file, "updated_at") else "",
-                    }
-                    file_details.append(file_info)
-                except Exception as e:
-                    #continue without file details
-                    pass
-        except Exception as e:
-            #continue without file details
-            pass
+        for rag_file in files:
+            try:
+                file_details.append(_file_info(rag_file))
+            except Exception as e:
+                #continue without file details
+                pass
         return {
             "status": "success",
             "message": f"Successfully retrieved information for corpus '{corpus_name}'",
@@ -54,6 +113,8 @@ def get_corpus_info(corpus_name: str, tool_context: ToolContext) -> Dict[str, An
             "corpus_display_name": corpus_display_name,
             "file_count": len(file_details),
             "files": file_details,
+            "next_page_token": next_page_token,
+            "has_more": bool(next_page_token),
         }
     except Exception as e:
         return {
@@ -61,4 +122,3 @@ def get_corpus_info(corpus_name: str, tool_context: ToolContext) -> Dict[str, An
             "message": f"Error getting information for corpus '{corpus_name}': {str(e)}",
             "corpus_name": corpus_name,
         }
-    
\ No newline at end of file
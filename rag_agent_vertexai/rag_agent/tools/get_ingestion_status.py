@@ -0,0 +1,42 @@
+from typing import Dict, Any
+from ..metrics import instrument_tool
+from .ingestion import get_ingestion_progress, is_valid_job_id
+
+
+@instrument_tool
+def get_ingestion_status(job_id: str) -> Dict[str, Any]:
+    """
+    Get the progress and throughput of a bulk ingestion job started with bulk_add_data.
+
+    Args:
+        job_id (str): The job id returned by bulk_add_data
+
+    Returns:
+        Dict[str, Any]: Batch and file counts, progress fraction, throughput and any batch errors
+    """
+    if not is_valid_job_id(job_id):
+        return {
+            "status": "error",
+            "message": f"Invalid job id '{job_id}'. Use the 16-character job_id returned by bulk_add_data.",
+            "job_id": job_id,
+        }
+    try:
+        progress = get_ingestion_progress(job_id)
+        if progress is None:
+            return {
+                "status": "error",
+                "message": f"No ingestion job found with id '{job_id}'",
+                "job_id": job_id,
+            }
+        return {
+            "status": "success",
+            "message": f"Ingestion job {job_id} is {progress['job_status']} ({progress['batches_done']} of {progress['batches_total']} batches done)",
+            "job_id": job_id,
+            "progress": progress,
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error reading ingestion job '{job_id}': {str(e)}",
+            "job_id": job_id,
+        }
@@ -0,0 +1,159 @@
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from ..client import get_config
+from .utils import iter_corpus_files, rag_file_source_uri, rag_file_update_time
+
+config = get_config()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImportPlan:
+    """Which requested sources need importing and which existing RAG files they replace."""
+    added: List[str] = field(default_factory=list)
+    replaced: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    #RAG file resource names to delete once the replaced sources are imported again
+    stale_files: List[str] = field(default_factory=list)
+
+    @property
+    def to_import(self) -> List[str]:
+        return self.added + self.replaced
+
+
+def list_corpus_files_by_source(corpus_resource_name: str) -> Dict[str, List[Tuple[str, Optional[datetime]]]]:
+    """
+    Map each source uri in a corpus to every RAG file imported from it, with its last update time.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+
+    Returns:
+        Dict[str, List[Tuple[str, Optional[datetime]]]]: source uri -> [(RAG file name, update time)]
+    """
+    sources: Dict[str, List[Tuple[str, Optional[datetime]]]] = {}
+    for rag_file in iter_corpus_files(corpus_resource_name):
+        source_uri = rag_file_source_uri(rag_file)
+        if source_uri:
+            sources.setdefault(source_uri, []).append((rag_file.name, rag_file_update_time(rag_file)))
+    return sources
+
+
+def list_corpus_sources(corpus_resource_name: str) -> Dict[str, Tuple[str, Optional[datetime]]]:
+    """
+    Map each source uri already in a corpus to its newest RAG file name and last update time.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+
+    Returns:
+        Dict[str, Tuple[str, Optional[datetime]]]: source uri -> (RAG file name, update time)
+    """
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    return {
+        source_uri: max(files, key=lambda file: file[1] or oldest)
+        for source_uri, files in list_corpus_files_by_source(corpus_resource_name).items()
+    }
+
+
+def expand_local_paths(paths: List[str]) -> Dict[str, Optional[datetime]]:
+    """
+    Get the modification time of local file:// sources (local backend only).
+
+    Args:
+        paths (List[str]): file:// uris
+
+    Returns:
+        Dict[str, Optional[datetime]]: uri -> modification time, None if the file cannot be read
+    """
+    objects = {}
+    for path in paths:
+        try:
+            objects[path] = datetime.fromtimestamp(os.path.getmtime(path[len("file://"):]), tz=timezone.utc)
+        except OSError:
+            objects[path] = None
+    return objects
+
+
+def expand_gcs_paths(paths: List[str]) -> Dict[str, Optional[datetime]]:
+    """
+    Expand GCS paths into individual objects with their last update time.
+
+    A path that names an object is kept as is; any other path is treated as a prefix and
+    replaced by the objects under it.
+
+    Args:
+        paths (List[str]): gs:// paths
+
+    Returns:
+        Dict[str, Optional[datetime]]: object uri -> update time
+    """
+    if not paths:
+        return {}
+    from google.cloud import storage
+
+    client = storage.Client(project=config["project_id"] or None)
+    objects = {}
+    for path in paths:
+        bucket_name, _, prefix = path[len("gs://"):].partition("/")
+        bucket = client.bucket(bucket_name)
+        blob = bucket.get_blob(prefix) if prefix and not prefix.endswith("/") else None
+        if blob is not None:
+            objects[path] = blob.updated
+            continue
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+        for blob in client.list_blobs(bucket_name, prefix=prefix or None):
+            if not blob.name.endswith("/"):
+                objects[f"gs://{bucket_name}/{blob.name}"] = blob.updated
+    return objects
+
+
+def plan_incremental_import(corpus_resource_name: str, paths: List[str]) -> ImportPlan:
+    """
+    Compare requested sources against the files already in a corpus.
+
+    New sources are added. GCS objects and local files updated after the matching RAG file
+    are replaced. Everything else is skipped. Google Drive files carry no update time we can
+    compare without the Drive API, so a Drive url that is already in the corpus is always
+    skipped, even if the document changed: re-import it with incremental=False, or delete the
+    document first, to pick up its changes.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        paths (List[str]): Validated Google Drive urls or GCS paths
+
+    Returns:
+        ImportPlan: The sources to add, replace and skip
+    """
+    existing = list_corpus_sources(corpus_resource_name)
+    requested: Dict[str, Optional[datetime]] = {
+        path: None for path in paths if not path.startswith(("gs://", "file://"))
+    }
+    requested.update(expand_gcs_paths([path for path in paths if path.startswith("gs://")]))
+    requested.update(expand_local_paths([path for path in paths if path.startswith("file://")]))
+
+    plan = ImportPlan()
+    for source_uri, source_updated in requested.items():
+        if source_uri not in existing:
+            plan.added.append(source_uri)
+            continue
+        file_name, file_updated = existing[source_uri]
+        if source_updated and file_updated and _as_utc(source_updated) > file_updated:
+            plan.replaced.append(source_uri)
+            plan.stale_files.append(file_name)
+        else:
+            plan.skipped.append(source_uri)
+    logger.info(
+        f"Incremental import into '{corpus_resource_name}': {len(plan.added)} new, "
+        f"{len(plan.replaced)} changed, {len(plan.skipped)} unchanged"
+    )
+    return plan
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from ..client import get_config
+from .add_data import import_paths
+from .query_cache import invalidate_corpus_cache
+
+config = get_config()
+logger = logging.getLogger(__name__)
+
+#jobs currently running in this process, by job id
+_running_jobs: Dict[str, threading.Thread] = {}
+_running_jobs_lock = threading.Lock()
+
+#ids made by ingestion_job_id; anything else is rejected before it becomes part of a path
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+#every bulk import in the process holds one of these slots and gets an equal share of the
+#embedding budget, so concurrent jobs together stay under embedding_requests_per_minute
+_import_slots = threading.BoundedSemaphore(config["ingestion_max_workers"])
+
+
+def ingestion_job_id(corpus_resource_name: str, paths: List[str]) -> str:
+    """
+    Derive a stable job id from the corpus and the set of paths, so re-running the same
+    ingestion finds and resumes the previous manifest.
+    """
+    digest = hashlib.sha256()
+    digest.update(corpus_resource_name.encode("utf-8"))
+    for path in sorted(set(paths)):
+        digest.update(b"\0" + path.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def is_valid_job_id(job_id: str) -> bool:
+    """Whether job_id has the format produced by ingestion_job_id."""
+    return isinstance(job_id, str) and JOB_ID_PATTERN.match(job_id) is not None
+
+
+class IngestionManifest:
+    """
+    Per-job progress record stored as JSON in the manifest directory.
+
+    Every batch change is written straight to disk (through a temp file and rename), so a
+    crashed run leaves a manifest that says exactly which batches still need importing.
+    """
+
+    def __init__(self, path: str, data: Dict[str, Any]):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path_for(job_id: str) -> str:
+        if not is_valid_job_id(job_id):
+            raise ValueError(f"Invalid ingestion job id '{job_id}'")
+        return os.path.join(config["ingestion_manifest_dir"], f"{job_id}.json")
+
+    @classmethod
+    def load(cls, job_id: str) -> Optional["IngestionManifest"]:
+        path = cls.path_for(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    @classmethod
+    def create(cls, job_id: str, corpus_name: str, corpus_resource_name: str, paths: List[str],
+               batch_size: int) -> "IngestionManifest":
+        batches = [
+            {
+                "index": index,
+                "paths": paths[start:start + batch_size],
+                "status": "pending",
+                "attempts": 0,
+                "imported": 0,
+                "failed": 0,
+                "skipped": 0,
+                "error": None,
+                "started_at": None,
+                "finished_at": None,
+            }
+            for index, start in enumerate(range(0, len(paths), batch_size))
+        ]
+        manifest = cls(cls.path_for(job_id), {
+            "job_id": job_id,
+            "corpus_name": corpus_name,
+            "corpus_resource_name": corpus_resource_name,
+            "status": "pending",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "total_paths": len(paths),
+            "batches": batches,
+        })
+        manifest.save()
+        return manifest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+    def update(self, **fields):
+        with self._lock:
+            self.data.update(fields)
+            self.save()
+
+    def update_batch(self, index: int, **fields):
+        with self._lock:
+            self.data["batches"][index].update(fields)
+            self.save()
+
+    def reset_unfinished(self):
+        """Mark batches left running or failed by an earlier run as pending again."""
+        with self._lock:
+            for batch in self.data["batches"]:
+                if batch["status"] != "done":
+                    batch["status"] = "pending"
+                    batch["error"] = None
+            self.data["status"] = "pending"
+            self.data["finished_at"] = None
+            self.save()
+
+    def pending_batches(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(batch) for batch in self.data["batches"] if batch["status"] == "pending"]
+
+    def progress(self) -> Dict[str, Any]:
+        """Summarize batch counts, imported files and throughput for the job."""
+        with self._lock:
+            batches = self.data["batches"]
+            counts = {status: 0 for status in ("pending", "running", "done", "failed")}
+            for batch in batches:
+                counts[batch["status"]] += 1
+            imported = sum(batch["imported"] for batch in batches)
+            paths_done = sum(len(batch["paths"]) for batch in batches if batch["status"] == "done")
+            started_at = self.data["started_at"]
+            elapsed = ((self.data["finished_at"] or time.time()) - started_at) if started_at else 0.0
+            return {
+                "job_id": self.data["job_id"],
+                "corpus_name": self.data["corpus_name"],
+                "job_status": self.data["status"],
+                "total_paths": self.data["total_paths"],
+                "paths_done": paths_done,
+                "progress": paths_done / self.data["total_paths"] if self.data["total_paths"] else 1.0,
+                "batches_total": len(batches),
+                "batches_done": counts["done"],
+                "batches_running": counts["running"],
+                "batches_pending": counts["pending"],
+                "batches_failed": counts["failed"],
+                "files_imported": imported,
+                "files_failed": sum(batch["failed"] for batch in batches),
+                "files_skipped": sum(batch["skipped"] for batch in batches),
+                "elapsed_seconds": round(elapsed, 2),
+                "paths_per_minute": round(paths_done / elapsed * 60, 2) if elapsed else 0.0,
+                "files_per_minute": round(imported / elapsed * 60, 2) if elapsed else 0.0,
+                "errors": [
+                    {"batch": batch["index"], "error": batch["error"]} for batch in batches if batch["error"]
+                ],
+            }
+
+
+def _run_job(manifest: IngestionManifest, max_workers: int):
+    corpus_resource_name = manifest.data["corpus_resource_name"]
+    #each import slot's share of the process-wide embedding budget
+    requests_per_min = max(1, config["embedding_requests_per_minute"] // config["ingestion_max_workers"])
+
+    def import_batch(batch: Dict[str, Any]):
+        index = batch["index"]
+        _import_slots.acquire()
+        try:
+            manifest.update_batch(index, status="running", attempts=batch["attempts"] + 1, started_at=time.time())
+            result = import_paths(corpus_resource_name, batch["paths"], requests_per_min)
+            manifest.update_batch(
+                index,
+                status="done",
+                imported=getattr(result, "imported_rag_files_count", 0) or 0,
+                failed=getattr(result, "failed_rag_files_count", 0) or 0,
+                skipped=getattr(result, "skipped_rag_files_count", 0) or 0,
+                error=None,
+                finished_at=time.time(),
+            )
+        except Exception as e:
+            logger.warning(f"Ingestion batch {index} of job {manifest.data['job_id']} failed: {str(e)}")
+            manifest.update_batch(index, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            _import_slots.release()
+            invalidate_corpus_cache(corpus_resource_name)
+
+    try:
+        if not manifest.data["started_at"]:
+            manifest.update(started_at=time.time())
+        manifest.update(status="running")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(import_batch, manifest.pending_batches()))
+        failed = manifest.progress()["batches_failed"]
+        manifest.update(status="failed" if failed else "completed", finished_at=time.time())
+    except Exception as e:
+        logger.error(f"Ingestion job {manifest.data['job_id']} stopped: {str(e)}")
+        manifest.update(status="failed", finished_at=time.time())
+    finally:
+        with _running_jobs_lock:
+            _running_jobs.pop(manifest.data["job_id"], None)
+
+
+def start_ingestion(corpus_name: str, corpus_resource_name: str, paths: List[str]) -> Dict[str, Any]:
+    """
+    Start (or resume) a bulk ingestion job in a background thread.
+
+    Args:
+        corpus_name (str): The corpus name as given by the user
+        corpus_resource_name (str): The full resource name of the corpus
+        paths (List[str]): Validated Google Drive urls or GCS paths
+
+    Returns:
+        Dict[str, Any]: The job progress at start, including whether an earlier run was resumed
+    """
+    job_id = ingestion_job_id(corpus_resource_name, paths)
+    with _running_jobs_lock:
+        if job_id in _running_jobs:
+            return {**IngestionManifest.load(job_id).progress(), "resumed": False, "already_running": True}
+        manifest = IngestionManifest.load(job_id)
+        resumed = manifest is not None
+        if resumed:
+            manifest.reset_unfinished()
+        else:
+            manifest = IngestionManifest.create(
+                job_id, corpus_name, corpus_resource_name, paths, config["ingestion_batch_size"]
+            )
+        worker = threading.Thread(
+            target=_run_job,
+            args=(manifest, config["ingestion_max_workers"]),
+            name=f"ingestion-{job_id}",
+            daemon=True,
+        )
+        _running_jobs[job_id] = worker
+        worker.start()
+    return {**manifest.progress(), "resumed": resumed, "already_running": False}
+
+
+def get_ingestion_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the progress of an ingestion job from its manifest.
+
+    Args:
+        job_id (str): The id returned by bulk_add_data
+
+    Returns:
+        Optional[Dict[str, Any]]: The job progress, or None if there is no such job
+    """
+    if not is_valid_job_id(job_id):
+        return None
+    manifest = IngestionManifest.load(job_id)
+    if manifest is None:
+        return None
+    progress = manifest.progress()
+    with _running_jobs_lock:
+        progress["active_in_process"] = job_id in _running_jobs
+    return progress
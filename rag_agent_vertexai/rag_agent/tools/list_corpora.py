@@ -1,6 +1,9 @@
 from typing import List, Dict, Any
-from vertexai import rag
+from ..client import get_rag
+from ..metrics import instrument_tool
+from .utils import corpus_index
 
+@instrument_tool
 def list_corpora() -> Dict[str, Any]:
     """
     List all available Vertex AI RAG corpora.
@@ -17,7 +20,9 @@ def list_corpora() -> Dict[str, Any]:
     """
     try:
         #list all corpora
-        corpora = rag.list_corpora()
+        corpora = list(get_rag().list_corpora())
+        #refresh the shared corpus index while we have the full listing
+        corpus_index.refresh(corpora)
         #process corpus information into more usable format
         corpus_info = []
         for corpus in corpora:
@@ -0,0 +1,221 @@
+import copy
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..client import get_config
+
+config = get_config()
+
+EMBEDDING_DIMENSIONS = 512
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for exact-match lookups: lowercase, punctuation removed, whitespace collapsed.
+
+    Args:
+        query (str): The raw query text
+
+    Returns:
+        str: The normalized query
+    """
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+def embed_query(query: str, dimensions: int = EMBEDDING_DIMENSIONS) -> Dict[int, float]:
+    """
+    Compute a cheap local embedding of a query.
+
+    Words and character trigrams of the normalized query are hashed into a fixed number of
+    buckets and the vector is L2 normalized, so the dot product of two embeddings is their
+    cosine similarity. The vector is kept sparse (bucket -> value) since a short query only
+    touches a few dozen buckets. The similarity is lexical: it catches the same question with small
+    wording changes, but not meaning, and it does not replace the corpus embedding model.
+
+    Args:
+        query (str): The query text
+        dimensions (int): Size of the embedding
+
+    Returns:
+        Dict[int, float]: The unit-length embedding as a sparse bucket -> value mapping
+    """
+    text = normalize_query(query)
+    features = text.split()
+    padded = f" {text} "
+    features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    vector: Dict[int, float] = {}
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] = vector.get(bucket, 0.0) + sign
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if norm == 0:
+        return {}
+    return {bucket: value / norm for bucket, value in vector.items() if value}
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two embeddings returned by embed_query."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(bucket, 0.0) for bucket, value in a.items())
+
+
+class QueryCache:
+    """
+    LRU cache of retrieval results, looked up by normalized query text first and then, if
+    similarity_threshold is below 1.0, by the lexically nearest cached query within the same
+    corpus and retrieval settings.
+
+    The near-duplicate match compares hashed words and character trigrams (embed_query), not
+    meaning: "refund policy for EU" and "refund policy for US" look alike to it. Exact matching
+    is the default for that reason.
+
+    Each corpus has a generation that invalidate_corpus bumps; put takes the generation read
+    before the retrieval started, so results fetched before an invalidation are not stored.
+    """
+
+    def __init__(self, max_entries: int, similarity_threshold: float, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        #(corpus, top_k, distance_threshold, normalized query) -> (embedding, results, stored_at)
+        self._entries: "OrderedDict[Tuple, Tuple[Dict[int, float], List[Dict[str, Any]], float]]" = OrderedDict()
+        #(corpus, top_k, distance_threshold) -> keys of its entries, so near-duplicate lookups only scan their own settings
+        self._keys_by_settings: Dict[Tuple, set] = {}
+        self._generations: Dict[str, int] = {}
+        self.exact_hits = 0
+        self.near_duplicate_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_puts = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return (time.monotonic() - stored_at) >= self.ttl_seconds
+
+    def _remove(self, key: Tuple):
+        del self._entries[key]
+        keys = self._keys_by_settings.get(key[:3])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_settings[key[:3]]
+
+    def generation(self, corpus_resource_name: str) -> int:
+        """The corpus's current generation; pass it to put() with the results retrieved after reading it."""
+        with self._lock:
+            return self._generations.get(corpus_resource_name, 0)
+
+    def get(self, corpus_resource_name: str, query: str, top_k: int,
+            distance_threshold: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results for a query.
+
+        Args:
+            corpus_resource_name (str): The full resource name of the corpus
+            query (str): The query text
+            top_k (int): The top_k the results were retrieved with
+            distance_threshold (float): The distance threshold the results were retrieved with
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: A copy of the cached results, or None on a miss
+        """
+        settings = (corpus_resource_name, top_k, distance_threshold)
+        key = settings + (normalize_query(query),)
+        near_duplicates = self.similarity_threshold < 1.0
+        embedding = embed_query(query) if near_duplicates else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[2]):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return copy.deepcopy(entry[1])
+
+            if near_duplicates:
+                best_key, best_similarity = None, self.similarity_threshold
+                for candidate_key in self._keys_by_settings.get(settings, ()):
+                    candidate_embedding, _, stored_at = self._entries[candidate_key]
+                    if self._expired(stored_at):
+                        continue
+                    similarity = cosine_similarity(embedding, candidate_embedding)
+                    if similarity >= best_similarity:
+                        best_key, best_similarity = candidate_key, similarity
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.near_duplicate_hits += 1
+                    return copy.deepcopy(self._entries[best_key][1])
+
+            self.misses += 1
+            return None
+
+    def put(self, corpus_resource_name: str, query: str, top_k: int, distance_threshold: float,
+            results: List[Dict[str, Any]], generation: Optional[int] = None):
+        """
+        Store the results of a retrieval query, evicting the least recently used entries if full.
+
+        Args:
+            generation (int, optional): generation(corpus_resource_name) read before the retrieval started;
+                                        if the corpus was invalidated since, the results are dropped
+        """
+        key = (corpus_resource_name, top_k, distance_threshold, normalize_query(query))
+        entry = (embed_query(query), copy.deepcopy(results), time.monotonic())
+        with self._lock:
+            if generation is not None and generation != self._generations.get(corpus_resource_name, 0):
+                self.stale_puts += 1
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._keys_by_settings.setdefault(key[:3], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_corpus(self, corpus_resource_name: str):
+        """Drop every cached result for a corpus, e.g. after its files changed."""
+        with self._lock:
+            self._generations[corpus_resource_name] = self._generations.get(corpus_resource_name, 0) + 1
+            for key in [key for key in self._entries if key[0] == corpus_resource_name]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_settings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.exact_hits + self.near_duplicate_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "near_duplicate_hits": self.near_duplicate_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale_puts": self.stale_puts,
+                "hit_rate": (self.exact_hits + self.near_duplicate_hits) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+
+query_cache = QueryCache(
+    max_entries=config["query_cache_max_entries"],
+    similarity_threshold=config["query_cache_similarity_threshold"],
+    ttl_seconds=config["query_cache_ttl_seconds"],
+)
+
+
+def invalidate_corpus_cache(corpus_resource_name: str):
+    """
+    Drop cached query results for a corpus after its contents changed.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+    """
+    query_cache.invalidate_corpus(corpus_resource_name)
@@ -1,13 +1,95 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
-from ..config import Config
+from ..client import get_config, get_default_distance_threshold, get_rag
+from ..metrics import instrument_tool
+from .context_pack import pack_contexts
+from .query_cache import query_cache
+from .single_flight import SingleFlight
 from .utils import check_corpus_exists, get_corpus_resource_name
 
-config = Config().config_dict()
+config = get_config()
 logger = logging.getLogger(__name__)
 
+#concurrent identical retrievals share one backend call
+retrieval_flights = SingleFlight()
+
+
+def retrieve_contexts(corpus_resource_name: str, query: str, top_k: Optional[int] = None,
+                      distance_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Run a retrieval query against a single corpus and return the contexts as plain dicts.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        query (str): The text query to search for in the corpus
+        top_k (int, optional): Number of contexts to return. Defaults to config["top_k"]
+        distance_threshold (float, optional): Maximum vector distance. Defaults to get_default_distance_threshold()
+
+    Returns:
+        List[Dict[str, Any]]: One dict per context with source_uri, source_name, text and score
+    """
+    rag = get_rag()
+    #configure retrieval params
+    rag_retrieval_config = rag.RagRetrievalConfig(
+        top_k=top_k if top_k is not None else config["top_k"],
+        filter=rag.Filter(
+            vector_distance_threshold=distance_threshold if distance_threshold is not None else get_default_distance_threshold()
+        ),
+    )
+    response = rag.retrieval_query(
+        rag_resources=[
+            rag.RagResource(rag_corpus=corpus_resource_name),
+        ],
+        text=query,
+        rag_retrieval_config=rag_retrieval_config,
+    )
+    #process the response into a more usable format
+    results = []
+    if hasattr(response, "contexts") and response.contexts:
+        for ctx_group in response.contexts.contexts:
+            result = {
+                "source_uri":(ctx_group.source_uri if hasattr(ctx_group, "source_uri") else ""),
+                "source_name":(ctx_group.source_display_name if hasattr(ctx_group, "source_display_name") else ""),
+                "text": ctx_group.text if hasattr(ctx_group, "text") else "",
+                "score": ctx_group.score if hasattr(ctx_group, "score") else 0,
+            }
+            results.append(result)
+    return results
+
+
+def search_corpus(corpus_resource_name: str, query: str, top_k: Optional[int] = None,
+                  distance_threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieve contexts for a query, serving them from the query cache when it is enabled.
+    Identical queries that are already in flight share that call instead of making their own.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        query (str): The text query to search for in the corpus
+        top_k (int, optional): Number of contexts to return. Defaults to config["top_k"]
+        distance_threshold (float, optional): Maximum vector distance. Defaults to get_default_distance_threshold()
+
+    Returns:
+        List[Dict[str, Any]]: One dict per context with source_uri, source_name, text and score
+    """
+    top_k = top_k if top_k is not None else config["top_k"]
+    distance_threshold = distance_threshold if distance_threshold is not None else get_default_distance_threshold()
+    flight_key = (corpus_resource_name, query, top_k, distance_threshold)
+    if not config["query_cache_enabled"]:
+        return retrieval_flights.do(flight_key, retrieve_contexts, corpus_resource_name, query, top_k, distance_threshold)
+    #read before retrieving, so results racing an add_data/delete invalidation are not cached
+    generation = query_cache.generation(corpus_resource_name)
+    cached = query_cache.get(corpus_resource_name, query, top_k, distance_threshold)
+    if cached is not None:
+        logger.info(f"Serving query for corpus '{corpus_resource_name}' from cache")
+        return cached
+    results = retrieval_flights.do(flight_key, retrieve_contexts, corpus_resource_name, query, top_k, distance_threshold)
+    query_cache.put(corpus_resource_name, query, top_k, distance_threshold, results, generation=generation)
+    return results
+
+
+@instrument_tool
 def rag_query(corpus_name: str, query: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Query a Vertex AI RAG corpus with a user question and return relevant information.
@@ -32,31 +114,24 @@ def rag_query(corpus_name: str, query: str, tool_context: ToolContext) -> Dict[s
             }
         #Get the corpus resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
-        #configure retrieval params
-        rag_retrieval_config = rag.RagRetrievalConfig(
-            top_k=config["top_k"],
-            filter=rag.Filter(vector_distance_threshold=config["distance_threshold"]),
-        )
         #perform the query
         logger.info(f"Querying corpus '{corpus_name}' with query:\n{query}\n")
-        response = rag.retrieval_query(
-            rag_resource=[
-                rag.RagResource(rag_corpus=corpus_resource_name),
-            ],
-            text=query,
-            rag_retrieval_config=rag_retrieval_config,
-        )
-        #process the response into a more usable format
-        results = []
-        if hasattr(response, "contexts") and response.contexts:
-            for ctx_group in response.contexts.contexts:
-                result = {
-                    "source_uri":(ctx_group.source_uri if hasattr(ctx_group, "source_uri") else ""),
-                    "source_name":(ctx_group.source_display_name if hasattr(ctx_group, "source_display_name") else ""),
-                    "text": ctx_group.text if hasattr(ctx_group, "text") else "",
-                    "score": ctx_group.score if hasattr(ctx_group, "score") else 0,
-                }
-                results.append(result)
+        if config["rerank_enabled"]:
+            #imported here so numpy is only loaded once re-ranking is used
+            from .rerank import rerank_results
+
+            #over-fetch, then keep the best top_k locally
+            results = rerank_results(
+                query,
+                search_corpus(corpus_resource_name, query, top_k=config["rerank_fetch_k"]),
+                top_k=config["top_k"],
+                token_budget=config["rerank_token_budget"],
+                fusion=config["rerank_fusion"],
+                vector_weight=config["rerank_vector_weight"],
+                mmr_lambda=config["rerank_mmr_lambda"],
+            )
+        else:
+            results = search_corpus(corpus_resource_name, query)
         
         #if no results, 
         if not results:
@@ -68,6 +143,21 @@ def rag_query(corpus_name: str, query: str, tool_context: ToolContext) -> Dict[s
                 "results": [],
                 "results_count": len(results)
             }
+        if config["context_pack_enabled"]:
+            packed = pack_contexts(results, config["context_token_budget"])
+            logger.info(
+                f"Packed {packed['chunks_in']} chunks ({packed['input_token_count']} tokens) into "
+                f"{len(packed['contexts'])} contexts ({packed['token_count']} tokens)"
+            )
+            return {
+                "status": "success",
+                "message": f"Successfully queried corpus {corpus_name}",
+                "query": query,
+                "corpus_name": corpus_name,
+                "results": packed["contexts"],
+                "results_count": len(packed["contexts"]),
+                "token_count": packed["token_count"],
+            }
         #return the results
         return {
             "status": "success",
@@ -0,0 +1,86 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from google.adk.tools.tool_context import ToolContext
+from ..client import get_config
+from ..metrics import instrument_tool
+from .rag_query import search_corpus
+from .utils import check_corpus_exists, get_corpus_resource_name
+
+config = get_config()
+logger = logging.getLogger(__name__)
+
+
+@instrument_tool
+def rag_query_batch(corpus_name: str, queries: List[str], tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Run several queries against one Vertex AI RAG corpus and return the results in the same order.
+
+    Args:
+        corpus_name (str): The name of the corpus to query. If empty, the current corpus will be used.
+                          Preferably use the resource_name from list_corpora results.
+        queries (List[str]): The text queries to search for in the corpus
+        tool_context (ToolContext): The tool context
+
+    Returns:
+        Dict[str, Any]: One result entry per query, in the order the queries were given
+    """
+    if not corpus_name:
+        corpus_name = tool_context.state.get("current_corpus", "")
+    if not queries or not all(isinstance(query, str) and query for query in queries):
+        return {
+            "status": "error",
+            "message": "Invalid queries provided. Please provide a list of non-empty questions.",
+            "corpus_name": corpus_name,
+            "queries": queries,
+        }
+    try:
+        #resolve the corpus once for the whole batch
+        if not check_corpus_exists(corpus_name, tool_context):
+            return {
+                "status": "error",
+                "message": f"Corpus '{corpus_name}' does not exist",
+                "corpus_name": corpus_name,
+                "queries": queries,
+            }
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error querying corpus {corpus_name}: {str(e)}",
+            "corpus_name": corpus_name,
+            "queries": queries,
+        }
+
+    def run_query(query: str) -> Dict[str, Any]:
+        try:
+            results = search_corpus(corpus_resource_name, query)
+            return {
+                "query": query,
+                "status": "success" if results else "warning",
+                "results": results,
+                "results_count": len(results),
+            }
+        except Exception as e:
+            logger.error(f"Error querying corpus {corpus_name} with query '{query}': {str(e)}")
+            return {
+                "query": query,
+                "status": "error",
+                "message": str(e),
+                "results": [],
+                "results_count": 0,
+            }
+
+    logger.info(f"Running {len(queries)} queries against corpus '{corpus_name}'")
+    with ThreadPoolExecutor(max_workers=config["batch_query_max_concurrency"]) as executor:
+        #map keeps the input order
+        batch_results = list(executor.map(run_query, queries))
+
+    failed = sum(1 for result in batch_results if result["status"] == "error")
+    return {
+        "status": "error" if failed == len(queries) else "success",
+        "message": f"Ran {len(queries)} queries against corpus {corpus_name} ({failed} failed)",
+        "corpus_name": corpus_name,
+        "batch_results": batch_results,
+        "queries_count": len(queries),
+    }
@@ -0,0 +1,172 @@
+import concurrent.futures
+import logging
+from typing import Dict, Any, List, Optional
+from google.adk.tools.tool_context import ToolContext
+from ..client import get_config, get_default_distance_threshold
+from ..metrics import instrument_tool
+from .rag_query import search_corpus
+from .utils import check_corpus_exists, get_corpus_resource_name
+
+config = get_config()
+logger = logging.getLogger(__name__)
+
+
+def merge_results(result_lists: List[List[Dict[str, Any]]], top_k: int,
+                  distance_threshold: Optional[float]) -> List[Dict[str, Any]]:
+    """
+    Merge per-corpus retrieval results into one ranked list.
+
+    Scores are vector distances, so lower is better. Contexts with the same source_uri and
+    text are kept once (the closest one wins), and top_k/distance_threshold are applied to
+    the merged list rather than per corpus.
+
+    Args:
+        result_lists (List[List[Dict[str, Any]]]): Results from retrieve_contexts, one list per corpus
+        top_k (int): Number of results to keep overall
+        distance_threshold (float, optional): Maximum distance a result may have; None keeps every distance
+
+    Returns:
+        List[Dict[str, Any]]: The merged results, closest first
+    """
+    best = {}
+    for results in result_lists:
+        for result in results:
+            if distance_threshold is not None and result["score"] > distance_threshold:
+                continue
+            key = (result["source_uri"], result["text"])
+            if key not in best or result["score"] < best[key]["score"]:
+                best[key] = result
+    return sorted(best.values(), key=lambda r: r["score"])[:top_k]
+
+
+def search_corpora(
+    corpus_names: List[str],
+    query: str,
+    tool_context: ToolContext,
+    top_k: Optional[int] = None,
+    distance_threshold: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    timeout_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Query several Vertex AI RAG corpora concurrently and merge the results.
+
+    Args:
+        corpus_names (List[str]): The names of the corpora to query.
+                                  Preferably use the resource_name values from list_corpora results.
+        query (str): The text query to search for in the corpora
+        tool_context (ToolContext): The tool context
+        top_k (int, optional): Number of merged results to return. Defaults to config["top_k"]
+        distance_threshold (float, optional): Maximum vector distance. Defaults to get_default_distance_threshold()
+        max_concurrency (int, optional): Maximum number of corpora queried at once.
+                                         Defaults to config["multi_corpus_max_concurrency"]
+        timeout_seconds (float, optional): Time each corpus has to answer, counted from the start of the
+                                           call, so waiting for a free worker is included.
+                                           Defaults to config["multi_corpus_timeout_seconds"]
+
+    Returns:
+        Dict[str, Any]: The merged query results, per-corpus status and overall status
+    """
+    top_k = top_k if top_k is not None else config["top_k"]
+    distance_threshold = distance_threshold if distance_threshold is not None else get_default_distance_threshold()
+    max_concurrency = max_concurrency or config["multi_corpus_max_concurrency"]
+    timeout_seconds = timeout_seconds or config["multi_corpus_timeout_seconds"]
+
+    #drop duplicate corpus names but keep the caller's order
+    corpus_names = list(dict.fromkeys(name for name in corpus_names if name))
+    if not corpus_names:
+        return {
+            "status": "error",
+            "message": "No corpora provided. Please provide at least one corpus name.",
+            "query": query,
+            "corpus_names": corpus_names,
+        }
+
+    def search_one(corpus_name: str) -> Optional[List[Dict[str, Any]]]:
+        #name resolution can fall back to a list call, so it runs in the worker thread with the search
+        if not check_corpus_exists(corpus_name, tool_context):
+            return None
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        return search_corpus(corpus_resource_name, query, top_k, distance_threshold)
+
+    def outcome_of(corpus_name: str, future: concurrent.futures.Future) -> Dict[str, Any]:
+        if not future.done():
+            #a search still queued is dropped; one already running finishes in the background
+            #and its result is discarded
+            future.cancel()
+            logger.warning(f"Query against corpus '{corpus_name}' timed out after {timeout_seconds}s")
+            return {"corpus_name": corpus_name, "status": "error",
+                    "message": f"Timed out after {timeout_seconds} seconds", "results": []}
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Error querying corpus {corpus_name}: {str(e)}")
+            return {"corpus_name": corpus_name, "status": "error", "message": str(e), "results": []}
+        if results is None:
+            return {"corpus_name": corpus_name, "status": "error",
+                    "message": f"Corpus '{corpus_name}' does not exist", "results": []}
+        for result in results:
+            result["corpus_name"] = corpus_name
+        return {"corpus_name": corpus_name, "status": "success", "results": results}
+
+    logger.info(f"Querying {len(corpus_names)} corpora with query:\n{query}\n")
+    #every search is submitted at once, so the timeout also covers the wait for a free worker
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        futures = {name: executor.submit(search_one, name) for name in corpus_names}
+        concurrent.futures.wait(futures.values(), timeout=timeout_seconds)
+        outcomes = [outcome_of(name, future) for name, future in futures.items()]
+    finally:
+        #do not wait for timed out searches
+        executor.shutdown(wait=False, cancel_futures=True)
+    results = merge_results([outcome["results"] for outcome in outcomes], top_k, distance_threshold)
+    corpus_status = [
+        {key: value for key, value in outcome.items() if key != "results"} | {"results_count": len(outcome["results"])}
+        for outcome in outcomes
+    ]
+    failed = [outcome["corpus_name"] for outcome in outcomes if outcome["status"] != "success"]
+
+    if len(failed) == len(corpus_names):
+        return {
+            "status": "error",
+            "message": f"All {len(corpus_names)} corpora failed to answer the query",
+            "query": query,
+            "corpus_names": corpus_names,
+            "corpus_status": corpus_status,
+        }
+    if not results:
+        return {
+            "status": "warning",
+            "message": f"No relevant information found in corpora {corpus_names} for query:\n{query}\n",
+            "query": query,
+            "corpus_names": corpus_names,
+            "corpus_status": corpus_status,
+            "results": [],
+            "results_count": 0,
+        }
+    return {
+        "status": "success",
+        "message": f"Successfully queried {len(corpus_names) - len(failed)} of {len(corpus_names)} corpora",
+        "query": query,
+        "corpus_names": corpus_names,
+        "corpus_status": corpus_status,
+        "results": results,
+        "results_count": len(results),
+    }
+
+
+@instrument_tool
+def rag_query_many(corpus_names: List[str], query: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Query several Vertex AI RAG corpora at once and return the best matching information.
+
+    Args:
+        corpus_names (List[str]): The names of the corpora to query.
+                                  Preferably use the resource_name values from list_corpora results.
+        query (str): The text query to search for in the corpora
+        tool_context (ToolContext): The tool context
+
+    Returns:
+        Dict[str, Any]: The merged query results, per-corpus status and overall status
+    """
+    return search_corpora(corpus_names, query, tool_context)
@@ -0,0 +1,166 @@
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .context_pack import estimate_tokens
+
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def _term_matrix(documents: List[List[str]], vocabulary: Dict[str, int]) -> np.ndarray:
+    """Term frequency matrix of shape (documents, vocabulary)."""
+    matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            column = vocabulary.get(token)
+            if column is not None:
+                matrix[row, column] += 1
+    return matrix
+
+
+def bm25_scores(query: str, texts: List[str]) -> np.ndarray:
+    """
+    Okapi BM25 score of every text for the query, computed over the candidate set.
+
+    Args:
+        query (str): The query text
+        texts (List[str]): The candidate texts
+
+    Returns:
+        np.ndarray: One score per text, higher is better
+    """
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    if not query_terms or not texts:
+        return np.zeros(len(texts), dtype=np.float32)
+    documents = [tokenize(text) for text in texts]
+    tf = _term_matrix(documents, {term: i for i, term in enumerate(query_terms)})
+    lengths = np.array([len(tokens) for tokens in documents], dtype=np.float32)
+    average_length = max(float(lengths.mean()), 1.0)
+    document_frequency = (tf > 0).sum(axis=0)
+    idf = np.log1p((len(texts) - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+    return ((tf * (BM25_K1 + 1)) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """1-based rank of each score, highest score first."""
+    order = np.argsort(-scores, kind="stable")
+    ranks = np.empty(len(scores), dtype=np.float32)
+    ranks[order] = np.arange(1, len(scores) + 1)
+    return ranks
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    spread = scores.max() - scores.min()
+    if spread == 0:
+        return np.ones_like(scores)
+    return (scores - scores.min()) / spread
+
+
+def fuse_scores(vector_similarity: np.ndarray, lexical: np.ndarray, fusion: str, vector_weight: float) -> np.ndarray:
+    """
+    Combine vector and lexical scores into one relevance score in [0, 1], higher is better.
+
+    Args:
+        vector_similarity (np.ndarray): Vector similarity per candidate, higher is better
+        lexical (np.ndarray): BM25 score per candidate
+        fusion (str): "rrf" for reciprocal rank fusion, "weighted" for a weighted sum of min-max normalized scores
+        vector_weight (float): Weight of the vector score in weighted fusion
+    """
+    if fusion == "weighted":
+        fused = vector_weight * _min_max(vector_similarity) + (1 - vector_weight) * _min_max(lexical)
+    elif fusion == "rrf":
+        fused = 1.0 / (RRF_K + _ranks(vector_similarity)) + 1.0 / (RRF_K + _ranks(lexical))
+    else:
+        raise ValueError(f"Unknown fusion method '{fusion}', expected 'rrf' or 'weighted'")
+    return _min_max(fused)
+
+
+def _text_similarity(texts: List[str]) -> np.ndarray:
+    """Pairwise cosine similarity of TF-IDF vectors, used for MMR diversity."""
+    documents = [tokenize(text) for text in texts]
+    vocabulary = {}
+    for tokens in documents:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    if not vocabulary:
+        return np.zeros((len(texts), len(texts)), dtype=np.float32)
+    tf = _term_matrix(documents, vocabulary)
+    idf = np.log1p(len(texts) / (1 + (tf > 0).sum(axis=0)))
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+    return vectors @ vectors.T
+
+
+def mmr_order(relevance: np.ndarray, similarity: np.ndarray, mmr_lambda: float) -> List[int]:
+    """
+    Order candidates by maximal marginal relevance.
+
+    Args:
+        relevance (np.ndarray): Relevance per candidate, higher is better
+        similarity (np.ndarray): Pairwise candidate similarity
+        mmr_lambda (float): 1.0 orders purely by relevance, lower values favour diversity
+
+    Returns:
+        List[int]: Candidate indices in selection order
+    """
+    remaining = np.ones(len(relevance), dtype=bool)
+    max_similarity = np.zeros(len(relevance), dtype=np.float32)
+    order = []
+    for _ in range(len(relevance)):
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        scores[~remaining] = -np.inf
+        chosen = int(np.argmax(scores))
+        order.append(chosen)
+        remaining[chosen] = False
+        max_similarity = np.maximum(max_similarity, similarity[chosen])
+    return order
+
+
+def rerank_results(query: str, results: List[Dict[str, Any]], top_k: int, token_budget: int,
+                   fusion: str = "rrf", vector_weight: float = 0.5, mmr_lambda: float = 0.7) -> List[Dict[str, Any]]:
+    """
+    Re-rank retrieval results locally and cut them to top_k and a token budget.
+
+    Candidates are scored by fusing their vector distance with a BM25 score, ordered with MMR
+    so near-duplicate chunks do not crowd out other sources, then taken in that order while
+    they fit in the token budget.
+
+    Args:
+        query (str): The query text
+        results (List[Dict[str, Any]]): Results from search_corpus; "score" is a vector distance
+        top_k (int): Maximum number of results to keep
+        token_budget (int): Maximum estimated tokens of result text to keep
+        fusion (str): "rrf" or "weighted"
+        vector_weight (float): Weight of the vector score in weighted fusion
+        mmr_lambda (float): Relevance vs. diversity trade-off
+
+    Returns:
+        List[Dict[str, Any]]: The kept results, best first, each with a "rerank_score"
+    """
+    if not results:
+        return []
+    texts = [result["text"] for result in results]
+    vector_similarity = 1.0 - np.array([float(result["score"]) for result in results], dtype=np.float32)
+    relevance = fuse_scores(vector_similarity, bm25_scores(query, texts), fusion, vector_weight)
+    order = mmr_order(relevance, _text_similarity(texts), mmr_lambda)
+
+    reranked = []
+    tokens_used = 0
+    for index in order:
+        if len(reranked) >= top_k:
+            break
+        tokens = estimate_tokens(texts[index])
+        if reranked and tokens_used + tokens > token_budget:
+            continue
+        tokens_used += tokens
+        reranked.append({**results[index], "rerank_score": round(float(relevance[index]), 4)})
+    return reranked
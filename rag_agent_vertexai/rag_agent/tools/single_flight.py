@@ -0,0 +1,73 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one call.
+
+    The first caller for a key runs the function; callers that arrive while it is still
+    running wait for it and get a copy of its result (or its exception). Once the call
+    finishes the key is forgotten, so later calls run again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight.
+
+        Args:
+            key (Hashable): Identifies calls that may share a result
+            fn (Callable[..., Any]): The function to run
+
+        Returns:
+            Any: A copy of the result of fn, so callers can modify it independently
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                leader = True
+                self.calls += 1
+            else:
+                leader = False
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn(*args, **kwargs)
+            return copy.deepcopy(flight.result)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "in_flight": len(self._flights),
+            }
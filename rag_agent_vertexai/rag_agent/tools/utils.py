@@ -1,16 +1,166 @@
 import logging
 import re
 import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
 
-from ..config import Config
+from ..client import get_config, get_rag
+from ..metrics import traced
 
 logger = logging.getLogger(__name__)
 
-config = Config().config_dict()
+config = get_config()
 
+RESOURCE_NAME_PATTERN = r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$"
+
+
+class CorpusIndex:
+    """
+    Process-wide display name -> resource name index for RAG corpora.
+
+    The index is loaded from rag.list_corpora() and trusted for ttl_seconds. Tools that
+    create, delete or list corpora update it in place, so name resolution on the query
+    path does not need a list call while the index is fresh.
+    """
+
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float = 0.0):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.RLock()
+        #serialises list_corpora calls; held without self._lock so lookups never wait on the network
+        self._refresh_lock = threading.Lock()
+        self._by_display_name: Dict[str, str] = {}
+        self._resource_names: set = set()
+        self._loaded_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.refreshes = 0
+
+    def _age(self) -> Optional[float]:
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def _is_fresh(self) -> bool:
+        age = self._age()
+        return age is not None and age < self.ttl_seconds
+
+    def refresh(self, corpora: Optional[Iterable[Any]] = None):
+        """
+        Rebuild the index, either from the given corpora or from a rag.list_corpora() call.
+
+        Args:
+            corpora (Iterable[Any], optional): Corpus objects that were already listed by the caller
+        """
+        if corpora is None:
+            corpora = get_rag().list_corpora()
+        by_display_name = {}
+        resource_names = set()
+        for corpus in corpora:
+            resource_names.add(corpus.name)
+            if getattr(corpus, "display_name", None):
+                by_display_name[corpus.display_name] = corpus.name
+        with self._lock:
+            self._by_display_name = by_display_name
+            self._resource_names = resource_names
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def _refresh_after(self, refreshes: int):
+        #callers that queued behind another caller's list call reuse its result
+        with self._refresh_lock:
+            if self.refreshes == refreshes:
+                self.refresh()
+
+    def _find(self, corpus_name: str) -> Optional[str]:
+        if corpus_name in self._resource_names:
+            return corpus_name
+        return self._by_display_name.get(corpus_name)
+
+    def resolve(self, corpus_name: str) -> Optional[str]:
+        """
+        Resolve a display name or resource name to the resource name of an existing corpus.
+
+        A fresh index answers directly. An expired index, or a name the fresh index does not
+        know about (it may have been created by another process), triggers one reload, unless
+        the index was loaded less than negative_ttl_seconds ago, in which case the name is
+        reported missing without another list call.
+
+        Args:
+            corpus_name (str): The corpus display name or full resource name
+
+        Returns:
+            Optional[str]: The full resource name, or None if no such corpus exists
+        """
+        with self._lock:
+            if self._is_fresh():
+                resource_name = self._find(corpus_name)
+                if resource_name:
+                    self.hits += 1
+                    return resource_name
+                if self._age() < self.negative_ttl_seconds:
+                    self.negative_hits += 1
+                    return None
+            self.misses += 1
+            refreshes = self.refreshes
+        self._refresh_after(refreshes)
+        with self._lock:
+            return self._find(corpus_name)
+
+    def register(self, display_name: str, resource_name: str):
+        """Record a newly created corpus."""
+        with self._lock:
+            self._resource_names.add(resource_name)
+            if display_name:
+                self._by_display_name[display_name] = resource_name
+
+    def unregister(self, resource_name: str):
+        """Forget a deleted corpus."""
+        with self._lock:
+            self._resource_names.discard(resource_name)
+            for display_name in [d for d, r in self._by_display_name.items() if r == resource_name]:
+                del self._by_display_name[display_name]
+
+    def invalidate(self):
+        """Force the next lookup to reload the index."""
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "negative_hits": self.negative_hits,
+                "refreshes": self.refreshes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._resource_names),
+                "age_seconds": (time.monotonic() - self._loaded_at) if self._loaded_at is not None else None,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+corpus_index = CorpusIndex(
+    ttl_seconds=config["corpus_cache_ttl_seconds"],
+    negative_ttl_seconds=config["corpus_negative_cache_ttl_seconds"],
+)
+
+
+def get_corpus_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters and size of the corpus name index.
+
+    Returns:
+        Dict[str, Any]: Counters for the process-wide corpus index
+    """
+    return corpus_index.stats()
+
+
+@traced("resolve_corpus_name")
 def get_corpus_resource_name(corpus_name: str) -> str:
     """
     Convert a corpus name to its full resource name if needed.
@@ -27,15 +177,13 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     #If its already a full resource name with the projects/locations/ragCorpora format
     #projects/{PROJECT_ID}/locations/{LOCATION_ID}/ragCorpora/{CORPUS_ID}
     #projects/myProject/locations/us-central1/ragCorpora/myCorpus
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if re.match(RESOURCE_NAME_PATTERN, corpus_name):
         return corpus_name
     #check if this is a display name of an existing corpus
     try:
-        #list all existing corpora
-       corpora = rag.list_corpora()
-       for corpus in corpora:
-           if hasattr(corpus, "display_name") and corpus.display_name == corpus_name:
-               return corpus.name
+        resource_name = corpus_index.resolve(corpus_name)
+        if resource_name:
+            return resource_name
 
     except Exception as e:
         logger.warning(f"Error checking if corpus '{corpus_name}' exists: {str(e)}")
@@ -64,6 +212,7 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     return f"projects/{project_id}/locations/{location}/ragCorpora/{corpus_id}"
 
 
+@traced("check_corpus_exists")
 def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
     """
     Check if a corpus with the given name exists.
@@ -82,21 +231,95 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
     try:
         #Get the full resource name
         corpus_resource_name = get_corpus_resource_name(corpus_name)
-        #check if the corpus exists
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if (corpus.name == corpus_resource_name or corpus.display_name == corpus_name):
-                #update state
-                tool_context.state[f"corpus_exists_{corpus_name}"] = True
-                #Also set the current corpus if not already set
-                if not tool_context.state.get("current_corpus"):
-                    tool_context.state["current_corpus"] = corpus_name
-                return True
+        #check the corpus index, which reloads from list_corpora only when stale
+        if corpus_index.resolve(corpus_resource_name):
+            #update state
+            tool_context.state[f"corpus_exists_{corpus_name}"] = True
+            #Also set the current corpus if not already set
+            if not tool_context.state.get("current_corpus"):
+                tool_context.state["current_corpus"] = corpus_name
+            return True
         return False
     except Exception as e:
         logger.warning(f"Error checking if corpus '{corpus_name}' exists: {str(e)}")
         pass
 
+def list_corpus_files_page(corpus_resource_name: str, page_size: int,
+                           page_token: str = "") -> Tuple[List[Any], str]:
+    """
+    Fetch one page of files from a corpus.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        page_size (int): Maximum number of files in the page
+        page_token (str): Token returned with the previous page, empty for the first page
+
+    Returns:
+        Tuple[List[Any], str]: The files in the page and the token for the next page ("" if this is the last one)
+    """
+    pager = get_rag().list_files(corpus_resource_name, page_size=page_size, page_token=page_token or None)
+    #the pager exposes the first response's fields; iterating it would fetch every page
+    return list(pager.rag_files), pager.next_page_token or ""
+
+
+def iter_corpus_files(corpus_resource_name: str, page_size: Optional[int] = None) -> Iterator[Any]:
+    """
+    Iterate over every file in a corpus, fetching pages lazily.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        page_size (int, optional): Files per request. Defaults to config["corpus_info_page_size"]
+
+    Yields:
+        Any: The files returned by rag.list_files, one at a time
+    """
+    page_token = ""
+    while True:
+        files, page_token = list_corpus_files_page(
+            corpus_resource_name, page_size or config["corpus_info_page_size"], page_token
+        )
+        yield from files
+        if not page_token:
+            return
+
+
+def rag_file_source_uri(rag_file: Any) -> str:
+    """
+    Get the source uri a RAG file was imported from.
+
+    Args:
+        rag_file (Any): A file returned by rag.list_files
+
+    Returns:
+        str: The GCS uri or Google Drive url of the source, or "" if it is unknown
+    """
+    if getattr(rag_file, "source_uri", ""):
+        return rag_file.source_uri
+    gcs_source = getattr(rag_file, "gcs_source", None)
+    if gcs_source and getattr(gcs_source, "uris", None):
+        return gcs_source.uris[0]
+    drive_source = getattr(rag_file, "google_drive_source", None)
+    if drive_source and getattr(drive_source, "resource_ids", None):
+        return f"https://drive.google.com/file/d/{drive_source.resource_ids[0].resource_id}/view"
+    return ""
+
+
+def rag_file_update_time(rag_file: Any) -> Optional[datetime]:
+    """
+    Get the last update time of a RAG file as an aware datetime.
+
+    Args:
+        rag_file (Any): A file returned by rag.list_files
+
+    Returns:
+        Optional[datetime]: The update time, or None if it is unknown
+    """
+    updated = getattr(rag_file, "update_time", None) or getattr(rag_file, "updated_at", None)
+    if not isinstance(updated, datetime):
+        return None
+    return updated if updated.tzinfo else updated.replace(tzinfo=timezone.utc)
+
+
 def set_current_corpus(corpus_name: str, tool_context: ToolContext):
     """
     Set the current corpus in the tool context.
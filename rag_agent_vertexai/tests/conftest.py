@@ -0,0 +1,17 @@
+import pytest
+
+from rag_agent import client
+from rag_agent.tools.utils import corpus_index
+
+
+@pytest.fixture
+def install_rag():
+    """Install a rag module for one test; afterwards the real backend and a cold corpus index are restored."""
+    def install(rag_module):
+        client.set_rag_module(rag_module)
+        corpus_index.invalidate()
+        return rag_module
+
+    yield install
+    client.set_rag_module(None)
+    corpus_index.invalidate()
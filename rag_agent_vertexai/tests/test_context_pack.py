@@ -0,0 +1,28 @@
+import pytest
+
+from rag_agent.tools.context_pack import SEGMENT_SEPARATOR, estimate_tokens, pack_contexts
+
+
+def chunk(source, first_word, words, score=0.1):
+    text = " ".join(f"w{i}" for i in range(first_word, first_word + words))
+    return {"source_uri": source, "source_name": source.rsplit("/", 1)[-1], "text": text, "score": score}
+
+
+def test_overlapping_chunks_are_stitched_into_one_segment():
+    results = [chunk("gs://b/a.pdf", 0, 40), chunk("gs://b/a.pdf", 30, 40), chunk("gs://b/a.pdf", 10, 20)]
+    packed = pack_contexts(results, token_budget=1000)
+    assert len(packed["contexts"]) == 1
+    assert packed["contexts"][0]["text"] == " ".join(f"w{i}" for i in range(70))
+    assert packed["chunks_merged"] == 2
+    assert packed["chunks_dropped"] == 0
+
+
+@pytest.mark.parametrize("token_budget", range(150, 600, 13))
+def test_the_budget_holds_with_separators_between_merged_segments(token_budget):
+    #disjoint chunks of two sources: each source's segments are joined with SEGMENT_SEPARATOR
+    results = [chunk(f"gs://b/{name}.pdf", start, 25) for start in range(0, 1000, 100) for name in ("a", "b")]
+    packed = pack_contexts(results, token_budget=token_budget)
+
+    assert any(SEGMENT_SEPARATOR in context["text"] for context in packed["contexts"])
+    assert packed["token_count"] <= token_budget
+    assert packed["token_count"] == sum(estimate_tokens(context["text"]) for context in packed["contexts"])
@@ -0,0 +1,76 @@
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent.tools import utils
+from rag_agent.tools.utils import CorpusIndex
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def fake(install_rag):
+    return install_rag(FakeRag(latency_ms=0, jitter=0, corpora=2, files_per_corpus=0))
+
+
+def test_a_fresh_index_resolves_without_listing_until_the_ttl_expires(fake, clock):
+    index = CorpusIndex(ttl_seconds=300, negative_ttl_seconds=10)
+    first = fake.list_corpora()[0]
+
+    assert index.resolve("bench-corpus-0") == first.name
+    assert index.resolve(first.name) == first.name
+    assert index.resolve("bench-corpus-1") is not None
+    assert fake.call_counts()["list_corpora"] == 2  #one here, one for the index
+
+    clock.now += 301
+    assert index.resolve("bench-corpus-0") == first.name
+    assert fake.call_counts()["list_corpora"] == 3
+    assert (index.stats()["hits"], index.stats()["misses"]) == (2, 2)
+
+
+def test_unknown_names_are_cached_as_missing_for_the_negative_ttl(fake, clock):
+    index = CorpusIndex(ttl_seconds=300, negative_ttl_seconds=10)
+    assert index.resolve("bench-corpus-0") is not None
+    assert index.resolve("created-elsewhere") is None
+    assert index.resolve("created-elsewhere") is None
+    assert fake.call_counts()["list_corpora"] == 1
+    assert index.stats()["negative_hits"] == 2
+
+    #another process creates the corpus; once the negative ttl is over an unknown name reloads
+    fake.create_corpus("created-elsewhere")
+    clock.now += 11
+    assert index.resolve("created-elsewhere") is not None
+    assert fake.call_counts()["list_corpora"] == 2
+
+
+def test_created_and_deleted_corpora_update_the_index_in_place(fake, clock):
+    index = CorpusIndex(ttl_seconds=300, negative_ttl_seconds=10)
+    index.refresh()
+    corpus = fake.create_corpus("new-corpus")
+    index.register("new-corpus", corpus.name)
+    assert index.resolve("new-corpus") == corpus.name
+
+    index.unregister(corpus.name)
+    assert index.resolve("new-corpus") is None
+    assert index.resolve(corpus.name) is None
+    assert fake.call_counts()["list_corpora"] == 1
+
+
+def test_invalidate_forces_a_reload(fake, clock):
+    index = CorpusIndex(ttl_seconds=300, negative_ttl_seconds=10)
+    index.refresh()
+    index.invalidate()
+    assert index.resolve("bench-corpus-1") is not None
+    assert fake.call_counts()["list_corpora"] == 2
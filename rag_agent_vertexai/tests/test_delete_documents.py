@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent.tools.delete_documents import delete_documents
+from rag_agent.tools.utils import iter_corpus_files
+
+SOURCES = {
+    "gs://docs/policies/refunds.pdf": datetime(2023, 1, 1, tzinfo=timezone.utc),
+    "gs://docs/policies/shipping.txt": datetime(2023, 6, 1, tzinfo=timezone.utc),
+    "gs://docs/archive/refunds-2019.pdf": datetime(2019, 1, 1, tzinfo=timezone.utc),
+    "gs://docs/archive/notes.txt": datetime(2024, 6, 1, tzinfo=timezone.utc),
+}
+
+
+@pytest.fixture
+def corpus(install_rag):
+    fake = install_rag(FakeRag(latency_ms=0, jitter=0, corpora=1, files_per_corpus=0))
+    corpus_name = fake.list_corpora()[0].name
+    fake.import_files(corpus_name, list(SOURCES))
+    for rag_file in fake.list_files(corpus_name):
+        rag_file.update_time = SOURCES[rag_file.source_uri]
+    return fake, corpus_name
+
+
+def remaining_sources(corpus_name):
+    return sorted(rag_file.source_uri for rag_file in iter_corpus_files(corpus_name))
+
+
+def document_id(corpus_name, source_uri):
+    return next(f.name.split("/")[-1] for f in iter_corpus_files(corpus_name) if f.source_uri == source_uri)
+
+
+@pytest.mark.parametrize("filters, deleted", [
+    ({"source_uri_prefix": "gs://docs/archive/"}, ["gs://docs/archive/notes.txt", "gs://docs/archive/refunds-2019.pdf"]),
+    ({"display_name_glob": "*.pdf"}, ["gs://docs/archive/refunds-2019.pdf", "gs://docs/policies/refunds.pdf"]),
+    ({"older_than": "2023-03-01T00:00:00Z"}, ["gs://docs/archive/refunds-2019.pdf", "gs://docs/policies/refunds.pdf"]),
+    #filters combine: every one of them must match
+    ({"source_uri_prefix": "gs://docs/policies/", "display_name_glob": "*.pdf"}, ["gs://docs/policies/refunds.pdf"]),
+])
+def test_filters_select_the_documents_to_delete(corpus, filters, deleted):
+    _, corpus_name = corpus
+    response = delete_documents(corpus_name, True, SimpleNamespace(state={}), **filters)
+    assert response["deleted_count"] == len(deleted)
+    assert remaining_sources(corpus_name) == sorted(set(SOURCES) - set(deleted))
+
+
+def test_ids_are_narrowed_by_the_filters(corpus):
+    _, corpus_name = corpus
+    ids = [document_id(corpus_name, "gs://docs/policies/refunds.pdf"), document_id(corpus_name, "gs://docs/archive/notes.txt")]
+    response = delete_documents(corpus_name, True, SimpleNamespace(state={}), document_ids=ids, display_name_glob="*.pdf")
+    assert [result["document_id"] for result in response["results"]] == ids[:1]
+
+
+def test_without_confirmation_nothing_is_deleted(corpus):
+    fake, corpus_name = corpus
+    response = delete_documents(corpus_name, False, SimpleNamespace(state={}), display_name_glob="*.txt")
+    assert len(response["document_ids"]) == 2
+    assert "delete_file" not in fake.call_counts()
+    assert len(remaining_sources(corpus_name)) == 4
+
+
+def test_a_malformed_timestamp_is_rejected(corpus):
+    _, corpus_name = corpus
+    response = delete_documents(corpus_name, True, SimpleNamespace(state={}), older_than="last tuesday")
+    assert response["status"] == "error"
+    assert len(remaining_sources(corpus_name)) == 4
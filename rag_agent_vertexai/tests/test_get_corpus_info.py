@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent.tools.get_corpus_info import get_corpus_info
+
+
+@pytest.fixture
+def corpus(install_rag):
+    fake = install_rag(FakeRag(latency_ms=0, jitter=0, corpora=1, files_per_corpus=25))
+    corpus_name = fake.list_corpora()[0].name
+    return fake, corpus_name
+
+
+def test_following_next_page_token_returns_every_file_once(corpus):
+    fake, corpus_name = corpus
+    tool_context = SimpleNamespace(state={})
+    file_ids, page_token, pages = [], "", 0
+    while True:
+        response = get_corpus_info(corpus_name, tool_context, page_size=10, page_token=page_token)
+        assert response["status"] == "success"
+        file_ids += [file["file_id"] for file in response["files"]]
+        pages += 1
+        if not response["has_more"]:
+            break
+        page_token = response["next_page_token"]
+
+    assert pages == 3
+    assert len(file_ids) == len(set(file_ids)) == 25
+    #one list_files request per page, never the whole corpus at once
+    assert fake.call_counts()["list_files"] == 3
+
+
+def test_the_last_page_has_no_token(corpus):
+    _, corpus_name = corpus
+    response = get_corpus_info(corpus_name, SimpleNamespace(state={}), page_size=25)
+    assert response["file_count"] == 25
+    assert (response["next_page_token"], response["has_more"]) == ("", False)
+
+
+def test_summary_only_counts_every_page_without_returning_files(corpus):
+    fake, corpus_name = corpus
+    response = get_corpus_info(corpus_name, SimpleNamespace(state={}), summary_only=True)
+    assert response["file_count"] == 25
+    assert response["files_by_source_type"] == {"gcs": 25}
+    assert "files" not in response
+    assert response["oldest_update_time"] <= response["newest_update_time"]
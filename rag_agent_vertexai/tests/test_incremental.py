@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent.tools import incremental
+from rag_agent.tools.add_data import add_data
+from rag_agent.tools.utils import iter_corpus_files
+
+NOW = datetime.now(timezone.utc)
+CHANGED = "gs://bench-bucket/corpus-0/doc-0.pdf"
+UNCHANGED = "gs://bench-bucket/corpus-0/doc-1.pdf"
+NEW = "gs://bench-bucket/corpus-0/new.pdf"
+
+
+@pytest.fixture
+def corpus(install_rag, monkeypatch):
+    fake = install_rag(FakeRag(latency_ms=0, jitter=0, corpora=1, files_per_corpus=3, seed=7))
+    #stand-in for the GCS listing: every FakeRag file was updated within the last year
+    objects = {CHANGED: NOW + timedelta(minutes=1), UNCHANGED: NOW - timedelta(days=800), NEW: NOW}
+    monkeypatch.setattr(incremental, "expand_gcs_paths", lambda paths: {path: objects[path] for path in paths})
+    return fake, fake.list_corpora()[0].name
+
+
+def files_by_source(corpus_name):
+    sources = {}
+    for rag_file in iter_corpus_files(corpus_name):
+        sources.setdefault(rag_file.source_uri, []).append(rag_file.name)
+    return sources
+
+
+def test_only_new_and_changed_sources_are_imported_and_superseded_files_deleted(corpus):
+    fake, corpus_name = corpus
+    old_file = files_by_source(corpus_name)[CHANGED][0]
+
+    response = add_data(corpus_name, [CHANGED, UNCHANGED, NEW], SimpleNamespace(state={}), incremental=True)
+
+    assert (response["added"], response["replaced"]) == ([NEW], [CHANGED])
+    assert response["skipped_count"] == 1
+    assert response["stale_kept"] == []
+    assert fake.call_counts()["import_files"] == 1
+    sources = files_by_source(corpus_name)
+    assert len(sources[CHANGED]) == 1 and sources[CHANGED][0] != old_file
+    assert len(sources[UNCHANGED]) == 1
+    assert len(sources[NEW]) == 1
+
+
+def test_an_old_copy_is_kept_when_no_new_file_arrived(corpus, monkeypatch):
+    fake, corpus_name = corpus
+    #the import reports success but no new file shows up for the changed source
+    monkeypatch.setattr(fake, "import_files", lambda *args, **kwargs: SimpleNamespace(imported_rag_files_count=0))
+
+    response = add_data(corpus_name, [CHANGED], SimpleNamespace(state={}), incremental=True)
+
+    assert response["stale_kept"] == [CHANGED]
+    assert "delete_file" not in fake.call_counts()
+    assert len(files_by_source(corpus_name)[CHANGED]) == 1
+
+
+def test_nothing_is_imported_when_every_source_is_unchanged(corpus):
+    fake, corpus_name = corpus
+    response = add_data(corpus_name, [UNCHANGED], SimpleNamespace(state={}), incremental=True)
+    assert response["skipped_count"] == 1
+    assert "import_files" not in fake.call_counts()
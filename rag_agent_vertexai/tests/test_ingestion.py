@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent import client
+from rag_agent.client import get_config
+from rag_agent.tools.get_ingestion_status import get_ingestion_status
+from rag_agent.tools.ingestion import IngestionManifest, get_ingestion_progress, start_ingestion
+
+
+class BudgetTrackingRag(FakeRag):
+    """Records the largest total embedding rate of the imports running at the same time."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._budget_lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def import_files(self, corpus_name, paths=None, transformation_config=None,
+                     max_embedding_requests_per_min=1000, **kwargs):
+        with self._budget_lock:
+            self.in_flight += max_embedding_requests_per_min
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            return super().import_files(corpus_name, paths, transformation_config, max_embedding_requests_per_min)
+        finally:
+            with self._budget_lock:
+                self.in_flight -= max_embedding_requests_per_min
+
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(get_config(), "ingestion_manifest_dir", str(tmp_path / "manifests"))
+    yield
+    client.set_rag_module(None)
+
+
+def wait_for(job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        progress = get_ingestion_progress(job_id)
+        if progress["job_status"] in ("completed", "failed") and not progress["active_in_process"]:
+            return progress
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.mark.parametrize("job_id", ["../../etc/passwd", "/tmp/x", "0123456789ABCDEF", "0123456789abcdef0", ""])
+def test_malformed_job_ids_never_reach_the_filesystem(job_id):
+    with pytest.raises(ValueError):
+        IngestionManifest.path_for(job_id)
+    assert get_ingestion_progress(job_id) is None
+    assert get_ingestion_status(job_id)["status"] == "error"
+
+
+def test_concurrent_jobs_share_the_embedding_budget(monkeypatch):
+    config = get_config()
+    monkeypatch.setitem(config, "ingestion_batch_size", 1)
+    rag = BudgetTrackingRag(latency_ms=20, jitter=0, corpora=2, files_per_corpus=0)
+    client.set_rag_module(rag)
+    corpora = [corpus.name for corpus in rag.list_corpora()]
+
+    jobs = [
+        start_ingestion(f"corpus-{index}", name, [f"gs://bucket/{index}/doc-{n}.pdf" for n in range(8)])
+        for index, name in enumerate(corpora)
+    ]
+    for job in jobs:
+        assert wait_for(job["job_id"])["files_imported"] == 8
+    assert rag.peak <= config["embedding_requests_per_minute"]
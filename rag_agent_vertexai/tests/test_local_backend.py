@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rag_agent import client
+from rag_agent.backends.local import LocalRag, chunk_text
+from rag_agent.client import get_config
+from rag_agent.tools.add_data import add_data
+from rag_agent.tools.create_corpus import create_corpus
+from rag_agent.tools.rag_query import rag_query
+from rag_agent.tools.utils import corpus_index
+
+DOCUMENTS = {
+    "refunds.txt": "Refunds are issued within 14 days of purchase. To request a refund contact support "
+                   "with your order number. Refunds go back to the original payment method.",
+    "shipping.txt": "Orders ship within two business days. International shipping takes up to three weeks "
+                    "and customs fees are paid by the customer.",
+    "security.txt": "Passwords must be at least twelve characters long and are rotated every ninety days. "
+                    "Two factor authentication is required for admins.",
+}
+
+
+@pytest.fixture
+def local_rag(tmp_path, monkeypatch):
+    #the default config otherwise, so the Vertex-tuned distance_threshold is in place
+    monkeypatch.setitem(get_config(), "rag_backend", "local")
+    rag = LocalRag(str(tmp_path / "store"))
+    client.set_rag_module(rag)
+    corpus_index.invalidate()
+    yield rag
+    client.set_rag_module(None)
+    corpus_index.invalidate()
+
+
+@pytest.fixture
+def documents(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    for name, text in DOCUMENTS.items():
+        (docs_dir / name).write_text(text, encoding="utf-8")
+    return docs_dir
+
+
+def test_create_add_and_query_with_the_default_config(local_rag, documents):
+    tool_context = SimpleNamespace(state={})
+    assert create_corpus("handbook", tool_context)["status"] == "success"
+    added = add_data("handbook", [str(documents)], tool_context)
+    assert added["status"] == "success"
+
+    response = rag_query("handbook", "how long do refunds take", tool_context)
+    assert response["status"] == "success"
+    assert response["results"][0]["source_name"] == "refunds.txt"
+
+    response = rag_query("handbook", "who pays customs fees", tool_context)
+    assert response["results"][0]["source_name"] == "shipping.txt"
+
+
+def test_an_explicit_local_threshold_filters_results(tmp_path, documents):
+    rag = LocalRag(str(tmp_path / "store"), distance_threshold=0.0)
+    corpus = rag.create_corpus("handbook")
+    rag.import_files(corpus.name, [str(documents)])
+    client.set_rag_module(rag)
+    try:
+        assert client.get_default_distance_threshold() == 0.0
+        config = rag.RagRetrievalConfig(top_k=3, filter=rag.Filter(vector_distance_threshold=0.0))
+        response = rag.retrieval_query("refunds", [rag.RagResource(rag_corpus=corpus.name)], config)
+        assert response.contexts.contexts == []
+    finally:
+        client.set_rag_module(None)
+
+
+def test_chunks_are_sized_in_estimated_tokens():
+    #"word " is 5 characters, so 1.25 tokens: 20 words per 25-token chunk, 4 shared words per 5-token overlap
+    text = " ".join(f"w{i:03d}" for i in range(100))
+    chunks = chunk_text(text, chunk_size=25, chunk_overlap=5)
+    assert [chunk.split()[0] for chunk in chunks] == ["w000", "w016", "w032", "w048", "w064", "w080"]
+    assert all(len(chunk.split()) == 20 for chunk in chunks)
+    #the overlap never stops a chunk from moving forward
+    assert chunk_text("a b c d e f", chunk_size=1, chunk_overlap=1) == ["a b", "b c", "c d", "d e", "e f"]
@@ -0,0 +1,58 @@
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent.client import get_config
+from rag_agent.tools.query_cache import QueryCache, invalidate_corpus_cache, query_cache
+from rag_agent.tools.rag_query import search_corpus
+
+CORPUS = "projects/p/locations/l/ragCorpora/1"
+RESULTS = [{"source_uri": "gs://b/a.pdf", "source_name": "a.pdf", "text": "refunds take 14 days", "score": 0.2}]
+
+
+def test_exact_matches_ignore_case_and_punctuation():
+    cache = QueryCache(max_entries=10, similarity_threshold=1.0, ttl_seconds=60)
+    cache.put(CORPUS, "What is the refund policy?", 3, 0.5, RESULTS)
+    assert cache.get(CORPUS, "what is the refund policy", 3, 0.5) == RESULTS
+    assert cache.get(CORPUS, "what is the refund policy", 5, 0.5) is None
+
+
+def test_results_retrieved_before_an_invalidation_are_not_stored():
+    cache = QueryCache(max_entries=10, similarity_threshold=1.0, ttl_seconds=60)
+    generation = cache.generation(CORPUS)
+    #add_data finishes while the retrieval is still running
+    cache.invalidate_corpus(CORPUS)
+    cache.put(CORPUS, "refund policy", 3, 0.5, RESULTS, generation=generation)
+
+    assert cache.get(CORPUS, "refund policy", 3, 0.5) is None
+    assert cache.stats()["stale_puts"] == 1
+    cache.put(CORPUS, "refund policy", 3, 0.5, RESULTS, generation=cache.generation(CORPUS))
+    assert cache.get(CORPUS, "refund policy", 3, 0.5) == RESULTS
+
+
+def test_invalidation_only_drops_the_changed_corpus():
+    cache = QueryCache(max_entries=10, similarity_threshold=1.0, ttl_seconds=60)
+    other = CORPUS[:-1] + "2"
+    cache.put(CORPUS, "refund policy", 3, 0.5, RESULTS)
+    cache.put(other, "refund policy", 3, 0.5, RESULTS)
+    cache.invalidate_corpus(CORPUS)
+    assert cache.get(CORPUS, "refund policy", 3, 0.5) is None
+    assert cache.get(other, "refund policy", 3, 0.5) == RESULTS
+
+
+@pytest.fixture
+def cached_search(install_rag, monkeypatch):
+    monkeypatch.setitem(get_config(), "query_cache_enabled", True)
+    fake = install_rag(FakeRag(latency_ms=0, jitter=0, corpora=1, files_per_corpus=3))
+    yield fake, fake.list_corpora()[0].name
+    query_cache.clear()
+
+
+def test_search_corpus_serves_repeats_from_the_cache_until_the_corpus_changes(cached_search):
+    fake, corpus_name = cached_search
+    first = search_corpus(corpus_name, "refund policy")
+    assert search_corpus(corpus_name, "Refund policy?") == first
+    assert fake.call_counts()["retrieval_query"] == 1
+
+    invalidate_corpus_cache(corpus_name)
+    search_corpus(corpus_name, "refund policy")
+    assert fake.call_counts()["retrieval_query"] == 2
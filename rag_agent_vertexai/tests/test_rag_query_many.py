@@ -0,0 +1,52 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent import client
+from rag_agent.tools.rag_query_many import rag_query_many, search_corpora
+from rag_agent.tools.utils import corpus_index
+
+
+@pytest.fixture
+def fake():
+    fake = FakeRag(latency_ms=0, jitter=0, corpora=3, files_per_corpus=2, contexts_per_query=2, context_words=5)
+    client.set_rag_module(fake)
+    corpus_index.invalidate()
+    yield fake
+    client.set_rag_module(None)
+    corpus_index.invalidate()
+
+
+def corpus_names(fake):
+    return [corpus.name for corpus in fake.list_corpora()]
+
+
+def test_results_from_every_corpus_are_merged(fake):
+    response = search_corpora(corpus_names(fake), "refund policy", SimpleNamespace(state={}), top_k=10)
+    assert response["status"] == "success"
+    assert {result["corpus_name"] for result in response["results"]} == set(corpus_names(fake))
+    scores = [result["score"] for result in response["results"]]
+    assert scores == sorted(scores)
+
+
+def test_the_timeout_includes_waiting_for_a_worker(fake):
+    fake.latency_overrides = {"retrieval_query": 300}
+    names = corpus_names(fake)
+    start = time.monotonic()
+    response = search_corpora(names, "refund policy", SimpleNamespace(state={}),
+                              max_concurrency=1, timeout_seconds=0.45)
+    elapsed = time.monotonic() - start
+
+    #one worker: the first corpus answers, the second is still running and the third never got a worker
+    assert [status["status"] for status in response["corpus_status"]] == ["success", "error", "error"]
+    assert elapsed < 0.7
+
+
+def test_runs_inside_an_event_loop(fake):
+    async def agent_turn():
+        return rag_query_many(corpus_names(fake), "refund policy", SimpleNamespace(state={}))
+
+    assert asyncio.run(agent_turn())["status"] == "success"
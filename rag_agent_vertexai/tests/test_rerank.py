@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from rag_agent.tools.rerank import bm25_scores, fuse_scores, mmr_order, rerank_results
+
+
+def result(text, distance, source="gs://b/doc.pdf"):
+    return {"source_uri": source, "source_name": source.rsplit("/", 1)[-1], "text": text, "score": distance}
+
+
+def test_bm25_ranks_documents_matching_more_query_terms_first():
+    texts = [
+        "shipping takes three days",
+        "refund requests are handled by support",
+        "refund refund policy details for every refund",
+        "the policy for shipping",
+    ]
+    scores = bm25_scores("refund policy", texts)
+    assert int(np.argmax(scores)) == 2
+    assert scores[1] > 0 and scores[3] > 0
+    assert scores[0] == 0
+    assert bm25_scores("", texts).tolist() == [0, 0, 0, 0]
+
+
+def test_rrf_rewards_agreement_between_the_two_rankings():
+    vector = np.array([0.9, 0.8, 0.7, 0.1])
+    lexical = np.array([0.0, 5.0, 4.0, 9.0])
+    fused = fuse_scores(vector, lexical, "rrf", 0.5)
+    #candidate 1 is second in both rankings and beats the candidates first in only one
+    assert int(np.argmax(fused)) == 1
+    assert fused.min() == 0 and fused.max() == 1
+
+
+def test_weighted_fusion_follows_the_vector_weight():
+    vector = np.array([1.0, 0.0])
+    lexical = np.array([0.0, 1.0])
+    assert int(np.argmax(fuse_scores(vector, lexical, "weighted", 0.8))) == 0
+    assert int(np.argmax(fuse_scores(vector, lexical, "weighted", 0.2))) == 1
+    with pytest.raises(ValueError):
+        fuse_scores(vector, lexical, "sum", 0.5)
+
+
+def test_mmr_moves_a_near_duplicate_behind_a_different_candidate():
+    relevance = np.array([1.0, 0.95, 0.6])
+    similarity = np.array([[1.0, 0.99, 0.0], [0.99, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    assert mmr_order(relevance, similarity, 1.0) == [0, 1, 2]
+    assert mmr_order(relevance, similarity, 0.5) == [0, 2, 1]
+
+
+def test_rerank_results_orders_cuts_to_top_k_and_respects_the_token_budget():
+    results = [
+        result("general company overview and history", 0.10, "gs://b/overview.pdf"),
+        result("refund policy: refunds are issued within 14 days", 0.20, "gs://b/refunds.pdf"),
+        result("refund policy: refunds are issued within 14 days", 0.21, "gs://b/refunds-copy.pdf"),
+        result("shipping policy and refund exceptions", 0.30, "gs://b/shipping.pdf"),
+    ]
+    reranked = rerank_results("refund policy", results, top_k=3, token_budget=1000, mmr_lambda=0.5)
+
+    names = [r["source_name"] for r in reranked]
+    assert names[0] == "refunds.pdf"
+    #the exact duplicate is pushed out by the diverse candidates
+    assert "refunds-copy.pdf" not in names
+    assert len(reranked) == 3
+    assert all("rerank_score" in r for r in reranked)
+
+    #the best result is always kept; the rest only while they fit
+    assert len(rerank_results("refund policy", results, top_k=3, token_budget=1)) == 1
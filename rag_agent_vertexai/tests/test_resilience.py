@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag, FakeServiceError
+from rag_agent import client, resilience
+from rag_agent.client import get_config, get_rag
+from rag_agent.resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    call_with_resilience,
+    is_transient,
+    retry_after_seconds,
+)
+
+
+class TooManyRequests(Exception):
+    """Named like google.api_core's 429 error."""
+    code = 429
+
+
+def sdk_wrapped(error):
+    #vertexai.rag re-raises service errors like this
+    try:
+        raise RuntimeError("Failed in retrieving contexts due to: ", error) from error
+    except RuntimeError as wrapped:
+        return wrapped
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    config = get_config()
+    monkeypatch.setitem(config, "rag_max_retries", 3)
+    monkeypatch.setitem(config, "rag_backoff_base_seconds", 0.0)
+    monkeypatch.setitem(config, "rag_backoff_max_seconds", 0.0)
+    monkeypatch.setitem(config, "circuit_breaker_failure_threshold", 5)
+    monkeypatch.setitem(config, "circuit_breaker_reset_seconds", 60.0)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    yield
+    client.set_rag_module(None)
+
+
+def test_transient_errors_are_recognised_when_wrapped_by_the_sdk():
+    assert is_transient(TooManyRequests())
+    assert is_transient(sdk_wrapped(TooManyRequests()))
+    assert is_transient(sdk_wrapped(FakeServiceError("503")))
+    assert not is_transient(sdk_wrapped(ValueError("bad corpus name")))
+    assert not is_transient(RuntimeError("Failed in retrieving contexts due to: ", "plain text"))
+
+
+def test_retry_after_is_read_from_the_wrapped_error():
+    error = TooManyRequests()
+    error.retry_after = 2
+    assert retry_after_seconds(sdk_wrapped(error)) == 2.0
+    assert retry_after_seconds(sdk_wrapped(FakeServiceError("503"))) is None
+
+
+def test_wrapped_transient_errors_are_retried():
+    failures = [sdk_wrapped(FakeServiceError("503")), sdk_wrapped(TooManyRequests())]
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert call_with_resilience("retrieval_query", flaky) == "ok"
+    assert len(calls) == 3
+
+
+def test_wrapped_permanent_errors_are_not_retried():
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise sdk_wrapped(ValueError("bad request"))
+
+    with pytest.raises(RuntimeError):
+        call_with_resilience("retrieval_query", broken)
+    assert len(calls) == 1
+
+
+def test_fake_rag_with_sdk_wrapped_errors_retries_then_opens_the_breaker():
+    fake = FakeRag(latency_ms=0, jitter=0, corpora=1, files_per_corpus=0, error_rate=1.0, wrap_errors=True)
+    client.set_rag_module(fake)
+
+    with pytest.raises(RuntimeError):
+        get_rag().list_corpora()
+    #the first call and three retries, all counted as failures by the breaker
+    assert fake.call_counts()["list_corpora"] == 4
+
+    #the fifth consecutive failure opens the breaker, so the next retry fails fast
+    with pytest.raises(CircuitOpenError):
+        get_rag().list_corpora()
+    assert fake.call_counts()["list_corpora"] == 5
+    assert resilience.get_circuit_breaker_states()["list_corpora"] == "open"
+
+
+def test_fake_rag_recovers_once_errors_stop():
+    fake = FakeRag(latency_ms=0, jitter=0, corpora=2, files_per_corpus=0, error_rate=1.0, wrap_errors=True, seed=1)
+    client.set_rag_module(fake)
+    with pytest.raises(RuntimeError):
+        get_rag().list_corpora()
+    fake.error_rate = 0.0
+    assert len(get_rag().list_corpora()) == 2
+    assert resilience.get_circuit_breaker_states()["list_corpora"] == "closed"
+
+
+def test_imports_are_not_retried():
+    fake = FakeRag(latency_ms=0, jitter=0, corpora=1, files_per_corpus=0, wrap_errors=True)
+    client.set_rag_module(fake)
+    corpus_name = fake.list_corpora()[0].name
+    fake.error_rate = 1.0
+
+    with pytest.raises(RuntimeError):
+        get_rag().import_files(corpus_name, ["gs://bucket/doc.pdf"])
+    #the service may have accepted the import before failing, so it is not repeated
+    assert fake.call_counts()["import_files"] == 1
+
+
+def test_the_deadline_bounds_a_hung_call():
+    release = threading.Event()
+
+    def hung():
+        release.wait(5)
+        return "late"
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        call_with_resilience("retrieval_query", hung, deadline_seconds=0.1)
+    assert time.monotonic() - start < 1
+    release.set()
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_rag import FakeRag
+from rag_agent.tools.rag_query_batch import rag_query_batch
+from rag_agent.tools.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {"results": [1, 2]}
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flights.do, "key", slow) for _ in range(5)]
+        while flights.stats()["shared"] < 4:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert results == [{"results": [1, 2]}] * 5
+    #every caller gets its own copy
+    assert len({id(result) for result in results}) == 5
+    assert flights.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter_and_the_key_is_forgotten():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("backend down")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(flights.do, "key", failing) for _ in range(3)]
+        while flights.stats()["shared"] < 2:
+            time.sleep(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert flights.do("key", lambda: "retried") == "retried"
+
+
+def test_a_batch_with_repeated_queries_retrieves_each_query_once(install_rag):
+    fake = install_rag(FakeRag(latency_ms=50, jitter=0, corpora=1, files_per_corpus=3))
+    corpus_name = fake.list_corpora()[0].name
+    queries = ["refund policy"] * 4 + ["shipping times"] * 4
+
+    response = rag_query_batch(corpus_name, queries, SimpleNamespace(state={}))
+
+    assert [entry["query"] for entry in response["batch_results"]] == queries
+    #batch_query_max_concurrency is 4, so each group of identical queries is in flight together
+    assert fake.call_counts()["retrieval_query"] == 2